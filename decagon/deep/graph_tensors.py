@@ -0,0 +1,93 @@
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+import tensorflow as tf
+
+
+class PersistentSparseTensor(object):
+    """ A sparse tensor whose indices, values and shape are held in local,
+    non-trainable variables of the session, so they need not be fed every
+    step. Local variables are not saved by tf.train.Saver, so checkpoints
+    do not grow with the graph.
+    """
+    def __init__(self, name):
+        with tf.name_scope(name):
+            self.indices = self._local_variable(tf.zeros([0, 2], dtype=tf.int64), 'indices')
+            self.values = self._local_variable(tf.zeros([0], dtype=tf.float32), 'values')
+            self.dense_shape = self._local_variable(tf.zeros([2], dtype=tf.int64), 'dense_shape')
+
+            self.indices_input = tf.placeholder(tf.int64, shape=[None, 2], name='indices_input')
+            self.values_input = tf.placeholder(tf.float32, shape=[None], name='values_input')
+            self.dense_shape_input = tf.placeholder(tf.int64, shape=[2], name='dense_shape_input')
+
+            self.load_op = tf.group(
+                tf.assign(self.indices, self.indices_input, validate_shape=False),
+                tf.assign(self.values, self.values_input, validate_shape=False),
+                tf.assign(self.dense_shape, self.dense_shape_input),
+            )
+
+        self.tensor = tf.SparseTensor(
+            tf.identity(self.indices), tf.identity(self.values), tf.identity(self.dense_shape))
+
+    def _local_variable(self, initial_value, name):
+        return tf.Variable(
+            initial_value, trainable=False, validate_shape=False, name=name,
+            collections=[tf.GraphKeys.LOCAL_VARIABLES])
+
+    def load_feed_dict(self, sparse_tuple):
+        coords, values, shape = sparse_tuple
+        return {
+            self.indices_input: np.asarray(coords, dtype=np.int64).reshape((-1, 2)),
+            self.values_input: np.asarray(values, dtype=np.float32),
+            self.dense_shape_input: np.asarray(shape, dtype=np.int64),
+        }
+
+
+class PersistentGraphTensors(object):
+    """ The adjacency and feature matrices of a graph, loaded into a session
+    once rather than fed with every minibatch. Tensors are keyed as their
+    placeholders would be, i.e., 'adj_mats_i,j,k' and 'feat_i'.
+
+    load() only reloads the (coords, values, shape) tuples which are not the
+    ones last loaded into that session, e.g., after an active learning round
+    changes some of the graph's relations.
+    """
+    def __init__(self, edge_types, name='graph_tensors'):
+        self.tensors = {}
+        with tf.name_scope(name):
+            for (i, j), num_mtxs in edge_types.items():
+                for k in range(num_mtxs):
+                    key = 'adj_mats_%d,%d,%d' % (i, j, k)
+                    self.tensors[key] = PersistentSparseTensor(key.replace(',', '_'))
+
+            for i in sorted(set(i for i, _ in edge_types)):
+                key = 'feat_%d' % i
+                self.tensors[key] = PersistentSparseTensor(key)
+
+        self._session = None
+        self._loaded = {}
+
+    def __getitem__(self, key):
+        return self.tensors[key].tensor
+
+    def load(self, session, sparse_tuples):
+        """ Loads a dict of key -> (coords, values, shape) into session """
+        if session is not self._session:
+            self._session = session
+            self._loaded = {}
+
+        load_ops = []
+        feed_dict = {}
+        for key, sparse_tuple in sparse_tuples.items():
+            if self._loaded.get(key) is sparse_tuple:
+                continue
+
+            load_ops.append(self.tensors[key].load_op)
+            feed_dict.update(self.tensors[key].load_feed_dict(sparse_tuple))
+
+        if load_ops:
+            session.run(load_ops, feed_dict=feed_dict)
+            self._loaded.update(sparse_tuples)
+
+        return len(load_ops)
@@ -12,6 +12,27 @@ def weight_variable_glorot(input_dim, output_dim, name=""):
     return tf.Variable(initial, name=name)
 
 
+def weight_variable_glorot_stacked(num_stacked, input_dim, output_dim, name=""):
+    """Create num_stacked weight matrices, stacked along the first axis, each
+    initialized as by weight_variable_glorot.
+    """
+    init_range = np.sqrt(6.0 / (input_dim + output_dim))
+    initial = tf.random_uniform([num_stacked, input_dim, output_dim], minval=-init_range,
+                                maxval=init_range, dtype=tf.float32)
+    return tf.Variable(initial, name=name)
+
+
+def weight_variable_glorot_concat(num_concat, input_dim, output_dim, name=""):
+    """Create num_concat weight matrices, concatenated along the second axis
+    into one input_dim x (num_concat * output_dim) matrix, each initialized
+    as by weight_variable_glorot.
+    """
+    init_range = np.sqrt(6.0 / (input_dim + output_dim))
+    initial = tf.random_uniform([input_dim, num_concat * output_dim], minval=-init_range,
+                                maxval=init_range, dtype=tf.float32)
+    return tf.Variable(initial, name=name)
+
+
 def zeros(input_dim, output_dim, name=None):
     """All zeros."""
     initial = tf.zeros((input_dim, output_dim), dtype=tf.float32)
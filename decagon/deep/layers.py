@@ -20,15 +20,59 @@ def get_layer_uid(layer_name=''):
         return _LAYER_UIDS[layer_name]
 
 
-def dropout_sparse(x, keep_prob, num_nonzero_elems):
-    """Dropout for sparse tensors. Currently fails for very large sparse tensors (>1M elements)
+def dropout_sparse(x, keep_prob):
+    """Dropout for sparse tensors of any size. The mask is drawn for x's
+    values as fed, and dropped values are zeroed in place rather than
+    removed, so x's indices are reused as they are.
     """
-    noise_shape = [num_nonzero_elems]
     random_tensor = keep_prob
-    random_tensor += tf.random_uniform(noise_shape)
-    dropout_mask = tf.cast(tf.floor(random_tensor), dtype=tf.bool)
-    pre_out = tf.sparse_retain(x, dropout_mask)
-    return pre_out * (1./keep_prob)
+    random_tensor += tf.random_uniform(tf.shape(x.values))
+    dropout_mask = tf.floor(random_tensor)
+    return tf.SparseTensor(x.indices, x.values * dropout_mask * (1./keep_prob), x.dense_shape)
+
+
+def block_diagonal_sparse(sparse_tensors):
+    """Stacks 2-D sparse tensors of the same dense shape into the block
+    diagonal sparse tensor with them, in order, as its blocks.
+    """
+    indices = []
+    values = []
+    for k, x in enumerate(sparse_tensors):
+        indices.append(x.indices + k * tf.expand_dims(x.dense_shape, 0))
+        values.append(x.values)
+    dense_shape = len(sparse_tensors) * sparse_tensors[0].dense_shape
+    return tf.SparseTensor(tf.concat(indices, 0), tf.concat(values, 0), dense_shape)
+
+
+def stacked_relation_weights(weights, num_types):
+    """Views weights laid out as input_dim x (num_types * output_dim), relation
+    k's being the k-th output_dim columns, as input_dim x num_types x
+    output_dim, without copying them.
+    """
+    input_dim, flat_dim = weights.get_shape().as_list()
+    return tf.reshape(weights, [input_dim, num_types, flat_dim // num_types])
+
+
+def fused_relation_convolution(transformed, adj_mats, act):
+    """Computes the sum over relations k of act(adj_mats[k] * transformed_k)
+    with a single sparse matmul, against the block diagonal stack of the
+    relations' adjacency matrices.
+
+    transformed holds every relation's transformed features, relation k's
+    being its k-th output_dim columns, as laid out by a matmul with weights
+    created by inits.weight_variable_glorot_concat.
+    """
+    num_types = len(adj_mats)
+    output_dim = transformed.get_shape().as_list()[1] // num_types
+
+    # Rows of relation k's transformed features are stacked k-th, to match
+    # the block diagonal adjacency's k-th block
+    transformed = tf.transpose(tf.reshape(transformed, [-1, num_types, output_dim]), [1, 0, 2])
+    transformed = tf.reshape(transformed, [-1, output_dim])
+
+    x = tf.sparse_tensor_dense_matmul(block_diagonal_sparse(adj_mats), transformed)
+    x = act(tf.reshape(x, [num_types, -1, output_dim]))
+    return tf.reduce_sum(x, axis=0)
 
 
 class MultiLayer(object):
@@ -70,26 +114,30 @@ class MultiLayer(object):
 class GraphConvolutionSparseMulti(MultiLayer):
     """Graph convolution layer for sparse inputs."""
     def __init__(self, input_dim, output_dim, adj_mats,
-                 nonzero_feat, dropout=0., act=tf.nn.relu, **kwargs):
+                 dropout=0., act=tf.nn.relu, identity_inputs=False, **kwargs):
         super(GraphConvolutionSparseMulti, self).__init__(**kwargs)
         self.dropout = dropout
         self.adj_mats = adj_mats
         self.act = act
         self.issparse = True
-        self.nonzero_feat = nonzero_feat
+        # If set, inputs are the identity matrix, and are not passed
+        self.identity_inputs = identity_inputs
+        self.input_dim = input_dim[self.edge_type[1]]
         with tf.variable_scope('%s_vars' % self.name):
-            for k in range(self.num_types):
-                self.vars['weights_%d' % k] = inits.weight_variable_glorot(
-                    input_dim[self.edge_type[1]], output_dim, name='weights_%d' % k)
+            # Relations' weights are concatenated along the columns, the
+            # layout the convolution multiplies by, so it never copies them
+            self.vars['weights'] = inits.weight_variable_glorot_concat(
+                self.num_types, self.input_dim, output_dim, name='weights')
 
     def _call(self, inputs):
-        outputs = []
-        for k in range(self.num_types):
-            x = dropout_sparse(inputs, 1-self.dropout, self.nonzero_feat[self.edge_type[1]])
-            x = tf.sparse_tensor_dense_matmul(x, self.vars['weights_%d' % k])
-            x = tf.sparse_tensor_dense_matmul(self.adj_mats[self.edge_type][k], x)
-            outputs.append(self.act(x))
-        outputs = tf.add_n(outputs)
+        if self.identity_inputs:
+            # Each node's transformed features are its own row of the
+            # weights, and dropping its one feature drops that row
+            x = tf.nn.dropout(self.vars['weights'], 1-self.dropout, noise_shape=[self.input_dim, 1])
+        else:
+            x = dropout_sparse(inputs, 1-self.dropout)
+            x = tf.sparse_tensor_dense_matmul(x, self.vars['weights'])
+        outputs = fused_relation_convolution(x, self.adj_mats[self.edge_type], self.act)
         outputs = tf.nn.l2_normalize(outputs, dim=1)
         return outputs
 
@@ -102,18 +150,14 @@ class GraphConvolutionMulti(MultiLayer):
         self.dropout = dropout
         self.act = act
         with tf.variable_scope('%s_vars' % self.name):
-            for k in range(self.num_types):
-                self.vars['weights_%d' % k] = inits.weight_variable_glorot(
-                    input_dim, output_dim, name='weights_%d' % k)
+            # Concatenated along the columns, as in GraphConvolutionSparseMulti
+            self.vars['weights'] = inits.weight_variable_glorot_concat(
+                self.num_types, input_dim, output_dim, name='weights')
 
     def _call(self, inputs):
-        outputs = []
-        for k in range(self.num_types):
-            x = tf.nn.dropout(inputs, 1-self.dropout)
-            x = tf.matmul(x, self.vars['weights_%d' % k])
-            x = tf.sparse_tensor_dense_matmul(self.adj_mats[self.edge_type][k], x)
-            outputs.append(self.act(x))
-        outputs = tf.add_n(outputs)
+        x = tf.nn.dropout(inputs, 1-self.dropout)
+        x = tf.matmul(x, self.vars['weights'])
+        outputs = fused_relation_convolution(x, self.adj_mats[self.edge_type], self.act)
         outputs = tf.nn.l2_normalize(outputs, dim=1)
         return outputs
 
@@ -127,10 +171,9 @@ class DEDICOMDecoder(MultiLayer):
         with tf.variable_scope('%s_vars' % self.name):
             self.vars['global_interaction'] = inits.weight_variable_glorot(
                 input_dim, input_dim, name='global_interaction')
-            for k in range(self.num_types):
-                tmp = inits.weight_variable_glorot(
-                    input_dim, 1, name='local_variation_%d' % k)
-                self.vars['local_variation_%d' % k] = tf.reshape(tmp, [-1])
+            tmp = inits.weight_variable_glorot_stacked(
+                self.num_types, input_dim, 1, name='local_variation')
+            self.vars['local_variation'] = tf.reshape(tmp, [self.num_types, -1])
 
     def _call(self, inputs):
         i, j = self.edge_type
@@ -138,7 +181,7 @@ class DEDICOMDecoder(MultiLayer):
         for k in range(self.num_types):
             inputs_row = tf.nn.dropout(inputs[i], 1-self.dropout)
             inputs_col = tf.nn.dropout(inputs[j], 1-self.dropout)
-            relation = tf.diag(self.vars['local_variation_%d' % k])
+            relation = tf.diag(self.vars['local_variation'][k])
             product1 = tf.matmul(inputs_row, relation)
             product2 = tf.matmul(product1, self.vars['global_interaction'])
             product3 = tf.matmul(product2, relation)
@@ -154,10 +197,9 @@ class DistMultDecoder(MultiLayer):
         self.dropout = dropout
         self.act = act
         with tf.variable_scope('%s_vars' % self.name):
-            for k in range(self.num_types):
-                tmp = inits.weight_variable_glorot(
-                    input_dim, 1, name='relation_%d' % k)
-                self.vars['relation_%d' % k] = tf.reshape(tmp, [-1])
+            tmp = inits.weight_variable_glorot_stacked(
+                self.num_types, input_dim, 1, name='relation')
+            self.vars['relation'] = tf.reshape(tmp, [self.num_types, -1])
 
     def _call(self, inputs):
         i, j = self.edge_type
@@ -165,7 +207,7 @@ class DistMultDecoder(MultiLayer):
         for k in range(self.num_types):
             inputs_row = tf.nn.dropout(inputs[i], 1-self.dropout)
             inputs_col = tf.nn.dropout(inputs[j], 1-self.dropout)
-            relation = tf.diag(self.vars['relation_%d' % k])
+            relation = tf.diag(self.vars['relation'][k])
             intermediate_product = tf.matmul(inputs_row, relation)
             rec = tf.matmul(intermediate_product, tf.transpose(inputs_col))
             outputs.append(self.act(rec))
@@ -179,9 +221,8 @@ class BilinearDecoder(MultiLayer):
         self.dropout = dropout
         self.act = act
         with tf.variable_scope('%s_vars' % self.name):
-            for k in range(self.num_types):
-                self.vars['relation_%d' % k] = inits.weight_variable_glorot(
-                    input_dim, input_dim, name='relation_%d' % k)
+            self.vars['relation'] = inits.weight_variable_glorot_stacked(
+                self.num_types, input_dim, input_dim, name='relation')
 
     def _call(self, inputs):
         i, j = self.edge_type
@@ -189,7 +230,7 @@ class BilinearDecoder(MultiLayer):
         for k in range(self.num_types):
             inputs_row = tf.nn.dropout(inputs[i], 1-self.dropout)
             inputs_col = tf.nn.dropout(inputs[j], 1-self.dropout)
-            intermediate_product = tf.matmul(inputs_row, self.vars['relation_%d' % k])
+            intermediate_product = tf.matmul(inputs_row, self.vars['relation'][k])
             rec = tf.matmul(intermediate_product, tf.transpose(inputs_col))
             outputs.append(self.act(rec))
         return outputs
@@ -5,12 +5,17 @@ import numpy as np
 import scipy.sparse as sp
 
 from ..utility import preprocessing
+from ..utility.normalized_adj_cache import normalized_adj_cache
 
 np.random.seed(123)
 
 EDGES_IDX = 0
 DRUG_DRUG_GRAPH_TYPE = (1, 1)
 
+# Edge types given every other batch slot of an epoch, in slot order. The
+# remaining slot of each cycle goes to a random relation with batches left.
+FIXED_SLOT_EDGE_TYPES = [(0, 0, 0), (0, 1, 0), (1, 0, 0)]
+
 class GraphRelationType:
     def __init__(self, graphType, relationType) -> None:
         self.graphType = graphType
@@ -23,21 +28,25 @@ class EdgeMinibatchIterator(object):
     placeholders -- tensorflow placeholders object
     batch_size -- size of the minibatches
     """
-    def __init__(self, adj_mats, feat, edge_types, drug_drug_test_edges, batch_size=100, val_test_size=0.01):
+    def __init__(self, adj_mats, feat, edge_types, drug_drug_test_edges, batch_size=100, val_test_size=0.01,
+                 graph_tensors=None):
         self.adj_mats = adj_mats
         self.feat = feat
+        # Node types whose features are the identity matrix, which the model
+        # does not take as inputs, so they are neither fed nor loaded
+        self.identity_feat = preprocessing.identity_feature_types(feat)
         self.edge_types = edge_types
         self.batch_size = batch_size
         self.val_test_size = val_test_size
+        # If set, adjacency and feature matrices are loaded into the session
+        # with load_graph_tensors rather than fed with every minibatch
+        self.graph_tensors = graph_tensors
         self.num_edge_types = sum(self.edge_types.values())
         self.drug_drug_test_edges = {
             i: test_edges
             for i, test_edges in enumerate(drug_drug_test_edges.values())
         }
 
-        self.iter = 0
-        self.freebatch_edge_types= list(range(self.num_edge_types))
-        self.batch_num = [0]*self.num_edge_types
         self.current_edge_type_idx = 0
         self.edge_type2idx = {}
         self.idx2edge_type = {}
@@ -71,6 +80,16 @@ class EdgeMinibatchIterator(object):
                 print("Val edges=", "%04d" % len(self.val_edges[i,j][k]))
                 print("Test edges=", "%04d" % len(self.test_edges[i,j][k]))
 
+        # Training edges in the order they were masked. Each epoch's order is
+        # a permutation of these.
+        self.base_train_edges = {
+            edge_type: list(edges) for edge_type, edges in self.train_edges.items()}
+        self.train_edge_perms = [None]*self.num_edge_types
+
+        self.schedule_edge_types = np.empty(0, dtype=np.int64)
+        self.schedule_offsets = np.empty(0, dtype=np.int64)
+        self.schedule_pos = 0
+
     @property
     def graphAndRelationTypes(self):
         for graphType, graphTypeMtxs in self.val_edges.items():
@@ -78,25 +97,54 @@ class EdgeMinibatchIterator(object):
                 yield GraphRelationType(graphType, idx)
 
     def preprocess_graph(self, adj):
-        adj = sp.coo_matrix(adj)
-        if adj.shape[0] == adj.shape[1]:
-            adj_ = adj + sp.eye(adj.shape[0])
-            rowsum = np.array(adj_.sum(1))
-            degree_mat_inv_sqrt = sp.diags(np.power(rowsum, -0.5).flatten())
-            adj_normalized = adj_.dot(degree_mat_inv_sqrt).transpose().dot(degree_mat_inv_sqrt).tocoo()
-        else:
-            rowsum = np.array(adj.sum(1))
-            colsum = np.array(adj.sum(0))
-            rowdegree_mat_inv = sp.diags(np.nan_to_num(np.power(rowsum, -0.5)).flatten())
-            coldegree_mat_inv = sp.diags(np.nan_to_num(np.power(colsum, -0.5)).flatten())
-            adj_normalized = rowdegree_mat_inv.dot(adj).dot(coldegree_mat_inv).tocoo()
-        return preprocessing.sparse_to_tuple(adj_normalized)
-
-    def _ismember(self, a, b):
-        a = np.array(a)
-        b = np.array(b)
-        rows_close = np.all(a - b == 0, axis=1)
-        return np.any(rows_close)
+        return normalized_adj_cache.get(adj)
+
+    def _is_member_sorted(self, values, sorted_values):
+        """Mask of which of values are in the sorted array sorted_values"""
+        if len(sorted_values) == 0:
+            return np.zeros(len(values), dtype=bool)
+
+        idxs = np.searchsorted(sorted_values, values)
+        idxs = np.minimum(idxs, len(sorted_values) - 1)
+        return sorted_values[idxs] == values
+
+    def _sample_false_edges(self, shape, edges_all, num_false, excluded_edges=None):
+        """ Samples num_false distinct (row, col) pairs of a matrix of the given
+        shape which are neither in edges_all nor in excluded_edges.
+        Candidates are drawn in bulk as linear indices, so the cost is
+        O((E + num_false) log E) rather than O(E) per sampled edge.
+        """
+        num_rows, num_cols = shape
+        num_pairs = num_rows * num_cols
+
+        taken_edges = [np.asarray(edges_all, dtype=np.int64).reshape(-1, 2)]
+        if excluded_edges is not None:
+            taken_edges.append(np.asarray(excluded_edges, dtype=np.int64).reshape(-1, 2))
+        taken_edges = np.vstack(taken_edges)
+        taken_linear = np.sort(taken_edges[:, 0] * num_cols + taken_edges[:, 1])
+        num_taken = len(taken_linear) - np.count_nonzero(taken_linear[1:] == taken_linear[:-1])
+
+        num_available = num_pairs - num_taken
+        if num_false > num_available:
+            raise ValueError(
+                "Cannot sample %d false edges, only %d are available" % (num_false, num_available))
+
+        sampled = np.empty(0, dtype=np.int64)
+        while len(sampled) < num_false:
+            # Over-draw by the expected rejection rate so one round usually suffices
+            num_missing = num_false - len(sampled)
+            num_draws = int(np.ceil(1.1 * num_missing * num_pairs / num_available)) + 16
+
+            candidates = np.random.randint(0, num_pairs, size=num_draws, dtype=np.int64)
+            candidates = candidates[~self._is_member_sorted(candidates, taken_linear)]
+
+            # De-duplicate, keeping candidates in the order they were drawn
+            sampled = np.concatenate([sampled, candidates])
+            _, first_idxs = np.unique(sampled, return_index=True)
+            sampled = sampled[np.sort(first_idxs)]
+
+        sampled = sampled[:num_false]
+        return np.stack([sampled // num_cols, sampled % num_cols], axis=1)
 
     def _getIdxPairs(self, setShape):
         xx, yy = np.indices(setShape, dtype=np.dtype(np.int32))
@@ -187,33 +235,10 @@ class EdgeMinibatchIterator(object):
 
         train_edges = np.delete(edges_all, np.hstack([test_edge_idx, val_edge_idx]), axis=0)
 
-        test_edges_false = []
-        while len(test_edges_false) < len(test_edges):
-            if len(test_edges_false) % 1000 == 0:
-                print("Constructing test edges=", "%04d/%04d" % (len(test_edges_false), len(test_edges)))
-            idx_i = np.random.randint(0, self.adj_mats[edge_type][type_idx].shape[0])
-            idx_j = np.random.randint(0, self.adj_mats[edge_type][type_idx].shape[1])
-            if self._ismember([idx_i, idx_j], edges_all):
-                continue
-            if test_edges_false:
-                if self._ismember([idx_i, idx_j], test_edges_false):
-                    continue
-            test_edges_false.append([idx_i, idx_j])
-            break
-
-        val_edges_false = []
-        while len(val_edges_false) < len(val_edges):
-            if len(val_edges_false) % 1000 == 0:
-                print("Constructing val edges=", "%04d/%04d" % (len(val_edges_false), len(val_edges)))
-            idx_i = np.random.randint(0, self.adj_mats[edge_type][type_idx].shape[0])
-            idx_j = np.random.randint(0, self.adj_mats[edge_type][type_idx].shape[1])
-            if self._ismember([idx_i, idx_j], edges_all):
-                continue
-            if val_edges_false:
-                if self._ismember([idx_i, idx_j], val_edges_false):
-                    continue
-            val_edges_false.append([idx_i, idx_j])
-            break
+        shape = self.adj_mats[edge_type][type_idx].shape
+        test_edges_false = self._sample_false_edges(shape, edges_all, len(test_edges))
+        val_edges_false = self._sample_false_edges(
+            shape, edges_all, len(val_edges), excluded_edges=test_edges_false)
 
         # Re-build adj matrices
         data = np.ones(train_edges.shape[0])
@@ -226,11 +251,8 @@ class EdgeMinibatchIterator(object):
         self.val_edges[edge_type][type_idx] = val_edges
         self.test_edges[edge_type][type_idx] = test_edges
 
-        self.val_edges_false[edge_type][type_idx] = \
-            np.array(val_edges_false).reshape((len(val_edges_false), 2))
-
-        self.test_edges_false[edge_type][type_idx] = \
-            np.array(test_edges_false).reshape((len(test_edges_false), 2))
+        self.val_edges_false[edge_type][type_idx] = val_edges_false
+        self.test_edges_false[edge_type][type_idx] = test_edges_false
 
     def _mask_test_edges_drug_drug_precomputed(self, type_idx):
         thisAdjMat = self.adj_mats[DRUG_DRUG_GRAPH_TYPE][type_idx]
@@ -253,19 +275,40 @@ class EdgeMinibatchIterator(object):
         self.test_edges_false[DRUG_DRUG_GRAPH_TYPE][type_idx] = np.empty((0, 2))
 
     def end(self):
-        finished = len(self.freebatch_edge_types) == 0
+        finished = self.schedule_pos >= len(self.schedule_edge_types)
         return finished
 
     def update_feed_dict(self, feed_dict, dropout, placeholders):
         # construct feed dictionary
-        feed_dict.update({
-            placeholders['adj_mats_%d,%d,%d' % (i,j,k)]: self.adj_train[i,j][k]
-            for i, j in self.edge_types for k in range(self.edge_types[i,j])})
-        feed_dict.update({placeholders['feat_%d' % i]: self.feat[i] for i, _ in self.edge_types})
+        if self.graph_tensors is None:
+            feed_dict.update({
+                placeholders['adj_mats_%d,%d,%d' % (i,j,k)]: self.adj_train[i,j][k]
+                for i, j in self.edge_types for k in range(self.edge_types[i,j])})
+            feed_dict.update({
+                placeholders['feat_%d' % i]: self.feat[i]
+                for i, _ in self.edge_types if i not in self.identity_feat})
         feed_dict.update({placeholders['dropout']: dropout})
 
         return feed_dict
 
+    def load_graph_tensors(self, session):
+        """ Loads the adjacency and feature matrices into session's graph
+        tensors, if they are used. Only matrices that changed since the last
+        load into session are reloaded.
+        """
+        if self.graph_tensors is None:
+            return
+
+        sparse_tuples = {
+            'adj_mats_%d,%d,%d' % (i,j,k): self.adj_train[i,j][k]
+            for i, j in self.edge_types for k in range(self.edge_types[i,j])}
+        sparse_tuples.update({
+            'feat_%d' % i: self.feat[i]
+            for i, _ in self.edge_types if i not in self.identity_feat})
+
+        num_loaded = self.graph_tensors.load(session, sparse_tuples)
+        print("Loaded graph tensors=", "%04d/%04d" % (num_loaded, len(sparse_tuples)))
+
     def batch_feed_dict(self, batch_edges, batch_edge_type, placeholders):
         feed_dict = dict()
         feed_dict.update({placeholders['batch']: batch_edges})
@@ -276,42 +319,87 @@ class EdgeMinibatchIterator(object):
         return feed_dict
 
     def next_minibatch_feed_dict(self, placeholders):
-        """Select a random edge type and a batch of edges of the same type"""
-        modVal = 4 if (1, 0, 0) in self.edge_type2idx else 3
-        while True:
-            if self.iter % modVal == 0:
-                # gene-gene relation
-                self.current_edge_type_idx = self.edge_type2idx[0, 0, 0]
-            elif self.iter % modVal == 1:
-                # gene-drug relation
-                self.current_edge_type_idx = self.edge_type2idx[0, 1, 0]
-            elif self.iter % modVal == 2 and modVal == 4:
-                # drug-gene relation
-                self.current_edge_type_idx = self.edge_type2idx[1, 0, 0]
-            else:
-                # random side effect relation
-                if len(self.freebatch_edge_types) > 0:
-                    self.current_edge_type_idx = np.random.choice(self.freebatch_edge_types)
-                else:
-                    self.current_edge_type_idx = self.edge_type2idx[0, 0, 0]
-                    self.iter = 0
-
-            i, j, k = self.idx2edge_type[self.current_edge_type_idx]
-            if self.batch_num[self.current_edge_type_idx] * self.batch_size \
-                   <= len(self.train_edges[i,j][k]) - self.batch_size:
-                break
-            else:
-                if self.iter % 4 in [0, 1, 2]:
-                    self.batch_num[self.current_edge_type_idx] = 0
-                else:
-                    self.freebatch_edge_types.remove(self.current_edge_type_idx)
+        """Select the next edge type and batch of edges of the epoch's schedule"""
+        self.current_edge_type_idx = int(self.schedule_edge_types[self.schedule_pos])
+        start = int(self.schedule_offsets[self.schedule_pos])
+        self.schedule_pos += 1
 
-        self.iter += 1
-        start = self.batch_num[self.current_edge_type_idx] * self.batch_size
-        self.batch_num[self.current_edge_type_idx] += 1
+        i, j, k = self.idx2edge_type[self.current_edge_type_idx]
         batch_edges = self.train_edges[i,j][k][start: start + self.batch_size]
         return self.batch_feed_dict(batch_edges, self.current_edge_type_idx, placeholders)
 
+    def _num_full_batches(self, type_idx):
+        i, j, k = self.idx2edge_type[type_idx]
+        return len(self.train_edges[i,j][k]) // self.batch_size
+
+    def _build_schedule(self):
+        """ Builds an epoch's batch schedule as arrays of edge type indices and
+        of the offsets of their batches in train_edges.
+
+        Each cycle of the schedule has a batch of each of the fixed slot edge
+        types, which restart from their first batch once they run out, followed
+        by a batch of a relation drawn uniformly from those with batches left.
+        The epoch ends with an extra (0, 0, 0) batch once no relation has
+        batches left.
+        """
+        fixed_idxs = [self.edge_type2idx[et] for et in FIXED_SLOT_EDGE_TYPES
+                      if et in self.edge_type2idx]
+        random_idxs = [idx for idx in range(self.num_edge_types) if idx not in fixed_idxs]
+        if not random_idxs:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        num_batches = np.array(
+            [self._num_full_batches(idx) for idx in range(self.num_edge_types)], dtype=np.int64)
+
+        # Draw each cycle's random relation uniformly from those with batches
+        # left, removing relations in O(1) by swapping them with the last one
+        live_idxs = [idx for idx in random_idxs if num_batches[idx] > 0]
+        num_left = num_batches.copy()
+        random_slots = np.empty(int(num_batches[live_idxs].sum()), dtype=np.int64)
+        draws = np.random.random_sample(len(random_slots))
+        for slot in range(len(random_slots)):
+            live_pos = int(draws[slot] * len(live_idxs))
+            type_idx = live_idxs[live_pos]
+            random_slots[slot] = type_idx
+
+            num_left[type_idx] -= 1
+            if num_left[type_idx] == 0:
+                live_idxs[live_pos] = live_idxs[-1]
+                live_idxs.pop()
+
+        last_slot = self.edge_type2idx[0, 0, 0]
+        cycles = np.empty((len(random_slots) + 1, len(fixed_idxs) + 1), dtype=np.int64)
+        cycles[:, :len(fixed_idxs)] = fixed_idxs
+        cycles[:, -1] = np.append(random_slots, last_slot)
+
+        # Edge types without a full batch never get one
+        edge_types = cycles.ravel()
+        edge_types = edge_types[num_batches[edge_types] > 0]
+
+        # The nth batch of an edge type is at offset (n % num_batches) * batch_size
+        order = np.argsort(edge_types, kind='stable')
+        type_starts = np.searchsorted(edge_types[order], edge_types[order])
+        nth_batch = np.empty(len(edge_types), dtype=np.int64)
+        nth_batch[order] = np.arange(len(edge_types)) - type_starts
+
+        offsets = (nth_batch % num_batches[edge_types]) * self.batch_size
+        return edge_types, offsets
+
+    def get_schedule(self):
+        """ Returns the current epoch's schedule, i.e., the order of each edge
+        type's training edges and the sequence of batches, as a dict of arrays
+        which can be saved with np.savez and passed back to shuffle to replay
+        the epoch.
+        """
+        schedule = {
+            'edge_type_idxs': self.schedule_edge_types,
+            'offsets': self.schedule_offsets,
+        }
+        for idx, perm in enumerate(self.train_edge_perms):
+            if perm is not None:
+                schedule['train_edge_perm_%d' % idx] = perm
+        return schedule
+
     def num_training_batches(self, edge_type, type_idx):
         return len(self.train_edges[edge_type][type_idx]) // self.batch_size + 1
 
@@ -324,22 +412,29 @@ class EdgeMinibatchIterator(object):
             val_edges = [edge_list[i] for i in ind[:min(size, len(ind))]]
             return self.batch_feed_dict(val_edges, edge_type, placeholders)
 
-    def shuffle(self):
-        """ Re-shuffle the training set.
-            Also reset the batch number.
+    def shuffle(self, schedule=None):
+        """ Re-shuffle the training set and build the epoch's batch schedule.
+            If schedule (as returned by get_schedule) is given, the epoch
+            replays it instead.
         """
         for edge_type in self.edge_types:
             for k in range(self.edge_types[edge_type]):
-                self.train_edges[edge_type][k] = np.random.permutation(self.train_edges[edge_type][k])
-                self.batch_num[self.edge_type2idx[edge_type[0], edge_type[1], k]] = 0
-        self.current_edge_type_idx = 0
-        self.freebatch_edge_types = list(range(self.num_edge_types))
+                idx = self.edge_type2idx[edge_type[0], edge_type[1], k]
+                base_edges = self.base_train_edges[edge_type][k]
+
+                if schedule is not None:
+                    perm = schedule.get('train_edge_perm_%d' % idx)
+                else:
+                    perm = np.random.permutation(len(base_edges))
 
-        edgeTypesToRemove = [(0, 0, 0), (0, 1, 0), (1, 0, 0)]
-        for edgeTypeToRemove in edgeTypesToRemove:
-            if edgeTypeToRemove in self.edge_type2idx:
-                self.freebatch_edge_types.remove(
-                    self.edge_type2idx[edgeTypeToRemove]
-                )
+                self.train_edge_perms[idx] = perm
+                self.train_edges[edge_type][k] = base_edges[perm] if perm is not None else base_edges
 
-        self.iter = 0
+        if schedule is not None:
+            self.schedule_edge_types = np.asarray(schedule['edge_type_idxs'], dtype=np.int64)
+            self.schedule_offsets = np.asarray(schedule['offsets'], dtype=np.int64)
+        else:
+            self.schedule_edge_types, self.schedule_offsets = self._build_schedule()
+
+        self.schedule_pos = 0
+        self.current_edge_type_idx = 0
@@ -45,15 +45,20 @@ class Model(object):
 
 
 class DecagonModel(Model):
-    def __init__(self, placeholders, num_feat, nonzero_feat, edge_types, decoders, **kwargs):
+    def __init__(self, placeholders, num_feat, edge_types, decoders,
+                 identity_feat=None, **kwargs):
         super(DecagonModel, self).__init__(**kwargs)
         self.edge_types = edge_types
         self.num_edge_types = sum(self.edge_types.values())
         self.num_obj_types = max([i for i, _ in self.edge_types]) + 1
         self.decoders = decoders
-        self.inputs = {i: placeholders['feat_%d' % i] for i, _ in self.edge_types}
+        # Node types whose features are the identity matrix, which are not
+        # fed, as the first layer looks up its weights' rows directly
+        self.identity_feat = set(identity_feat) if identity_feat is not None else set()
+        self.inputs = {
+            i: None if i in self.identity_feat else placeholders['feat_%d' % i]
+            for i, _ in self.edge_types}
         self.input_dim = num_feat
-        self.nonzero_feat = nonzero_feat
         self.placeholders = placeholders
         self.dropout = placeholders['dropout']
         self.adj_mats = {et: [
@@ -67,7 +72,8 @@ class DecagonModel(Model):
             self.hidden1[i].append(GraphConvolutionSparseMulti(
                 input_dim=self.input_dim, output_dim=FLAGS.hidden1,
                 edge_type=(i,j), num_types=self.edge_types[i,j],
-                adj_mats=self.adj_mats, nonzero_feat=self.nonzero_feat,
+                adj_mats=self.adj_mats,
+                identity_inputs=j in self.identity_feat,
                 act=lambda x: x, dropout=self.dropout,
                 logging=self.logging)(self.inputs[j]))
 
@@ -113,25 +119,33 @@ class DecagonModel(Model):
             else:
                 raise ValueError('Unknown decoder type')
 
-        self.latent_inters = []
-        self.latent_varies = []
+        # Each edge type's decoder matrices, stacked along the first axis in
+        # edge type index order, so they are indexed by batch_edge_type_idx
+        latent_inters = []
+        latent_varies = []
         for edge_type in self.edge_types:
             decoder = self.decoders[edge_type]
-            for k in range(self.edge_types[edge_type]):
-                if decoder == 'innerproduct':
-                    glb = tf.eye(FLAGS.hidden2, FLAGS.hidden2)
-                    loc = tf.eye(FLAGS.hidden2, FLAGS.hidden2)
-                elif decoder == 'distmult':
-                    glb = tf.diag(self.edge_type2decoder[edge_type].vars['relation_%d' % k])
-                    loc = tf.eye(FLAGS.hidden2, FLAGS.hidden2)
-                elif decoder == 'bilinear':
-                    glb = self.edge_type2decoder[edge_type].vars['relation_%d' % k]
-                    loc = tf.eye(FLAGS.hidden2, FLAGS.hidden2)
-                elif decoder == 'dedicom':
-                    glb = self.edge_type2decoder[edge_type].vars['global_interaction']
-                    loc = tf.diag(self.edge_type2decoder[edge_type].vars['local_variation_%d' % k])
-                else:
-                    raise ValueError('Unknown decoder type')
-
-                self.latent_inters.append(glb)
-                self.latent_varies.append(loc)
+            decoder_vars = self.edge_type2decoder[edge_type].vars
+            num_types = self.edge_types[edge_type]
+
+            eyes = tf.tile(tf.expand_dims(tf.eye(FLAGS.hidden2, FLAGS.hidden2), 0), [num_types, 1, 1])
+            if decoder == 'innerproduct':
+                glb = eyes
+                loc = eyes
+            elif decoder == 'distmult':
+                glb = tf.matrix_diag(decoder_vars['relation'])
+                loc = eyes
+            elif decoder == 'bilinear':
+                glb = decoder_vars['relation']
+                loc = eyes
+            elif decoder == 'dedicom':
+                glb = tf.tile(tf.expand_dims(decoder_vars['global_interaction'], 0), [num_types, 1, 1])
+                loc = tf.matrix_diag(decoder_vars['local_variation'])
+            else:
+                raise ValueError('Unknown decoder type')
+
+            latent_inters.append(glb)
+            latent_varies.append(loc)
+
+        self.latent_inters = tf.concat(latent_inters, 0)
+        self.latent_varies = tf.concat(latent_varies, 0)
@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 import tensorflow as tf
 import numpy as np
 
@@ -25,6 +27,7 @@ class DecagonOptimizer(object):
         self.batch_edge_type_idx = placeholders['batch_edge_type_idx']
         self.batch_row_edge_type = placeholders['batch_row_edge_type']
         self.batch_col_edge_type = placeholders['batch_col_edge_type']
+        self.sampled_pairs = placeholders['sampled_pairs']
 
         self.row_inputs = tf.squeeze(gather_cols(self.inputs, [0]))
         self.col_inputs = tf.squeeze(gather_cols(self.inputs, [1]))
@@ -33,56 +36,109 @@ class DecagonOptimizer(object):
         self.obj_type_lookup_start = tf.cumsum([0] + obj_type_n[:-1])
         self.obj_type_lookup_end = tf.cumsum(obj_type_n)
 
-        labels = tf.reshape(tf.cast(self.row_inputs, dtype=tf.int64), [self.batch_size, 1])
-        neg_samples_list = []
-        for i, j in self.edge_types:
-            for k in range(self.edge_types[i,j]):
-                neg_samples, _, _ = tf.nn.fixed_unigram_candidate_sampler(
-                    true_classes=labels,
-                    num_true=1,
-                    num_sampled=self.batch_size,
-                    unique=False,
-                    range_max=len(self.degrees[i][k]),
-                    distortion=0.75,
-                    unigrams=self.degrees[i][k].tolist())
-                neg_samples_list.append(neg_samples)
-        self.neg_samples = tf.gather(neg_samples_list, self.batch_edge_type_idx)
-
-        self.preds = self.batch_predict(self.row_inputs, self.col_inputs)
-        self.outputs = tf.diag_part(self.preds)
-        self.outputs = tf.reshape(self.outputs, [-1])
-
-        self.neg_preds = self.batch_predict(self.neg_samples, self.col_inputs)
-        self.neg_outputs = tf.diag_part(self.neg_preds)
-        self.neg_outputs = tf.reshape(self.neg_outputs, [-1])
+        self.neg_samples = self._sample_negatives()
+
+        self.outputs = self.pairwise_predict(self.row_inputs, self.col_inputs)
+        self.neg_outputs = self.pairwise_predict(self.neg_samples, self.col_inputs)
 
         self.predict()
+        self.sampled_predict()
 
         self._build()
 
-    def batch_predict(self, row_inputs, col_inputs):
+    def _sample_negatives(self):
+        """Samples batch_size row nodes for the batch's edge type, each with
+        probability proportional to its degree ** 0.75, i.e., as a fixed
+        unigram candidate sampler with distortion 0.75 would. Rather than one
+        sampler per edge type, the log-probabilities of all edge types with
+        the same row node type are stacked and indexed by edge type.
+
+        The stacked log-probabilities are held in local variables, so that
+        load_degrees can replace them without rebuilding the graph.
+        """
+        row_type_logits, row_type_lookups = self._stacked_row_type_logits()
+
+        self.neg_sample_logits_inputs = {}
+        self.neg_sample_logits_load_ops = []
+        self._degrees_session = None
+
+        samples_by_row_type = []
+        for i in range(len(self.embeddings)):
+            stacked_logits = tf.Variable(
+                row_type_logits[i], trainable=False, name='neg_sample_logits_%d' % i,
+                collections=[tf.GraphKeys.LOCAL_VARIABLES])
+
+            self.neg_sample_logits_inputs[i] = tf.placeholder(
+                tf.float32, shape=row_type_logits[i].shape)
+            self.neg_sample_logits_load_ops.append(
+                tf.assign(stacked_logits, self.neg_sample_logits_inputs[i]))
+
+            logits = tf.gather(
+                stacked_logits, tf.gather(row_type_lookups[i], self.batch_edge_type_idx))
+            samples = tf.multinomial(tf.expand_dims(logits, 0), self.batch_size)
+            samples_by_row_type.append(tf.squeeze(samples, axis=0))
+
+        return tf.gather(tf.stack(samples_by_row_type), self.batch_row_edge_type)
+
+    def _stacked_row_type_logits(self):
+        """Returns, for each row node type, the stacked log-probabilities of
+        its edge types' negative samplers, and the index of each edge type's
+        log-probabilities in that stack.
+        """
+        num_edge_types = sum(self.edge_types.values())
+        row_type_logits = defaultdict(list)
+        row_type_lookups = defaultdict(lambda: np.zeros(num_edge_types, dtype=np.int32))
+        r = 0
+        for i, j in self.edge_types:
+            for k in range(self.edge_types[i,j]):
+                row_type_lookups[i][r] = len(row_type_logits[i])
+                row_type_logits[i].append(_unigram_logits(self.degrees[i][k]))
+                r += 1
+
+        return {i: np.stack(logits) for i, logits in row_type_logits.items()}, row_type_lookups
+
+    def set_degrees(self, degrees):
+        """Replaces the degrees negatives are sampled by, e.g., after an
+        active learning round changes the graph's relations. They take
+        effect in a session once loaded into it with load_degrees.
+        """
+        self.degrees = degrees
+        self._degrees_session = None
+
+    def load_degrees(self, session):
+        """Loads the degrees negatives are sampled by into session, unless
+        they are the ones last loaded into it
+        """
+        if session is self._degrees_session:
+            return
+
+        row_type_logits, _ = self._stacked_row_type_logits()
+        session.run(self.neg_sample_logits_load_ops, feed_dict={
+            self.neg_sample_logits_inputs[i]: row_type_logits[i]
+            for i in range(len(self.embeddings))})
+
+        self._degrees_session = session
+
+    def pairwise_predict(self, row_inputs, col_inputs):
+        """Scores only the pairs (row_inputs[b], col_inputs[b]) of a batch,
+        i.e., the diagonal of the batch's row x col score matrix, at
+        O(B * d^2) cost rather than O(B^2 * d).
+        """
         concatenated = tf.concat(self.embeddings, 0)
 
-        ind_start = tf.gather(self.obj_type_lookup_start, self.batch_row_edge_type)
-        ind_end = tf.gather(self.obj_type_lookup_end, self.batch_row_edge_type)
-        indices = tf.range(ind_start, ind_end)
-        row_embeds = tf.gather(concatenated, indices)
-        row_embeds = tf.gather(row_embeds, row_inputs)
+        row_start = tf.gather(self.obj_type_lookup_start, self.batch_row_edge_type)
+        row_embeds = tf.gather(
+            concatenated, row_start + tf.cast(tf.reshape(row_inputs, [-1]), tf.int32))
 
-        ind_start = tf.gather(self.obj_type_lookup_start, self.batch_col_edge_type)
-        ind_end = tf.gather(self.obj_type_lookup_end, self.batch_col_edge_type)
-        indices = tf.range(ind_start, ind_end)
-        col_embeds = tf.gather(concatenated, indices)
-        col_embeds = tf.gather(col_embeds, col_inputs)
+        col_start = tf.gather(self.obj_type_lookup_start, self.batch_col_edge_type)
+        col_embeds = tf.gather(
+            concatenated, col_start + tf.cast(tf.reshape(col_inputs, [-1]), tf.int32))
 
         latent_inter = tf.gather(self.latent_inters, self.batch_edge_type_idx)
         latent_var = tf.gather(self.latent_varies, self.batch_edge_type_idx)
 
-        product1 = tf.matmul(row_embeds, latent_var)
-        product2 = tf.matmul(product1, latent_inter)
-        product3 = tf.matmul(product2, latent_var)
-        preds = tf.matmul(product3, tf.transpose(col_embeds))
-        return preds
+        relation = tf.matmul(tf.matmul(latent_var, latent_inter), latent_var)
+        return tf.reduce_sum(tf.matmul(row_embeds, relation) * col_embeds, axis=1)
 
     def predict(self):
         concatenated = tf.concat(self.embeddings, 0)
@@ -105,6 +161,63 @@ class DecagonOptimizer(object):
         product3 = tf.matmul(product2, latent_var)
         self.predictions = tf.matmul(product3, tf.transpose(col_embeds))
 
+    def sampled_predict(self):
+        """Scores only the (row, col, edge type idx) triples fed to the
+        sampled_pairs placeholder, rather than a full row type x col type
+        matrix as predict() does. Triples may mix edge types.
+        """
+        rel_row_types = []
+        rel_col_types = []
+        for i, j in self.edge_types:
+            for k in range(self.edge_types[i,j]):
+                rel_row_types.append(i)
+                rel_col_types.append(j)
+
+        rels = self.sampled_pairs[:, 2]
+        concatenated = tf.concat(self.embeddings, 0)
+
+        row_start = tf.gather(self.obj_type_lookup_start, tf.gather(rel_row_types, rels))
+        row_embeds = tf.gather(concatenated, row_start + self.sampled_pairs[:, 0])
+
+        col_start = tf.gather(self.obj_type_lookup_start, tf.gather(rel_col_types, rels))
+        col_embeds = tf.gather(concatenated, col_start + self.sampled_pairs[:, 1])
+
+        # Every decoder's latent variation is diagonal, so it is applied as
+        # an elementwise product with each pair's own diagonal
+        latent_var_diags = tf.gather(tf.matrix_diag_part(self.latent_varies), rels)
+        row_products = self._apply_latent_inters(row_embeds * latent_var_diags, rels)
+        self.sampled_predictions = tf.reduce_sum(
+            row_products * latent_var_diags * col_embeds, axis=1)
+
+    def _apply_latent_inters(self, inputs, rels):
+        """Multiplies each row of inputs by its edge type's latent interaction
+        matrix. Rows are sorted by edge type, so that each edge type present
+        is one matmul of a contiguous slice, and only as many values as
+        inputs has are materialized rather than a d x d matrix per row.
+        """
+        num_rows = tf.shape(rels)[0]
+        _, order = tf.nn.top_k(-rels, k=num_rows)
+        sorted_inputs = tf.gather(inputs, order)
+
+        sorted_rels, _, counts = tf.unique_with_counts(tf.gather(rels, order))
+        starts = tf.cumsum(counts, exclusive=True)
+        num_sorted_rels = tf.size(sorted_rels)
+
+        output_dim = self.latent_inters.shape[-1].value
+        products = tf.TensorArray(
+            tf.float32, size=num_sorted_rels, infer_shape=False,
+            element_shape=tf.TensorShape([None, output_dim]))
+
+        def multiply_rel(u, products):
+            rel_inputs = tf.slice(sorted_inputs, [starts[u], 0], [counts[u], -1])
+            rel_inter = tf.gather(self.latent_inters, sorted_rels[u])
+            return u + 1, products.write(u, tf.matmul(rel_inputs, rel_inter))
+
+        _, products = tf.while_loop(
+            lambda u, _: u < num_sorted_rels, multiply_rel, [0, products])
+
+        return tf.gather(products.concat(), tf.invert_permutation(order))
+
     def _build(self):
         self.cost = self._hinge_loss(self.outputs, self.neg_outputs)
         # self.cost = self._xent_loss(self.outputs, self.neg_outputs)
@@ -114,8 +227,9 @@ class DecagonOptimizer(object):
         self.grads_vars = self.optimizer.compute_gradients(self.cost)
 
     def _hinge_loss(self, aff, neg_aff):
-        """Maximum-margin optimization using the hinge loss."""
-        diff = tf.nn.relu(tf.subtract(neg_aff, tf.expand_dims(aff, 0) - self.margin), name='diff')
+        """Maximum-margin optimization using the hinge loss, per positive and
+        negative pair."""
+        diff = tf.nn.relu(neg_aff - aff + self.margin, name='diff')
         loss = tf.reduce_sum(diff)
         return loss
 
@@ -127,6 +241,16 @@ class DecagonOptimizer(object):
         return loss
 
 
+def _unigram_logits(degrees):
+    """Log of degrees ** 0.75, which are uniform if all degrees are 0."""
+    degrees = np.asarray(degrees, dtype=np.float64)
+    if not np.any(degrees > 0):
+        return np.zeros(len(degrees), dtype=np.float32)
+
+    with np.errstate(divide='ignore'):
+        return (0.75 * np.log(degrees)).astype(np.float32)
+
+
 def gather_cols(params, indices, name=None):
     """Gather columns of a 2D tensor.
 
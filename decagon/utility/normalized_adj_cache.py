@@ -0,0 +1,97 @@
+from __future__ import division
+from __future__ import print_function
+
+from collections import OrderedDict
+import hashlib
+
+import numpy as np
+import scipy.sparse as sp
+
+from . import preprocessing
+
+# Default bound on the total number of non-zeros held by the cache
+DEFAULT_MAX_NNZ = 1 << 25
+
+
+class NormalizedAdjCache(object):
+    """ LRU cache of normalized adjacency matrices, keyed by a hash of the
+    matrix contents so that identical matrices are only normalized once per
+    process, e.g., across the trainables built for each active learning round.
+
+    A miss for a matrix whose transposedMtxLink is cached is filled by
+    swapping the coordinates of the linked matrix's entry, rather than by
+    renormalizing, whenever that gives the same result.
+    """
+    def __init__(self, max_nnz=DEFAULT_MAX_NNZ):
+        self.max_nnz = max_nnz
+        self.num_hits = 0
+        self.num_misses = 0
+        self.num_transposed = 0
+
+        # key -> (sparse tuple, is_transposable)
+        self._entries = OrderedDict()
+        self._total_nnz = 0
+
+    def get(self, adj):
+        """ Returns the normalized adj as a coords, values, shape tuple """
+        key = self._key(adj)
+        if key in self._entries:
+            self.num_hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+        entry = self._from_transpose(adj)
+        if entry is not None:
+            self.num_transposed += 1
+        else:
+            self.num_misses += 1
+            entry = preprocessing.normalize_adj(adj)
+
+        self._put(key, entry)
+        return entry[0]
+
+    def clear(self):
+        self._entries.clear()
+        self._total_nnz = 0
+
+    def _from_transpose(self, adj):
+        tpose_adj = getattr(adj, 'transposedMtxLink', None)
+        if tpose_adj is None:
+            return None
+
+        tpose_entry = self._entries.get(self._key(tpose_adj))
+        if tpose_entry is None or not tpose_entry[1]:
+            return None
+
+        return preprocessing.transpose_tuple(tpose_entry[0]), True
+
+    def _put(self, key, entry):
+        coords, values, _ = entry[0]
+
+        # Entries are shared by all callers, so guard them against mutation
+        coords.flags.writeable = False
+        values.flags.writeable = False
+
+        self._entries[key] = entry
+        self._total_nnz += len(values)
+
+        while self._total_nnz > self.max_nnz and len(self._entries) > 1:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._total_nnz -= len(evicted[1])
+
+    def _key(self, adj):
+        csr = sp.csr_matrix(adj)
+        if not csr.has_canonical_format:
+            csr = csr.copy()
+            csr.sum_duplicates()
+
+        hasher = hashlib.sha1()
+        hasher.update(np.array(csr.shape, dtype=np.int64).tobytes())
+        hasher.update(np.ascontiguousarray(csr.indptr, dtype=np.int64).tobytes())
+        hasher.update(np.ascontiguousarray(csr.indices, dtype=np.int64).tobytes())
+        hasher.update(np.ascontiguousarray(csr.data, dtype=np.float64).tobytes())
+        return hasher.hexdigest()
+
+
+# Shared by all EdgeMinibatchIterators in the process
+normalized_adj_cache = NormalizedAdjCache()
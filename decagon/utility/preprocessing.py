@@ -23,4 +23,57 @@ def sparse_to_tuple(sparse_mx):
     coords = np.vstack((sparse_mx.row, sparse_mx.col)).transpose()
     values = sparse_mx.data
     shape = sparse_mx.shape
-    return coords, values, shape
\ No newline at end of file
+    return coords, values, shape
+
+def is_identity_tuple(sparse_tuple):
+    """ Whether a coords, values, shape tuple is the identity matrix, i.e.,
+    whether it one-hot encodes each node as its own feature.
+    """
+    coords, values, shape = sparse_tuple
+    coords = np.asarray(coords).reshape((-1, 2))
+    if shape[0] != shape[1] or len(coords) != shape[0]:
+        return False
+    return bool(np.all(np.asarray(values) == 1)
+                and np.array_equal(coords[:, 0], coords[:, 1])
+                and np.array_equal(np.sort(coords[:, 0]), np.arange(shape[0])))
+
+
+def identity_feature_types(feat):
+    """ The node types of a node type -> features tuple dict whose features
+    are the identity matrix
+    """
+    return set(i for i, sparse_tuple in feat.items() if is_identity_tuple(sparse_tuple))
+
+
+def normalize_adj(adj):
+    """ Symmetrically normalizes adj (with self-loops if it is square) and
+    returns the result as a coords, values, shape tuple. Also returns whether
+    the normalization of adj's transpose is that tuple's transpose, which is
+    the case when adj's row and column degrees are the same.
+    """
+    adj = sp.coo_matrix(adj)
+    if adj.shape[0] == adj.shape[1]:
+        adj_ = adj + sp.eye(adj.shape[0])
+        rowsum = np.array(adj_.sum(1))
+        colsum = np.array(adj_.sum(0))
+        degree_mat_inv_sqrt = sp.diags(np.power(rowsum, -0.5).flatten())
+        adj_normalized = adj_.dot(degree_mat_inv_sqrt).transpose().dot(degree_mat_inv_sqrt).tocoo()
+        is_transposable = np.array_equal(rowsum.flatten(), colsum.flatten())
+    else:
+        rowsum = np.array(adj.sum(1))
+        colsum = np.array(adj.sum(0))
+        rowdegree_mat_inv = sp.diags(np.nan_to_num(np.power(rowsum, -0.5)).flatten())
+        coldegree_mat_inv = sp.diags(np.nan_to_num(np.power(colsum, -0.5)).flatten())
+        adj_normalized = rowdegree_mat_inv.dot(adj).dot(coldegree_mat_inv).tocoo()
+        is_transposable = True
+    return sparse_to_tuple(adj_normalized), is_transposable
+
+
+def transpose_tuple(sparse_tuple):
+    """ Transposes a coords, values, shape tuple by swapping coordinates,
+    keeping the coords in row-major order.
+    """
+    coords, values, shape = sparse_tuple
+    coords_t = coords[:, ::-1]
+    order = np.lexsort((coords_t[:, 1], coords_t[:, 0]))
+    return np.ascontiguousarray(coords_t[order]), values[order], (shape[1], shape[0])
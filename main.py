@@ -96,6 +96,7 @@ def construct_placeholders(edge_types):
         'batch_edge_type_idx': tf.placeholder(tf.int32, shape=(), name='batch_edge_type_idx'),
         'batch_row_edge_type': tf.placeholder(tf.int32, shape=(), name='batch_row_edge_type'),
         'batch_col_edge_type': tf.placeholder(tf.int32, shape=(), name='batch_col_edge_type'),
+        'sampled_pairs': tf.placeholder(tf.int32, shape=(None, 3), name='sampled_pairs'),
         'degrees': tf.placeholder(tf.int32),
         'dropout': tf.placeholder_with_default(0., shape=()),
     }
@@ -184,12 +185,12 @@ degrees = {
 
 # featureless (genes)
 gene_feat = sp.identity(n_genes)
-gene_nonzero_feat, gene_num_feat = gene_feat.shape
+gene_num_feat = gene_feat.shape[1]
 gene_feat = preprocessing.sparse_to_tuple(gene_feat.tocoo())
 
 # features (drugs)
 drug_feat = sp.identity(n_drugs)
-drug_nonzero_feat, drug_num_feat = drug_feat.shape
+drug_num_feat = drug_feat.shape[1]
 drug_feat = preprocessing.sparse_to_tuple(drug_feat.tocoo())
 
 # data representation
@@ -197,10 +198,6 @@ num_feat = {
     0: gene_num_feat,
     1: drug_num_feat,
 }
-nonzero_feat = {
-    0: gene_nonzero_feat,
-    1: drug_nonzero_feat,
-}
 feat = {
     0: gene_feat,
     1: drug_feat,
@@ -262,9 +259,9 @@ print("Create model")
 model = DecagonModel(
     placeholders=placeholders,
     num_feat=num_feat,
-    nonzero_feat=nonzero_feat,
     edge_types=edge_types,
     decoders=edge_type2decoder,
+    identity_feat=preprocessing.identity_feature_types(feat),
 )
 
 print("Create optimizer")
@@ -284,6 +281,7 @@ with tf.name_scope('optimizer'):
 print("Initialize session")
 sess = tf.Session()
 sess.run(tf.global_variables_initializer())
+opt.load_degrees(sess)
 feed_dict = {}
 
 ###########################################################
@@ -1,12 +1,13 @@
+from .DecagonEmbeddingCache import DecagonEmbeddingCache
 from ...Dtos.AccuracyScores import AccuracyScores
 from ...Dtos.TypeShortcuts import EdgeType, PlaceholdersDict
 from ...Utils.Config import Config
 from ...Utils import MathUtils
+from ...Utils import RankMetrics
 from typing import Dict, List, Iterable, Tuple, Type
-from sklearn import metrics
+from concurrent.futures import ThreadPoolExecutor
 import tensorflow as tf
 import numpy as np
-import math
 
 # A 2-tuple representing an indexing into an M x N matrix
 Coordinate = Tuple[int, int]
@@ -19,6 +20,9 @@ RelationCoordinate = Tuple[int, int, int]
 # Relation coordinate to flattened index of edges in graph
 EdgeTypeToIdx = Dict[RelationCoordinate, int]
 
+# Graph index (i.e., node type) to the number of nodes of that type
+NodeTypeToNumNodes = Dict[int, int]
+
 FROM_GRAPH_IDX = 0
 TO_GRAPH_IDX   = 1
 
@@ -34,8 +38,8 @@ class LossElementsContainer:
     def reduce(
         lossContainers: List[Type['LossElementsContainer']]
     ) -> Type['LossElementsContainer']:
-        preds  = np.hstack(map(lambda x: x.predictions, lossContainers))
-        labels = np.hstack(map(lambda x: x.labels, lossContainers))
+        preds  = np.hstack([x.predictions for x in lossContainers])
+        labels = np.hstack([x.labels for x in lossContainers])
 
         return LossElementsContainer(preds, labels)
 
@@ -45,48 +49,115 @@ class DecagonAccuracyEvaluator:
         session: tf.Session,
         placeholdersDict: PlaceholdersDict,
         predictionsTensor: tf.Tensor,
+        sampledPredictionsTensor: tf.Tensor,
         relCoordToIdx: EdgeTypeToIdx,
+        nodeTypeToNumNodes: NodeTypeToNumNodes,
+        embeddingCache: DecagonEmbeddingCache,
         config: Config
     ) -> None:
         self.session: tf.Session = session
         self.placeholdersDict: PlaceholdersDict = placeholdersDict
         self.predictionsTensor: tf.Tensor  = predictionsTensor
+        self.sampledPredictionsTensor: tf.Tensor = sampledPredictionsTensor
         self.relCoordToIdx : EdgeTypeToIdx = relCoordToIdx
+        self.nodeTypeToNumNodes: NodeTypeToNumNodes = nodeTypeToNumNodes
         self.apkRank = int(config.getSetting('ApkRank'))
 
+        # If fewer than this proportion of a relation's predictions are
+        # needed, only those are computed rather than the full matrix
+        self.sampledPredictionMaxDensity = float(
+            config.getSetting('SampledPredictionMaxDensity')
+        )
+
+        # evaluateAll runs the model once, then scores each relation's
+        # samples from the cached embeddings, across threads if configured
+        self.embeddingCache: DecagonEmbeddingCache = embeddingCache
+
+        self.threadPool: ThreadPoolExecutor = None
+        numThreads = int(config.getSetting('EvaluationNumThreads'))
+        if numThreads > 1:
+            self.threadPool = ThreadPoolExecutor(max_workers=numThreads)
+
     def evaluateAll(
         self,
         feedDict: Dict,
         positiveEdgeSamples: EdgeSamples,
         negativeEdgeSamples: EdgeSamples,
     ) -> AccuracyScores:
-        def doEval(relCoord: RelationCoordinate) -> AccuracyScores:
-            self._updateFeedDictForEval(feedDict, relCoord)
+        self.embeddingCache.update(feedDict)
+
+        return self.evaluateAllFromEmbeddings(
+            self.embeddingCache,
+            positiveEdgeSamples,
+            negativeEdgeSamples
+        )
 
-            return self._computePredictions(
-                feedDict,
+    def evaluateAllFromEmbeddings(
+        self,
+        embeddingCache: DecagonEmbeddingCache,
+        positiveEdgeSamples: EdgeSamples,
+        negativeEdgeSamples: EdgeSamples,
+    ) -> AccuracyScores:
+        '''
+        As evaluateAll, but scores an already updated embedding cache, so
+        the session is not used
+        '''
+        def doEval(relCoord: RelationCoordinate) -> LossElementsContainer:
+            return self._computeCachedPredictions(
+                embeddingCache,
                 relCoord,
                 positiveEdgeSamples,
                 negativeEdgeSamples
             )
 
-        drugRels = filter(lambda x: x[:2] == (1, 1), self.relCoordToIdx.keys())
-        lossElements = LossElementsContainer.reduce(list(map(doEval, drugRels)))
+        drugRels = [x for x in self.relCoordToIdx.keys() if x[:2] == (1, 1)]
+        mapFxn = self.threadPool.map if self.threadPool is not None else map
+        relLossElements = list(mapFxn(doEval, drugRels))
 
-        auroc = math.nan
-        auprc = math.nan
+        lossElements = LossElementsContainer.reduce(relLossElements)
+        aurocs, auprcs, apks = RankMetrics.segmentedRankMetrics(
+            lossElements.predictions,
+            lossElements.labels,
+            [len(x.labels) for x in relLossElements],
+            self.apkRank
+        )
+
+        perRelationScores = {
+            relCoord: AccuracyScores(auroc, auprc, apk)
+            for relCoord, auroc, auprc, apk in zip(drugRels, aurocs, auprcs, apks)
+        }
+
+        auroc, auprc, apk = RankMetrics.rankMetrics(
+            lossElements.predictions,
+            lossElements.labels,
+            self.apkRank
+        )
 
-        try:
-            auroc = metrics.roc_auc_score(lossElements.labels, lossElements.predictions)
-        except ValueError:
-            pass
+        return AccuracyScores(auroc, auprc, apk, perRelationScores)
 
-        try:
-            auprc = metrics.average_precision_score(lossElements.labels, lossElements.predictions)
-        except ValueError:
-            pass
+    def evaluateFromEmbeddings(
+        self,
+        embeddingCache: DecagonEmbeddingCache,
+        relCoord: RelationCoordinate,
+        positiveEdgeSamples: EdgeSamples,
+        negativeEdgeSamples: EdgeSamples,
+    ) -> AccuracyScores:
+        '''
+        As evaluate, but scores an already updated embedding cache, so the
+        session is not used
+        '''
+        lossElements: LossElementsContainer = self._computeCachedPredictions(
+            embeddingCache,
+            relCoord,
+            positiveEdgeSamples,
+            negativeEdgeSamples
+        )
 
-        apk   = 0 #self._computeApk(lossElements)
+        auroc, auprc, apk = RankMetrics.rankMetrics(
+            lossElements.predictions,
+            lossElements.labels,
+            self.apkRank
+        )
 
         return AccuracyScores(auroc, auprc, apk)
 
@@ -106,9 +177,11 @@ class DecagonAccuracyEvaluator:
             negativeEdgeSamples
         )
 
-        auroc = metrics.roc_auc_score(lossElements.labels, lossElements.predictions)
-        auprc = metrics.average_precision_score(lossElements.labels, lossElements.predictions)
-        apk   = 0 #self._computeApk(lossElements)
+        auroc, auprc, apk = RankMetrics.rankMetrics(
+            lossElements.predictions,
+            lossElements.labels,
+            self.apkRank
+        )
 
         return AccuracyScores(auroc, auprc, apk)
 
@@ -119,21 +192,66 @@ class DecagonAccuracyEvaluator:
         positiveEdgeSamples: EdgeSamples,
         negativeEdgeSamples: EdgeSamples,
     ) -> LossElementsContainer:
-        decoderOutput = self.session.run(self.predictionsTensor, feed_dict=feedDict)
-        predictions = MathUtils.sigmoid(decoderOutput)
+        positiveSampleIdxs = self._getSampleIdxs(positiveEdgeSamples, relCoord)
+        negativeSampleIdxs = self._getSampleIdxs(negativeEdgeSamples, relCoord)
 
-        positiveSamplePredictions = self._getSampledPredictions(
-            predictions,
-            positiveEdgeSamples,
+        if self._shouldUseSampledPredictions(
+            len(positiveSampleIdxs) + len(negativeSampleIdxs),
             relCoord
+        ):
+            positiveSamplePredictions, negativeSamplePredictions = \
+                self._computeSampledPredictions(
+                    feedDict,
+                    relCoord,
+                    positiveSampleIdxs,
+                    negativeSampleIdxs
+                )
+        else:
+            decoderOutput = self.session.run(self.predictionsTensor, feed_dict=feedDict)
+            predictions = MathUtils.sigmoid(decoderOutput)
+
+            positiveSamplePredictions = self._getSampledPredictions(
+                predictions,
+                positiveSampleIdxs
+            )
+
+            negativeSamplePredictions = self._getSampledPredictions(
+                predictions,
+                negativeSampleIdxs
+            )
+
+        return self._toLossElements(
+            positiveSamplePredictions,
+            negativeSamplePredictions
         )
 
-        negativeSamplePredictions = self._getSampledPredictions(
-            predictions,
-            negativeEdgeSamples,
-            relCoord
+    def _computeCachedPredictions(
+        self,
+        embeddingCache: DecagonEmbeddingCache,
+        relCoord: RelationCoordinate,
+        positiveEdgeSamples: EdgeSamples,
+        negativeEdgeSamples: EdgeSamples,
+    ) -> LossElementsContainer:
+        def getPredictions(edgeSamples: EdgeSamples) -> np.ndarray:
+            decoderOutput = embeddingCache.scorePairs(
+                relCoord[FROM_GRAPH_IDX],
+                relCoord[TO_GRAPH_IDX],
+                self.relCoordToIdx[relCoord],
+                self._getSampleIdxs(edgeSamples, relCoord)
+            )
+
+            return MathUtils.sigmoid(decoderOutput)
+
+        return self._toLossElements(
+            getPredictions(positiveEdgeSamples),
+            getPredictions(negativeEdgeSamples)
         )
 
+    def _toLossElements(
+        self,
+        positiveSamplePredictions: np.ndarray,
+        negativeSamplePredictions: np.ndarray
+    ) -> LossElementsContainer:
         sampledPredictions = np.hstack(
             [positiveSamplePredictions, negativeSamplePredictions]
         )
@@ -148,29 +266,55 @@ class DecagonAccuracyEvaluator:
             labels=sampledLabels
         )
 
-    def _getSampledPredictions(
+    def _shouldUseSampledPredictions(
         self,
-        predictions: np.ndarray,
-        edgeSamples: EdgeSamples,
+        numSamples: int,
         relCoord: RelationCoordinate
-    ) -> np.ndarray:
-        linearizedSampleIdxs = self._linearizeSampleIdxs(
-            edgeSamples,
-            relCoord,
-            predictions.shape[COL_SHAPE_IDX]
+    ) -> bool:
+        numRows = self.nodeTypeToNumNodes[relCoord[FROM_GRAPH_IDX]]
+        numCols = self.nodeTypeToNumNodes[relCoord[TO_GRAPH_IDX]]
+
+        return numSamples < self.sampledPredictionMaxDensity * numRows * numCols
+
+    def _computeSampledPredictions(
+        self,
+        feedDict: Dict,
+        relCoord: RelationCoordinate,
+        positiveSampleIdxs: np.ndarray,
+        negativeSampleIdxs: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        sampleIdxs = np.vstack([positiveSampleIdxs, negativeSampleIdxs])
+        sampledPairs = np.hstack([
+            sampleIdxs,
+            np.full((len(sampleIdxs), 1), self.relCoordToIdx[relCoord]),
+        ])
+
+        sampledFeedDict = dict(feedDict)
+        sampledFeedDict[self.placeholdersDict['sampled_pairs']] = sampledPairs
+
+        decoderOutput = self.session.run(
+            self.sampledPredictionsTensor,
+            feed_dict=sampledFeedDict
         )
+        predictions = MathUtils.sigmoid(decoderOutput)
 
-        import os
-        print('for pid %d, preds type: %s, sampleIdxs type: %s' % (os.getpid(), predictions.dtype, linearizedSampleIdxs.dtype))
+        return np.split(predictions, [len(positiveSampleIdxs)])
+
+    def _getSampledPredictions(
+        self,
+        predictions: np.ndarray,
+        sampleIdxs: np.ndarray
+    ) -> np.ndarray:
+        linearizedSampleIdxs = \
+            (sampleIdxs[:, 0] * predictions.shape[COL_SHAPE_IDX]) + sampleIdxs[:, 1]
 
         # np.take here is equivalent to predictions.ravel()[linearizedSampleIdxs]
         return np.take(predictions, linearizedSampleIdxs)
 
-    def _linearizeSampleIdxs(
+    def _getSampleIdxs(
         self,
         edgeSamples: EdgeSamples,
-        relCoord: RelationCoordinate,
-        numCols: int
+        relCoord: RelationCoordinate
     ) -> np.ndarray:
         # relCoord is a 3-tuple wherein the first two indices represent the
         # subgraph type, while the last index represents the kth adjacency
@@ -183,7 +327,7 @@ class DecagonAccuracyEvaluator:
         if not np.issubdtype(twoDimSampleIndexes.dtype, np.integer):
             twoDimSampleIndexes = twoDimSampleIndexes.astype(np.int64)
 
-        return (twoDimSampleIndexes[:, 0] * numCols) + twoDimSampleIndexes[:, 1]
+        return twoDimSampleIndexes.reshape(-1, 2)
 
     def _updateFeedDictForEval(self, feedDict: Dict, relCoord: RelationCoordinate) -> None:
         feedDict[self.placeholdersDict['dropout']] = 0
@@ -193,9 +337,6 @@ class DecagonAccuracyEvaluator:
 
         return
 
-    def _computeApk(self, lossElements: LossElementsContainer) -> float:
-        pass
-
     @staticmethod
     def _toLinearIdxs(twoDimIdxs, predTensorDim) -> np.ndarray:
         return (twoDimIdxs[:,0] * predTensorDim) + idxs[:,1]
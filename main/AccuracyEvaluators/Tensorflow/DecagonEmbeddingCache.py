@@ -0,0 +1,81 @@
+from ...Dtos.TypeShortcuts import PlaceholdersDict
+from typing import Dict, List
+import tensorflow as tf
+import numpy as np
+
+ROW_IDX = 0
+COL_IDX = 1
+
+class DecagonEmbeddingCache:
+    '''
+    Holds the values of a decagon model's final node embeddings and decoder
+    matrices, fetched from the session in a single run.  Once updated, the
+    pairs of any number of relations are scored in numpy without rerunning
+    the graph convolutions.
+
+    Relation indices are edge type indices, i.e., indices into the first
+    axis of the stacked latent interaction and variation tensors.
+    '''
+    def __init__(
+        self,
+        session: tf.Session,
+        placeholdersDict: PlaceholdersDict,
+        embeddingTensors: List[tf.Tensor],
+        latentInterTensor: tf.Tensor,
+        latentVaryTensor: tf.Tensor
+    ) -> None:
+        self.session: tf.Session = session
+        self.placeholdersDict: PlaceholdersDict = placeholdersDict
+        self.embeddingTensors: List[tf.Tensor] = embeddingTensors
+        self.latentInterTensor: tf.Tensor = latentInterTensor
+        self.latentVaryTensor: tf.Tensor = latentVaryTensor
+
+        # Embeddings of each node type, indexed by graph index
+        self.embeddings: List[np.ndarray] = None
+
+        # The d x d matrix D R D of each relation, stacked along axis 0
+        self.relationMtxs: np.ndarray = None
+
+    def update(self, feedDict: Dict, variableValues: Dict = None) -> None:
+        '''
+        Runs the model forward and caches its outputs.  If variableValues,
+        a dict from the model's variables to values fetched from them, is
+        given, the values are fed in place of the variables, so the cache
+        holds the model as of that fetch even if it has been trained since.
+        '''
+        evalFeedDict = dict(feedDict)
+        evalFeedDict[self.placeholdersDict['dropout']] = 0
+        if variableValues is not None:
+            evalFeedDict.update(variableValues)
+
+        embeddings, latentInters, latentVaries = self.session.run(
+            [self.embeddingTensors, self.latentInterTensor, self.latentVaryTensor],
+            feed_dict=evalFeedDict
+        )
+
+        self.embeddings = embeddings
+        self.relationMtxs = np.matmul(
+            np.matmul(latentVaries, latentInters),
+            latentVaries
+        )
+
+    def scorePairs(
+        self,
+        rowType: int,
+        colType: int,
+        relationIdx: int,
+        sampleIdxs: np.ndarray
+    ) -> np.ndarray:
+        '''
+        Returns the decoder outputs (i.e., pre-sigmoid) for the (row, col)
+        pairs of sampleIdxs under the given relation
+        '''
+        if self.embeddings is None:
+            raise RuntimeError('update must be called before scoring pairs')
+
+        rowEmbeds = self.embeddings[rowType][sampleIdxs[:, ROW_IDX]]
+        colEmbeds = self.embeddings[colType][sampleIdxs[:, COL_IDX]]
+
+        rowProducts = np.matmul(rowEmbeds, self.relationMtxs[relationIdx])
+
+        return np.einsum('ij,ij->i', rowProducts, colEmbeds)
@@ -0,0 +1,91 @@
+from ..Utils import MathUtils
+from ..Utils.AcquisitionFunctions import AcquisitionFunction
+from ..Utils.CandidatePool import CandidatePool
+from typing import Callable, List, Tuple
+import numpy as np
+
+# Returns the decoder outputs (i.e., pre-sigmoid) of a relation's
+# candidates, given their linear indices
+RelationScoreFxn = Callable[[np.ndarray], np.ndarray]
+
+class CandidateScorer:
+    '''
+    Selects a candidate pool's most valuable remaining candidates.  Each
+    relation's candidates are scored in chunks of at most chunkSize, valued
+    with the acquisition function, and reduced to the best seen so far with
+    argpartition, so memory is proportional to the number selected plus
+    the chunk size, and no full sort is done.
+    '''
+    def __init__(self, acquisitionFxn: AcquisitionFunction, chunkSize: int) -> None:
+        self.acquisitionFxn: AcquisitionFunction = acquisitionFxn
+        self.chunkSize: int = chunkSize
+
+    def getTopCandidates(
+        self,
+        candidatePool: CandidatePool,
+        relationScoreFxns: List[RelationScoreFxn],
+        numToSelect: int
+    ) -> np.ndarray:
+        '''
+        Returns the pool indices of the numToSelect most valuable remaining
+        candidates, most valuable first.  relationScoreFxns holds each of
+        the pool's relations' score function, in relation order.
+        '''
+        if numToSelect <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        bufferIdxs = []
+        bufferValues = []
+        bufferSize = 0
+
+        for relationIdx, scoreFxn in enumerate(relationScoreFxns):
+            linearIdxs = candidatePool.remainingInRelation(relationIdx)
+
+            for start in range(0, len(linearIdxs), self.chunkSize):
+                chunkIdxs = linearIdxs[start:start + self.chunkSize]
+                chunkValues = self.acquisitionFxn(MathUtils.sigmoid(scoreFxn(chunkIdxs)))
+
+                chunkIdxs, chunkValues = _getTop(
+                    candidatePool.toPoolIdxs(relationIdx, chunkIdxs),
+                    chunkValues,
+                    numToSelect
+                )
+
+                bufferIdxs.append(chunkIdxs)
+                bufferValues.append(chunkValues)
+                bufferSize += len(chunkIdxs)
+
+                # Reduced only once it has doubled, so each candidate is
+                # partitioned a constant number of times on average
+                if bufferSize >= 2 * numToSelect:
+                    topIdxs, topValues = _getTop(
+                        np.concatenate(bufferIdxs),
+                        np.concatenate(bufferValues),
+                        numToSelect
+                    )
+
+                    bufferIdxs, bufferValues = [topIdxs], [topValues]
+                    bufferSize = len(topIdxs)
+
+        if bufferSize == 0:
+            return np.empty(0, dtype=np.int64)
+
+        topIdxs, topValues = _getTop(
+            np.concatenate(bufferIdxs),
+            np.concatenate(bufferValues),
+            numToSelect
+        )
+
+        return topIdxs[np.argsort(-topValues, kind='stable')]
+
+def _getTop(
+    idxs: np.ndarray,
+    values: np.ndarray,
+    numToSelect: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    if len(idxs) <= numToSelect:
+        return idxs, values
+
+    topPositions = np.argpartition(-values, numToSelect - 1)[:numToSelect]
+
+    return idxs[topPositions], values[topPositions]
@@ -1,8 +1,11 @@
+from .CandidateScorer import CandidateScorer, RelationScoreFxn
 from .RandomMaskingActiveLearner import RandomMaskingActiveLearner
+from ..AccuracyEvaluators.Tensorflow.DecagonEmbeddingCache import DecagonEmbeddingCache
+from ..Dtos.Enums.AcquisitionFunctionType import AcquisitionFunctionType
 from ..Dtos.TypeShortcuts import PlaceholdersDict
 from ..Trainable.Decagon.DecagonDataSet import DecagonDataSet
 from ..Trainable.Decagon.DecagonTrainableBuilder import DecagonTrainableBuilder
-from ..Utils import MathUtils
+from ..Utils import AcquisitionFunctions
 from typing import Dict, Tuple, List
 
 import tensorflow as tf
@@ -12,8 +15,23 @@ RelationCoordinate = Tuple[int, int, int]
 EdgeTypeToIdx = Dict[RelationCoordinate, int]
 
 COL_SHAPE_IDX = 1
+DRUG_GRAPH_IDX = 1
+
+# Edge type of the feed dict's batch, which scoring a relation's candidates
+# overrides with the relation's own
+RANKING_EDGE_TYPE = (1, 1, 0)
 
 class GreedyActiveLearner(RandomMaskingActiveLearner, functionalityType=None):
+    '''
+    Unmasks the candidates valued highest by the configured acquisition
+    function.  Each candidate is scored under its own relation from an
+    embedding cache, i.e., from the model's embeddings and decoder matrices
+    fetched in one forward pass per round.  The cache is either passed to
+    getUpdate or built from the model passed to it.
+
+    If GreedyScoreWithSessionRuns is set, candidates are instead scored by
+    running the model's (sampled) predictions, a forward pass per relation.
+    '''
     def __init__(self, initDataSet, config):
         self.session: tf.Session = tf.Session()
 
@@ -21,15 +39,51 @@ class GreedyActiveLearner(RandomMaskingActiveLearner, functionalityType=None):
         self.edgeTypeToIdx = self._constructEdgeTypeToIdx(self.decagonDataSet, config)
 
         self.predictionsTensor = None
+        self.sampledPredictionsTensor = None
         self.placeholdersDict = None
         self.feedDict = None
+        self.embeddingCache: DecagonEmbeddingCache = None
+
+        self.densePredictions: np.ndarray = None
+        self.densePredictionsEdgeTypeIdx: int = None
+
+        self.candidateScorer: CandidateScorer = CandidateScorer(
+            AcquisitionFunctions.getAcquisitionFunction(
+                AcquisitionFunctionType[config.getSetting('GreedyAcquisitionFunction')]
+            ),
+            int(config.getSetting('GreedyScoringChunkSize'))
+        )
+
+        self.shouldScoreWithSessionRuns = bool(
+            config.getSetting('GreedyScoreWithSessionRuns')
+        )
+
+        # If fewer than this proportion of the predictions are needed, only
+        # those are computed rather than the full matrix
+        self.sampledPredictionMaxDensity = float(
+            config.getSetting('SampledPredictionMaxDensity')
+        )
 
         super().__init__(initDataSet, config)
 
-    def getUpdate(self, predsTensor, placeholders, feedDict, session, dataSet, iterResults):
+    def getUpdate(
+        self,
+        predsTensor,
+        placeholders,
+        feedDict,
+        session,
+        dataSet,
+        iterResults,
+        sampledPredsTensor=None,
+        embeddingCache=None,
+        model=None
+    ):
         if predsTensor is not None:
             self.predictionsTensor = predsTensor
 
+        if sampledPredsTensor is not None:
+            self.sampledPredictionsTensor = sampledPredsTensor
+
         if placeholders is not None:
             self.placeholdersDict = placeholders
 
@@ -39,8 +93,22 @@ class GreedyActiveLearner(RandomMaskingActiveLearner, functionalityType=None):
         if session is not None:
             self.session = session
 
+        if embeddingCache is not None:
+            self.embeddingCache = embeddingCache
+        elif model is not None:
+            self.embeddingCache = self._buildEmbeddingCache(model)
+
         return super().getUpdate(dataSet, iterResults)
 
+    def _buildEmbeddingCache(self, model) -> DecagonEmbeddingCache:
+        return DecagonEmbeddingCache(
+            self.session,
+            self.placeholdersDict,
+            model.embeddings,
+            model.latent_inters,
+            model.latent_varies
+        )
+
     def _getPredictionsTensor(self, decagonDataSet, config) -> tf.Tensor:
         trainableBuilder = DecagonTrainableBuilder(
             None,
@@ -63,19 +131,115 @@ class GreedyActiveLearner(RandomMaskingActiveLearner, functionalityType=None):
 
         return result
 
-    def _getNewSampleIdxs(self, numToUnmask: int) -> List[Tuple[int, int, int]]:
+    def _getNewSampleIdxs(self, numToUnmask: int) -> np.ndarray:
         # If no iterations happened yet, just pick a random unmask set
         if self.numIters == 0 or self._noRelsExist():
             return super()._getNewSampleIdxs(numToUnmask)
 
-        self._updateFeedDict()
-        decoderOutput = self.session.run(self.predictionsTensor, feed_dict=self.feedDict)
-        predictions = MathUtils.sigmoid(decoderOutput)
+        return self.candidateScorer.getTopCandidates(
+            self.candidatePool,
+            self._getRelationScoreFxns(),
+            numToUnmask
+        )
 
-        rankedPossibilities = self._getRankedPossibilities(predictions)
-        bestPossibilityIdxs = rankedPossibilities[:numToUnmask]
+    def _getRelationScoreFxns(self) -> List[RelationScoreFxn]:
+        '''
+        Returns the score function of each of the candidate pool's relations
+        '''
+        self._updateFeedDict()
 
-        return bestPossibilityIdxs
+        # Drug-drug relations' edge type indices follow their order in the
+        # data set's relation matrices
+        relationKIdxs = {rel: k for k, rel in enumerate(self.adjMtxShapes)}
+        edgeTypeIdxs = [
+            self.edgeTypeToIdx[1, 1, relationKIdxs[rel]]
+            for rel in self.poolRelations
+        ]
+
+        # Predictions of the last round's weights are stale
+        self.densePredictions = None
+        self.densePredictionsEdgeTypeIdx = None
+
+        getScoreFxn = None
+        if self.shouldScoreWithSessionRuns:
+            if self._shouldUseSampledPredictions():
+                getScoreFxn = self._getSampledScoreFxn
+            else:
+                getScoreFxn = self._getDenseScoreFxn
+        elif self.embeddingCache is not None:
+            self.embeddingCache.update(self.feedDict)
+            getScoreFxn = self._getCachedScoreFxn
+        else:
+            raise RuntimeError(
+                'An embedding cache or model must be passed to getUpdate unless '
+                'GreedyScoreWithSessionRuns is set'
+            )
+
+        return [getScoreFxn(edgeTypeIdx) for edgeTypeIdx in edgeTypeIdxs]
+
+    def _getCachedScoreFxn(self, edgeTypeIdx: int) -> RelationScoreFxn:
+        numCols = next(iter(self.adjMtxShapes.values()))[COL_SHAPE_IDX]
+
+        def scoreFxn(linearIdxs: np.ndarray) -> np.ndarray:
+            return self.embeddingCache.scorePairs(
+                DRUG_GRAPH_IDX,
+                DRUG_GRAPH_IDX,
+                edgeTypeIdx,
+                np.stack(np.divmod(linearIdxs, numCols), axis=1)
+            )
+
+        return scoreFxn
+
+    def _getSampledScoreFxn(self, edgeTypeIdx: int) -> RelationScoreFxn:
+        return lambda linearIdxs: self._computeSampledPredictions(linearIdxs, edgeTypeIdx)
+
+    def _getDenseScoreFxn(self, edgeTypeIdx: int) -> RelationScoreFxn:
+        return lambda linearIdxs: np.take(self._getDensePredictions(edgeTypeIdx), linearIdxs)
+
+    def _getDensePredictions(self, edgeTypeIdx: int) -> np.ndarray:
+        # Relations are scored one at a time, so only the last scored
+        # relation's full predictions are kept
+        if self.densePredictionsEdgeTypeIdx != edgeTypeIdx:
+            feedDict = dict(self.feedDict)
+            feedDict[self.placeholdersDict['batch_edge_type_idx']] = edgeTypeIdx
+
+            # Released first, so two relations' predictions are never held
+            self.densePredictions = None
+            self.densePredictions = self.session.run(self.predictionsTensor, feed_dict=feedDict)
+            self.densePredictionsEdgeTypeIdx = edgeTypeIdx
+
+        return self.densePredictions
+
+    def _shouldUseSampledPredictions(self) -> bool:
+        if self.sampledPredictionsTensor is None:
+            return False
+
+        numRows, numCols = next(iter(self.adjMtxShapes.values()))
+        maxNumSamples = self.sampledPredictionMaxDensity * numRows * numCols
+
+        return len(self.candidatePool) < maxNumSamples
+
+    def _computeSampledPredictions(
+        self,
+        linearCandidateIdxs: np.ndarray,
+        edgeTypeIdx: int
+    ) -> np.ndarray:
+        numCols = next(iter(self.adjMtxShapes.values()))[COL_SHAPE_IDX]
+        rows, cols = np.divmod(linearCandidateIdxs, numCols)
+
+        sampledPairs = np.stack([
+            rows,
+            cols,
+            np.full(len(linearCandidateIdxs), edgeTypeIdx),
+        ], axis=1)
+
+        sampledFeedDict = dict(self.feedDict)
+        sampledFeedDict[self.placeholdersDict['sampled_pairs']] = sampledPairs
+
+        return self.session.run(
+            self.sampledPredictionsTensor,
+            feed_dict=sampledFeedDict
+        )
 
     def _noRelsExist(self):
         return all((
@@ -83,21 +247,9 @@ class GreedyActiveLearner(RandomMaskingActiveLearner, functionalityType=None):
             for mtx in self.decagonDataSet.adjacencyMatrixDict[(1, 1)]
         ))
 
-    def _getRankedPossibilities(self, predictions):
-        linearPossibilityIdxs = self._linearizeIndices(
-            self.possibilities,
-            predictions.shape[COL_SHAPE_IDX]
-        )
-
-        possibilityPredictions = np.take(predictions, linearPossibilityIdxs)
-        return np.argsort(possibilityPredictions)[::-1]
-
-    def _linearizeIndices(self, indexMtx, numCols):
-        return (indexMtx[:, 1] * numCols) + indexMtx[:, 2]
-
     def _updateFeedDict(self) -> Dict:
         self.feedDict[self.placeholdersDict['dropout']] = 0
-        self.feedDict[self.placeholdersDict['batch_edge_type_idx']] = self.edgeTypeToIdx[(1,1,0)]
+        self.feedDict[self.placeholdersDict['batch_edge_type_idx']] = self.edgeTypeToIdx[RANKING_EDGE_TYPE]
         self.feedDict[self.placeholdersDict['batch_row_edge_type']] = 1
         self.feedDict[self.placeholdersDict['batch_col_edge_type']] = 1
 
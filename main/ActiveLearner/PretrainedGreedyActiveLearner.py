@@ -13,9 +13,11 @@ class PretrainedGreedyActiveLearner(GreedyActiveLearner, functionalityType=None)
         self.predictionsTensor = self._getPredictionsTensor(
             config.getSetting('PretrainedModelSavePath')
         )
+        self.sampledPredictionsTensor = self.trainable.optimizer.sampled_predictions
 
         self.placeholdersDict = self.trainable.model.placeholders
         self.feedDict = self._getBaseFeedDict()
+        self.embeddingCache = self._buildEmbeddingCache(self.trainable.model)
 
     def _getTrainable(self, initDataSet, config) -> Type[Trainable]:
         trainableBuilder = ObjectFactory.build(
@@ -42,6 +44,8 @@ class PretrainedGreedyActiveLearner(GreedyActiveLearner, functionalityType=None)
     def _getBaseFeedDict(self) -> Dict[str, object]:
         result = {}
 
+        self.trainable.dataSetIterator.load_graph_tensors(self.session)
+
         self.trainable.dataSetIterator.update_feed_dict(
             result,
             dropout=0,
@@ -59,5 +63,6 @@ class PretrainedGreedyActiveLearner(GreedyActiveLearner, functionalityType=None)
             session=None,
             dataSet=dataSet,
             iterResults=iterResults,
+            sampledPredsTensor=None,
         )
 
@@ -3,9 +3,12 @@ from ..Dtos.AdjacencyMatrices import AdjacencyMatrices
 from ..Dtos.DataSet import DataSet
 from ..Dtos.Enums.ActiveLearnerType import ActiveLearnerType
 from ..Dtos.TestEdgesContainer import TestEdgesContainer
+from ..Utils.Bitset import Bitset
+from ..Utils.CandidatePool import CandidatePool
 from ..Utils.Config import Config
+from ..Utils import Sparse
 from ..Utils.Sparse import RelationCsrMatrix
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from operator import itemgetter
 import numpy as np
 import scipy.sparse as sp
@@ -20,16 +23,19 @@ class RandomMaskingActiveLearner(
         self.initTrainSetProportion = float(config.getSetting('InitTrainSetProportion'))
         self.initDataSet = initDataSet
 
+        drugDrugRelationMtxs = initDataSet.adjacencyMatrices.drugDrugRelationMtxs
+        self.adjMtxShapes = {rel: mtx.shape for rel, mtx in drugDrugRelationMtxs.items()}
+
+        # Each relation's unmasked pairs, as linear indices row * numCols + col
         self.adjMtxMasks = {
-            rel: np.zeros(mtx.shape)
-            for rel, mtx in initDataSet.adjacencyMatrices.drugDrugRelationMtxs.items()
+            rel: Bitset(mtx.shape[0] * mtx.shape[1])
+            for rel, mtx in drugDrugRelationMtxs.items()
         }
 
-        self.possibilities, self.testEdges = self._getPossibilitiesAndTestEdges(
-            self.adjMtxMasks
-        )
+        self.candidatePool, self.testEdges = self._getCandidatePoolAndTestEdges()
+        self._reduceCandidatePoolForInit()
 
-        self.dataSetSize = len(self.possibilities)
+        self.dataSetSize = len(self.candidatePool)
 
     @property
     def _attrNameToIdx(self):
@@ -43,107 +49,84 @@ class RandomMaskingActiveLearner(
     def _idxToAttrName(self):
         return {v: k for k, v in self._attrNameToIdx.items()}
 
-    def _getPossibilitiesAndTestEdges(self, adjMtxMasks):
-        prePossbilitiesResult = []
-        testEdgeResult = {}
-        for rel, mtx in self.adjMtxMasks.items():
-            if not self._isRelationValid(rel):
-                continue
+    def _getCandidatePoolAndTestEdges(self) -> Tuple[CandidatePool, Dict]:
+        '''
+        Returns the pool of pairs that may be unmasked, i.e., every pair of
+        the valid relations except their test edges, and those test edges
+        '''
+        # Relations in the order of their candidate pool indices
+        self.poolRelations: List[int] = [
+            rel for rel in self.adjMtxShapes if self._isRelationValid(rel)
+        ]
+
+        candidatePool = CandidatePool(
+            self.adjMtxShapes[rel][0] * self.adjMtxShapes[rel][1]
+            for rel in self.poolRelations
+        )
 
-            grid = self._getShapePossibleIdxs(mtx.shape)
+        testEdgeResult = {}
+        for relationIdx, rel in enumerate(self.poolRelations):
+            mtx = self.initDataSet.adjacencyMatrices.drugDrugRelationMtxs[rel]
 
-            posTestEdgeIdxs, negTestEdgeIdxs = self._getTestEdgeLinearIdxs(
-                self.initDataSet.adjacencyMatrices.drugDrugRelationMtxs[rel],
-                grid
-            )
+            posTestEdgeIdxs, negTestEdgeIdxs = self._getTestEdgeLinearIdxs(mtx)
 
             testEdgeResult[rel] = {
-                'positive': grid[posTestEdgeIdxs],
-                'negative': grid[negTestEdgeIdxs],
+                'positive': self._toCoordinates(posTestEdgeIdxs, mtx.shape),
+                'negative': self._toCoordinates(negTestEdgeIdxs, mtx.shape),
             }
 
-            grid = np.delete(grid, np.hstack([posTestEdgeIdxs, negTestEdgeIdxs]), axis=0)
-
-            graphTypeArr = np.full((grid.shape[0], 1), int(rel))
-            prePossbilitiesResult.append(np.hstack((graphTypeArr, grid)))
-
-        possibilities = np.vstack(prePossbilitiesResult) \
-                        if len(prePossbilitiesResult) > 0 else np.empty((0, 0, 0))
+            candidatePool.removeFromRelation(
+                relationIdx,
+                np.hstack([posTestEdgeIdxs, negTestEdgeIdxs])
+            )
 
-        possibilities = self._reducePossibilitiesForInit(possibilities)
-        return possibilities, testEdgeResult
+        return candidatePool, testEdgeResult
 
     def _isRelationValid(self, relation: str) -> bool:
         return True
 
-    def _reducePossibilitiesForInit(self, possibilities) -> np.array:
+    def _reduceCandidatePoolForInit(self) -> None:
         numToUnmask = int(
-            np.floor(len(possibilities) * self.initTrainSetProportion)
+            np.floor(len(self.candidatePool) * self.initTrainSetProportion)
         )
 
-        idxsToUnmask = \
-            np.random.choice(len(possibilities), size=numToUnmask, replace=False)
+        # Unmasked a relation at a time, as this may be most of the pool
+        for relationIdx, linearIdxs in self.candidatePool.sampleByRelation(numToUnmask):
+            self._unmaskInRelation(relationIdx, linearIdxs)
 
-        for idx in possibilities[idxsToUnmask]:
-            self.adjMtxMasks[idx[0]][idx[1], idx[2]] = 1
+    def _unmask(self, poolIdxs: np.ndarray) -> None:
+        '''
+        Unmasks the candidates of poolIdxs, with one scatter into each
+        relation's mask, and removes them from the candidate pool
+        '''
+        relationLinearIdxs = self.candidatePool.splitByRelation(poolIdxs)
+        for relationIdx, linearIdxs in enumerate(relationLinearIdxs):
+            self._unmaskInRelation(relationIdx, linearIdxs)
 
-        return np.delete(possibilities, idxsToUnmask, axis=0)
+    def _unmaskInRelation(self, relationIdx: int, linearIdxs: np.ndarray) -> None:
+        self.adjMtxMasks[self.poolRelations[relationIdx]].add(linearIdxs)
+        self.candidatePool.removeFromRelation(relationIdx, linearIdxs)
 
-    def _getTestEdgeLinearIdxs(self, mtx, possibilities):
-        allPosEdges = self._getPossiblePositiveEdgeIdxs(mtx)
-        allNegEdges = self._getPossibleNegativeEdgeIdxs(
-            possibilities,
-            allPosEdges,
-            mtx.shape
-        )
+    def _getTestEdgeLinearIdxs(self, mtx: sp.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+        numPairs = mtx.shape[0] * mtx.shape[1]
+        allPosEdges = np.ravel_multi_index(mtx.nonzero(), mtx.shape).astype(np.int64)
 
         numEdges = max(1, int(allPosEdges.shape[0] * self.testSetProportion)) \
                    if allPosEdges.shape[0] > 0 else 0
-        linearizedPosTestEdgeIdxs = self._sampleIndicesLinear(
-            allPosEdges,
-            numEdges,
-            mtx.shape[1]
-        )
 
-        linearizedNegTestEdgeIdxs = self._sampleIndicesLinear(
-            allNegEdges,
-            numEdges,
-            mtx.shape[1]
-        )
-
-        return linearizedPosTestEdgeIdxs, linearizedNegTestEdgeIdxs
-
-    def _sampleIndicesLinear(self, possibleEdges, numToSample, fullSetColDim):
-        edgeSetIdxs = np.random.choice(
-            possibleEdges.shape[0],
-            size=numToSample,
-            replace=False
-        )
-
-        edges = possibleEdges[edgeSetIdxs]
-
-        return (edges[:, 0] * fullSetColDim) + edges[:, 1]
+        posTestEdgeIdxs = allPosEdges[
+            np.random.choice(allPosEdges.shape[0], size=numEdges, replace=False)
+        ]
 
-    def _getPossiblePositiveEdgeIdxs(self, mtx: sp.csr_matrix) -> np.array:
-        nonzeroTpl = mtx.nonzero()
-        return np.dstack([nonzeroTpl[0], nonzeroTpl[1]]).reshape(-1, 2)
+        # Negatives are sampled from every pair that is not a positive
+        allNegEdges = CandidatePool([numPairs])
+        allNegEdges.removeFromRelation(0, allPosEdges)
+        negTestEdgeIdxs = allNegEdges.sample(numEdges)
 
-    def _getPossibleNegativeEdgeIdxs(
-        self,
-        possibilities: np.array,
-        positiveEdges: np.array,
-        mtxShape: Tuple[int, int]
-    ) -> np.array:
-        possibilitiesLinear = (possibilities[:, 0] * mtxShape[1]) + possibilities[:, 1]
-        positivesLinear = (positiveEdges[:, 0] * mtxShape[1]) + positiveEdges[:, 1]
+        return posTestEdgeIdxs, negTestEdgeIdxs
 
-        negativesLinear = np.setdiff1d(possibilitiesLinear, positivesLinear)
-
-        return np.dstack(np.unravel_index(negativesLinear, mtxShape)).reshape(-1, 2)
-
-    def _getShapePossibleIdxs(self, shape: Tuple[int, int]) -> np.array:
-        xx, yy = np.indices(shape)
-        return np.dstack([xx, yy]).reshape(-1, 2)
+    def _toCoordinates(self, linearIdxs: np.ndarray, mtxShape: Tuple[int, int]) -> np.ndarray:
+        return np.dstack(np.unravel_index(linearIdxs, mtxShape)).reshape(-1, 2)
 
     def hasUpdate(self, dataset, iterResults) -> bool:
         return 2 ** self.numIters < 100
@@ -170,28 +153,23 @@ class RandomMaskingActiveLearner(
         multiplier = (thisNumerator - lastNumerator) / 100
         numToUnmask = int(np.floor(self.dataSetSize * multiplier))
 
-        idxsToUnmask = self._getNewSampleIdxs(numToUnmask)
-        for idx in self.possibilities[idxsToUnmask]:
-            self.adjMtxMasks[idx[0]][idx[1], idx[2]] = 1
-
-        self.possibilities = np.delete(self.possibilities, idxsToUnmask, axis=0)
+        self._unmask(self._getNewSampleIdxs(numToUnmask))
 
         return
 
-    def _getNewSampleIdxs(self, numToUnmask: int):
-        return np.random.choice(
-            len(self.possibilities),
-            size=numToUnmask,
-            replace=False
-        )
+    def _getNewSampleIdxs(self, numToUnmask: int) -> np.ndarray:
+        '''
+        Returns the pool indices of the candidates to unmask next
+        '''
+        return self.candidatePool.sample(numToUnmask)
 
     def _applyMask(self):
         drugDrugRelationMtxs = {}
-        for relId, maskMtx in self.adjMtxMasks.items():
-            drugDrugRelationMtxs[relId] = RelationCsrMatrix(np.multiply(
-                maskMtx,
-                self.initDataSet.adjacencyMatrices.drugDrugRelationMtxs[relId].toarray()
-            ))
+        for relId, mask in self.adjMtxMasks.items():
+            drugDrugRelationMtxs[relId] = self._applyRelationMask(
+                mask,
+                self.initDataSet.adjacencyMatrices.drugDrugRelationMtxs[relId]
+            )
 
         return AdjacencyMatrices(
             drugDrugRelationMtxs,
@@ -199,3 +177,5 @@ class RandomMaskingActiveLearner(
             self.initDataSet.adjacencyMatrices.proteinProteinRelationMtx
         )
 
+    def _applyRelationMask(self, mask: Bitset, mtx: sp.csr_matrix) -> RelationCsrMatrix:
+        return Sparse.maskMatrix(mask, mtx)
@@ -1,27 +1,72 @@
 from .BaseCheckpointer import BaseCheckpointer
 from ..Dtos.TensorflowTrainable import TensorflowTrainable
+from ..Utils import FileUtils
 from ..Utils import StrUtils
+from ..Utils.AsyncWorker import AsyncWorker
 from ..Utils.Config import Config
 from pathlib import Path
+from typing import Dict, List
 import string
 import tensorflow as tf
 import tensorflow.contrib.eager as tfe
+import numpy as np
+import atexit
+import glob
 import os
 
 NON_DIGIT_CHARS = set(string.printable).difference(set(string.digits))
 
+# Saves waiting behind the one being written.  A newer save replaces a
+# waiting one, so at most one is ever written behind the current one.
+MAX_PENDING_SAVES = 1
+
+# File path to the tensor, or list of tensors, whose value is saved there.
+# Paths ending in .npz are written with np.savez, all others with np.save.
+NdarrayFetches = Dict[str, object]
+
+class _SaveRequest:
+    def __init__(
+        self,
+        variableValues: Dict[str, np.ndarray],
+        ndarrays: Dict[str, object]
+    ) -> None:
+        self.variableValues: Dict[str, np.ndarray] = variableValues
+        self.ndarrays: Dict[str, object] = ndarrays
+
 class TensorflowCheckpointer(BaseCheckpointer):
+    '''
+    save fetches the values of all variables in one session run, then writes
+    them on a background thread, so training continues while a checkpoint
+    is serialized and fsynced.  Checkpoints are written by a saver over a
+    copy of the variables in a separate graph and session, so the
+    checkpoint is of the values at the time of save and variable names
+    match those of the training graph.  Checkpoints are written without a
+    meta graph.
+    '''
     def __init__(self, session: tf.Session, config: Config) -> None:
         super().__init__(config)
 
         self.session: tf.Session = session
         self.shouldEverCheckpoint = bool(config.getSetting('ShouldCheckpoint'))
 
-        maxToKeep: int = int(config.getSetting('MaxCheckpointsToKeep'))
-        self.saver = tf.train.Saver = tf.train.Saver(max_to_keep=maxToKeep)
+        self.maxToKeep: int = int(config.getSetting('MaxCheckpointsToKeep'))
+        self.saver = tf.train.Saver = tf.train.Saver(max_to_keep=self.maxToKeep)
 
         self.saverBaseName = self._getModelSaverBaseName(config)
 
+        self.variables: Dict[str, tf.Variable] = {
+            var.op.name: var for var in tf.global_variables()
+        }
+
+        # Built on the writer's thread by the first checkpoint write
+        self.shadowSession: tf.Session = None
+        self.shadowSaver: tf.train.Saver = None
+        self.shadowInputs: Dict[str, tf.Tensor] = None
+        self.shadowInitializers: List[tf.Operation] = None
+
+        self.writer: AsyncWorker = AsyncWorker(self._write, MAX_PENDING_SAVES)
+        atexit.register(self.writer.close)
+
     def _getModelSaverBaseName(self, config: Config):
         ckptDir: str = config.getSetting('CheckpointDirectory')
         Path(ckptDir).mkdir(parents=True, exist_ok=True)
@@ -78,11 +123,101 @@ class TensorflowCheckpointer(BaseCheckpointer):
 
         return isFile and isGoodPrefix
 
-    def save(self):
-        if not self.shouldEverCheckpoint:
+    def save(self, feedDict: Dict = None, ndarrayFetches: NdarrayFetches = None):
+        '''
+        Checkpoints the variables if checkpointing is enabled and, either way,
+        writes the values of ndarrayFetches to their paths.  Files are
+        replaced atomically, so readers never see partial writes.
+        '''
+        fetches = {}
+        if self.shouldEverCheckpoint:
+            fetches['variables'] = self.variables
+
+        if ndarrayFetches:
+            fetches['ndarrays'] = ndarrayFetches
+
+        if not fetches:
             return
 
-        self.saver.save(self.session, self.saverBaseName)
+        values = self.session.run(fetches, feed_dict=feedDict)
+
+        self.writer.submit(
+            _SaveRequest(values.get('variables'), values.get('ndarrays', {})),
+            canDrop=True
+        )
+
+    def flush(self) -> None:
+        '''
+        Waits until every save has been written
+        '''
+        self.writer.flush()
+
+    def _write(self, request: _SaveRequest) -> None:
+        if request.variableValues is not None:
+            self._writeCheckpoint(request.variableValues)
+
+        for path, value in request.ndarrays.items():
+            FileUtils.atomicWrite(
+                path,
+                lambda f: self._writeNdarray(f, path, value)
+            )
+
+    def _writeNdarray(self, f, path: str, value) -> None:
+        if path.endswith('.npz'):
+            np.savez(f, value)
+        else:
+            np.save(f, value, allow_pickle=False)
+
+    def _writeCheckpoint(self, variableValues: Dict[str, np.ndarray]) -> None:
+        if self.shadowSaver is None:
+            self._buildShadowGraph(variableValues)
+
+        self.shadowSession.run(
+            self.shadowInitializers,
+            feed_dict={
+                self.shadowInputs[name]: value
+                for name, value in variableValues.items()
+            }
+        )
+
+        ckptPrefix = self.shadowSaver.save(
+            self.shadowSession,
+            self.saverBaseName,
+            write_meta_graph=False
+        )
+
+        ckptDir = os.path.dirname(ckptPrefix)
+        FileUtils.fsyncPaths(
+            glob.glob(ckptPrefix + '.*') + [os.path.join(ckptDir, 'checkpoint')]
+        )
+        FileUtils.fsyncDir(ckptDir)
+
+    def _buildShadowGraph(self, variableValues: Dict[str, np.ndarray]) -> None:
+        self.shadowInputs = {}
+        shadowVariables = {}
+
+        graph = tf.Graph()
+        with graph.as_default():
+            for name, value in variableValues.items():
+                self.shadowInputs[name] = tf.placeholder(
+                    tf.as_dtype(value.dtype),
+                    shape=np.shape(value)
+                )
+
+                shadowVariables[name] = tf.Variable(
+                    self.shadowInputs[name],
+                    trainable=False
+                )
+
+            # Keyed by the training graph's names, which are saved in the
+            # checkpoint
+            self.shadowSaver = tf.train.Saver(
+                var_list=shadowVariables,
+                max_to_keep=self.maxToKeep
+            )
+
+        self.shadowInitializers = [var.initializer for var in shadowVariables.values()]
+        self.shadowSession = tf.Session(graph=graph)
 
     def restore(self):
         if not self.shouldEverCheckpoint:
@@ -22,6 +22,10 @@ class DecagonDummyDataAdjacencyMatricesBuilder(
         self.numProteins: int              = len(nodeLists.proteinNodeList)
         self.numDrugs: int                 = len(nodeLists.drugNodeList)
 
+        # Seeded so a data set is determined by the settings it is cached by
+        self.randomState: np.random.RandomState = \
+            np.random.RandomState(int(config.getSetting('DummyDataSeed')))
+
     def build(self) -> AdjacencyMatrices:
         drugProteinRelationMtx: Type[sp.csr_matrix] = self._buildDrugProteinRelationMtx()
         drugDrugRelationMtxs: RelationIDToSparseMtx = \
@@ -34,7 +38,7 @@ class DecagonDummyDataAdjacencyMatricesBuilder(
         )
 
     def _buildDrugProteinRelationMtx(self) -> Type[sp.csr_matrix]:
-        preMtx = 10 * np.random.randn(self.numProteins, self.numDrugs)
+        preMtx = 10 * self.randomState.randn(self.numProteins, self.numDrugs)
         binaryMtx = (preMtx > 15).astype(int)
 
         return RelationCsrMatrix(binaryMtx)
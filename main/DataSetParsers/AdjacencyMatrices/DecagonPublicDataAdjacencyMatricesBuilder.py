@@ -1,49 +1,30 @@
 from .BaseAdjacencyMatricesBuilder import BaseAdjacencyMatricesBuilder
+from ..DecagonPublicDataLoader import DecagonPublicDataLoader
 from ...Dtos.AdjacencyMatrices import AdjacencyMatrices
 from ...Dtos.Enums.DataSetType import DataSetType
-from ...Dtos.NodeIds import DrugId, ProteinId, BaseNodeId
 from ...Dtos.NodeLists import NodeLists
-from ...Dtos.TypeShortcuts import EdgeList, RelationIDToEdgeList, RelationIDToGraph, RelationIDToSparseMtx
+from ...Dtos.TypeShortcuts import EdgeList, RelationIDToEdgeList, RelationIDToSparseMtx
 from ...Utils import Config
 from ...Utils.Sparse import RelationCsrMatrix
-from typing import Type, Tuple
-from collections import defaultdict
-import networkx as nx
+from typing import List, Type
 import numpy as np
 import scipy.sparse as sp
 
-Edge = Tuple[str, str, int]
-
 class DecagonPublicDataAdjacencyMatricesBuilder(
     BaseAdjacencyMatricesBuilder,
     functionalityType = DataSetType.DecagonPublicData
 ):
     def __init__(self, nodeLists: NodeLists, config: Config) -> None:
-        self.drugDrugRelationGraph: nx.MultiGraph = nx.read_edgelist(
-            config.getSetting('DecagonDrugDrugRelationsFilename'),
-            delimiter=',',
-            create_using=nx.MultiGraph(),
-            nodetype=DrugId,
-            data=(('relationType', str),)
-        )
+        self.loader: DecagonPublicDataLoader = DecagonPublicDataLoader.fromConfig(config)
 
-        self.drugProteinRelationGraph: nx.Graph = nx.read_edgelist(
-            config.getSetting('DecagonDrugProteinRelationsFilename'),
-            delimiter=','
-        )
-
-        self.ppiGraph: nx.Graph = nx.read_edgelist(
-            config.getSetting('DecagonProteinProteinRelationsFilename'),
-            nodetype=ProteinId,
-            delimiter=','
-        )
-
-        # When building adjacency matrices with networkx, we can
-        # guarantee ordering of the built matrices.  Thus, we precompute
-        # them here so they can be used later in the building of the matrices.
+        # Matrix rows and columns are ordered as in the node lists, so node ids
+        # are mapped to their index in these sorted arrays.
         self.drugNodeList: EdgeList = nodeLists.drugNodeList
         self.proteinNodeList: EdgeList = nodeLists.proteinNodeList
 
+        self.drugIds: np.ndarray = np.array(self.drugNodeList, dtype=np.int64)
+        self.proteinIds: np.ndarray = np.array(self.proteinNodeList, dtype=np.int64)
+
     def build(self) -> AdjacencyMatrices:
         return AdjacencyMatrices(
             drugDrugRelationMtxs=self._buildDrugDrugRelationMtxs(),
@@ -53,61 +34,54 @@ class DecagonPublicDataAdjacencyMatricesBuilder(
 
     def _buildDrugDrugRelationMtxs(self) -> RelationIDToSparseMtx:
         validEdgeSets = self._getValidEdgeSets()
-        graphs = self._getDrugDrugRelationGraphs(validEdgeSets)
-
-        adjMtxs = {
-            relID: RelationCsrMatrix(
-                nx.adjacency_matrix(graph, nodelist=self.drugNodeList)
-            ) for relID, graph in graphs.items()
-        }
-
-        return adjMtxs
-
-    def _getDrugDrugRelationGraphs(
-        self,
-        validEdgeSets: RelationIDToEdgeList
-    ) -> RelationIDToGraph:
-        graphs = {}
-        for relID, validEdgeSet in validEdgeSets.items():
-            graph = nx.Graph()
-
-            graph.add_nodes_from(self.drugNodeList)
-            graph.add_edges_from(validEdgeSet)
+        if len(validEdgeSets) == 0:
+            return {}
+
+        edgeSets = list(validEdgeSets.values())
+        edges = np.concatenate(edgeSets)
+        relationIdxs = np.repeat(
+            np.arange(len(edgeSets)),
+            [len(edgeSet) for edgeSet in edgeSets]
+        )
 
-            graphs[relID] = graph
+        mtxs = self._buildSymmetricMtxs(
+            edges,
+            relationIdxs,
+            len(edgeSets),
+            len(self.drugNodeList)
+        )
 
-        return graphs
+        return {
+            relID: RelationCsrMatrix(mtx)
+            for relID, mtx in zip(validEdgeSets.keys(), mtxs)
+        }
 
     def _getValidEdgeSets(self) -> RelationIDToEdgeList:
         allEdgeSets = self._buildAllEdgeSets()
         return self._filterEdgeSets(allEdgeSets)
 
     def _buildAllEdgeSets(self) -> RelationIDToEdgeList:
-        result = defaultdict(list)
-        for edge in self.drugDrugRelationGraph.edges:
-            relationId = self._extractRelationId(edge)
-
-            # Remove edge type from edge
-            truncatedEdge = edge[:2]
-            result[relationId].append(truncatedEdge)
-
-        return result
-
-    def _extractRelationId(self, edge: Edge) -> str:
-        FIRST_EDGE_NODE_IDX = 0
-        SCND_EDGE_NODE_IDX  = 1
-        RELATION_TYPE_IDX   = 2
-
-        thisEdgeDict = self.drugDrugRelationGraph.get_edge_data(
-            edge[FIRST_EDGE_NODE_IDX],
-            edge[SCND_EDGE_NODE_IDX]
-        )
-
-        rawRelationId = thisEdgeDict[edge[RELATION_TYPE_IDX]]['relationType']
-
-        # First element of the relation ID str is a 'C'.  Return an int which
-        # excludes this 'C'.
-        return int(rawRelationId[1:])
+        '''
+        Returns a dict mapping each relation ID to an (n, 2) array of the drug
+        indices of its edges.  Relation IDs are in ascending order.
+        '''
+        edges = np.stack([
+            self._getDrugIdxs(self.loader.drugDrugFromIds),
+            self._getDrugIdxs(self.loader.drugDrugToIds),
+        ], axis=1)
+
+        relationIds = self.loader.drugDrugRelationIds
+        order = np.argsort(relationIds, kind='stable')
+
+        sortedRelationIds = relationIds[order]
+        uniqueRelationIds, startIdxs = np.unique(sortedRelationIds, return_index=True)
+
+        edgeSets = np.split(edges[order], startIdxs[1:])
+
+        return {
+            int(relationId): edgeSet
+            for relationId, edgeSet in zip(uniqueRelationIds, edgeSets)
+        }
 
     def _filterEdgeSets(
         self,
@@ -125,29 +99,84 @@ class DecagonPublicDataAdjacencyMatricesBuilder(
         return len(edgeList) >= 500
 
     def _buildDrugProteinRelationMtx(self) -> Type[sp.csr_matrix]:
-        drugToIdx = {drug: idx for idx, drug in enumerate(self.drugNodeList)}
-        proteinToIdx = {protein: idx for idx, protein in enumerate(self.proteinNodeList)}
+        drugIdxs = self._getDrugIdxs(self.loader.drugProteinDrugIds)
+        proteinIdxs = self._getProteinIdxs(self.loader.drugProteinProteinIds)
 
-        drugProteinMtx = np.zeros((len(proteinToIdx), len(drugToIdx)))
-        for edge in self.drugProteinRelationGraph.edges:
-            drug, protein = self._extractDrugProtein(edge)
-            drugProteinMtx[proteinToIdx[protein], drugToIdx[drug]] = 1
+        drugProteinMtx = sp.csr_matrix(
+            (np.ones(len(drugIdxs)), (proteinIdxs, drugIdxs)),
+            shape=(len(self.proteinNodeList), len(self.drugNodeList))
+        )
 
-        return RelationCsrMatrix(drugProteinMtx)
+        # Duplicate edges are summed when building the matrix, but the
+        # matrix is binary
+        drugProteinMtx.data[:] = 1
 
-    def _extractDrugProtein(self, edge: tuple) -> tuple:
-        drugIdx = 0 if edge[0][:3] == 'CID' else 1
-        proteinIdx = 1 - drugIdx
+        return RelationCsrMatrix(drugProteinMtx)
 
-        return (
-            DrugId.fromDecagonFormat(edge[drugIdx]),
-            ProteinId.fromDecagonFormat(edge[proteinIdx])
+    def _buildPpiMtx(self) -> Type[sp.spmatrix]:
+        edges = np.stack([
+            self._getProteinIdxs(self.loader.ppiFromIds),
+            self._getProteinIdxs(self.loader.ppiToIds),
+        ], axis=1)
+
+        ppiMtx, = self._buildSymmetricMtxs(
+            edges,
+            np.zeros(len(edges), dtype=np.int64),
+            numRelations=1,
+            numNodes=len(self.proteinNodeList)
         )
 
-    def _buildPpiMtx(self) -> Type[sp.spmatrix]:
-        self.ppiGraph.add_nodes_from(self.proteinNodeList)
+        return RelationCsrMatrix(ppiMtx)
 
-        return RelationCsrMatrix(
-            nx.adjacency_matrix(self.ppiGraph, nodelist=self.proteinNodeList)
-        )
+    def _buildSymmetricMtxs(
+        self,
+        edges: np.ndarray,
+        relationIdxs: np.ndarray,
+        numRelations: int,
+        numNodes: int
+    ) -> List[sp.csr_matrix]:
+        '''
+        Builds the binary adjacency matrices of numRelations undirected graphs
+        in one pass.  edges is an (n, 2) array of node indices and
+        relationIdxs gives the graph each edge belongs to.  Duplicate edges
+        are only counted once.
+
+        The matrices are built as a single (numRelations * numNodes, numNodes)
+        CSR matrix with relations stacked vertically, whose row blocks are
+        then sliced out as the per-relation matrices.
+        '''
+        rowOffsets = relationIdxs.astype(np.int64) * numNodes
+
+        rows = np.concatenate([edges[:, 0] + rowOffsets, edges[:, 1] + rowOffsets])
+        cols = np.concatenate([edges[:, 1], edges[:, 0]])
+
+        # np.unique sorts linear indices, so the result is in row-major order
+        linearIdxs = np.unique((rows * numNodes) + cols)
+        stackedRows = linearIdxs // numNodes
+        stackedCols = (linearIdxs % numNodes).astype(np.int32)
+
+        rowCounts = np.bincount(stackedRows, minlength=numRelations * numNodes)
+        stackedIndptr = np.concatenate([[0], np.cumsum(rowCounts)])
+        stackedData = np.ones(len(linearIdxs), dtype=np.int64)
+
+        result = []
+        for relationIdx in range(numRelations):
+            indptr = stackedIndptr[relationIdx * numNodes:(relationIdx + 1) * numNodes + 1]
+            start, end = indptr[0], indptr[-1]
+
+            result.append(sp.csr_matrix(
+                (
+                    stackedData[start:end],
+                    stackedCols[start:end],
+                    (indptr - start).astype(np.int32),
+                ),
+                shape=(numNodes, numNodes)
+            ))
+
+        return result
+
+    def _getDrugIdxs(self, drugIds: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self.drugIds, drugIds)
 
+    def _getProteinIdxs(self, proteinIds: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self.proteinIds, proteinIds)
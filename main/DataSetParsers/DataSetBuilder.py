@@ -3,6 +3,7 @@ from ..Dtos.DataSet import DataSet
 from ..Dtos.NodeFeatures import NodeFeatures
 from ..Dtos.NodeLists import NodeLists
 from ..Dtos.Enums.DataSetType import DataSetType
+from .DataSetCache import DataSetCache
 from .AdjacencyMatrices.BaseAdjacencyMatricesBuilder import BaseAdjacencyMatricesBuilder
 from .NodeFeatures.BaseNodeFeaturesBuilder import BaseNodeFeaturesBuilder
 from .NodeLists.BaseNodeListsBuilder import BaseNodeListsBuilder
@@ -12,6 +13,17 @@ from ..Utils.ObjectFactory import ObjectFactory
 class DataSetBuilder:
     @staticmethod
     def build(config: Config) -> DataSet:
+        dataSetCache = DataSetCache(config)
+
+        dataSet = dataSetCache.load()
+        if dataSet is None:
+            dataSet = DataSetBuilder._buildFromSource(config)
+            dataSetCache.save(dataSet)
+
+        return dataSet
+
+    @staticmethod
+    def _buildFromSource(config: Config) -> DataSet:
         dataSetType = DataSetType[config.getSetting('DataSetType')]
 
         idStr = "Base%sDataSet" % dataSetType.name
@@ -0,0 +1,260 @@
+from ..Dtos.AdjacencyMatrices import AdjacencyMatrices
+from ..Dtos.DataSet import DataSet
+from ..Dtos.Enums.DataSetType import DataSetType
+from ..Dtos.NodeFeatures import NodeFeatures
+from ..Dtos.NodeIds import DrugId, ProteinId
+from ..Dtos.NodeLists import NodeLists
+from ..Utils.Config import Config
+from ..Utils.Sparse import RelationCsrMatrix
+from pathlib import Path
+from typing import ClassVar, Dict, List, Tuple
+import scipy.sparse as sp
+import numpy as np
+import hashlib
+import shutil
+import json
+import os
+
+# Bump when the layout of cached bundles (or what is built into them) changes
+CACHE_FORMAT_VERSION = 2
+
+META_FNAME = 'meta.json'
+
+# Settings whose files' contents determine a data set
+FILENAME_SETTINGS: Dict[DataSetType, List[str]] = {
+    DataSetType.DecagonPublicData: [
+        'DecagonDrugDrugRelationsFilename',
+        'DecagonDrugProteinRelationsFilename',
+        'DecagonProteinProteinRelationsFilename',
+        'DecagonNodeFeaturesFilename',
+    ],
+    DataSetType.DecagonDummyData: [],
+}
+
+# Settings whose values determine a data set
+VALUE_SETTINGS: Dict[DataSetType, List[str]] = {
+    DataSetType.DecagonPublicData: [],
+    DataSetType.DecagonDummyData: [
+        'NumProteins',
+        'NumDrugs',
+        'NumDrugDrugRelationTypes',
+        'DummyDataSeed',
+    ],
+}
+
+class DataSetCache:
+    '''
+    On-disk cache of built DataSets, keyed by a hash of the data set's input
+    files and relevant settings.  Each entry is a directory of .npy files
+    holding the CSR index/indptr/data arrays of every matrix and the node id
+    arrays, which are memory-mapped (copy-on-write) when loaded.
+    '''
+
+    numHits: ClassVar[int] = 0
+    numMisses: ClassVar[int] = 0
+
+    def __init__(self, config: Config) -> None:
+        self.shouldCache: bool = bool(config.getSetting('ShouldCacheDataSet'))
+        self.cacheDir: str = config.getSetting('DataSetCacheDirectory')
+        self.dataSetType: DataSetType = DataSetType[config.getSetting('DataSetType')]
+
+        self._config: Config = config
+        self._key: str = None
+
+    @property
+    def key(self) -> str:
+        if self._key is None:
+            self._key = self._computeKey()
+
+        return self._key
+
+    @property
+    def entryDir(self) -> str:
+        return os.path.join(self.cacheDir, self.key)
+
+    def _computeKey(self) -> str:
+        hasher = hashlib.sha256()
+        hasher.update(b'version:%d;' % CACHE_FORMAT_VERSION)
+        hasher.update(b'type:%s;' % self.dataSetType.name.encode())
+
+        for setting in VALUE_SETTINGS[self.dataSetType]:
+            value = self._config.getSetting(setting)
+            hasher.update(('%s:%r;' % (setting, value)).encode())
+
+        for setting in FILENAME_SETTINGS[self.dataSetType]:
+            hasher.update(('%s;' % setting).encode())
+            self._updateWithFile(hasher, self._config.getSetting(setting))
+
+        return hasher.hexdigest()
+
+    def _updateWithFile(self, hasher, fname: str) -> None:
+        CHUNK_SIZE = 1 << 20
+
+        with open(fname, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                hasher.update(chunk)
+
+    def load(self) -> DataSet:
+        '''
+        Returns the cached DataSet, or None if caching is disabled or there
+        is no entry for this configuration.
+        '''
+        if not self.shouldCache:
+            return None
+
+        if not os.path.isfile(os.path.join(self.entryDir, META_FNAME)):
+            DataSetCache.numMisses += 1
+            print('DataSetCache miss for key %s (hits: %d, misses: %d)' % (
+                self.key, DataSetCache.numHits, DataSetCache.numMisses
+            ))
+
+            return None
+
+        DataSetCache.numHits += 1
+        print('DataSetCache hit for key %s (hits: %d, misses: %d)' % (
+            self.key, DataSetCache.numHits, DataSetCache.numMisses
+        ))
+
+        return self._readEntry(self.entryDir)
+
+    def save(self, dataSet: DataSet) -> None:
+        if not self.shouldCache:
+            return
+
+        Path(self.cacheDir).mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary dir first so a partially written entry is
+        # never seen by a concurrent run
+        tmpDir = '%s.tmp-%d' % (self.entryDir, os.getpid())
+        shutil.rmtree(tmpDir, ignore_errors=True)
+        Path(tmpDir).mkdir()
+
+        self._writeEntry(tmpDir, dataSet)
+
+        try:
+            os.rename(tmpDir, self.entryDir)
+        except OSError:
+            # Another process wrote the same entry first
+            shutil.rmtree(tmpDir, ignore_errors=True)
+
+    def invalidate(self) -> None:
+        '''
+        Removes the entry for this configuration
+        '''
+        shutil.rmtree(self.entryDir, ignore_errors=True)
+        print('Invalidated DataSetCache entry %s' % self.entryDir)
+
+    def clear(self) -> None:
+        '''
+        Removes all entries in the cache directory
+        '''
+        shutil.rmtree(self.cacheDir, ignore_errors=True)
+        print('Cleared DataSetCache directory %s' % self.cacheDir)
+
+    def _writeEntry(self, entryDir: str, dataSet: DataSet) -> None:
+        adjMtxs = dataSet.adjacencyMatrices
+        nodeFeatures = dataSet.nodeFeatures
+
+        self._saveArr(entryDir, 'drugNodeList', np.array(dataSet.nodeLists.drugNodeList, dtype=np.int64))
+        self._saveArr(entryDir, 'proteinNodeList', np.array(dataSet.nodeLists.proteinNodeList, dtype=np.int64))
+
+        self._saveCsrStack(entryDir, 'drugDrug', list(adjMtxs.drugDrugRelationMtxs.values()))
+        self._saveCsrStack(entryDir, 'drugProtein', [adjMtxs.drugProteinRelationMtx])
+        self._saveCsrStack(entryDir, 'proteinProtein', [adjMtxs.proteinProteinRelationMtx])
+        self._saveCsrStack(entryDir, 'proteinFeatures', [nodeFeatures.proteinNodeFeatures])
+        self._saveCsrStack(entryDir, 'drugFeatures', [nodeFeatures.drugNodeFeatures])
+
+        meta = {
+            'version': CACHE_FORMAT_VERSION,
+            'id': dataSet.id,
+            'drugDrugRelationIds': [
+                int(relId) for relId in adjMtxs.drugDrugRelationMtxs.keys()
+            ],
+        }
+
+        # Write meta last, as its existence marks a complete entry
+        with open(os.path.join(entryDir, META_FNAME), 'w') as f:
+            json.dump(meta, f)
+
+    def _readEntry(self, entryDir: str) -> DataSet:
+        with open(os.path.join(entryDir, META_FNAME)) as f:
+            meta = json.load(f)
+
+        nodeLists = NodeLists(
+            proteinNodeList=[
+                ProteinId(val) for val in self._loadArr(entryDir, 'proteinNodeList')
+            ],
+            drugNodeList=[
+                DrugId(val) for val in self._loadArr(entryDir, 'drugNodeList')
+            ],
+        )
+
+        drugDrugMtxs = self._loadCsrStack(entryDir, 'drugDrug')
+        adjacencyMatrices = AdjacencyMatrices(
+            drugDrugRelationMtxs=dict(zip(meta['drugDrugRelationIds'], drugDrugMtxs)),
+            drugProteinRelationMtx=self._loadCsrStack(entryDir, 'drugProtein')[0],
+            proteinProteinRelationMtx=self._loadCsrStack(entryDir, 'proteinProtein')[0],
+        )
+
+        nodeFeatures = NodeFeatures(
+            proteinNodeFeatures=self._loadCsrStack(entryDir, 'proteinFeatures')[0].tocoo(),
+            drugNodeFeatures=self._loadCsrStack(entryDir, 'drugFeatures')[0].tocoo(),
+        )
+
+        return DataSet(meta['id'], nodeLists, adjacencyMatrices, nodeFeatures)
+
+    def _saveCsrStack(self, entryDir: str, name: str, mtxs: List[sp.spmatrix]) -> None:
+        '''
+        Saves a list of sparse matrices as the concatenation of their CSR
+        arrays, along with the offsets of each matrix in those arrays.
+        '''
+        csrMtxs = [sp.csr_matrix(mtx) for mtx in mtxs]
+
+        shapes = np.array([mtx.shape for mtx in csrMtxs], dtype=np.int64).reshape(-1, 2)
+        nnzOffsets = np.cumsum([0] + [mtx.nnz for mtx in csrMtxs])
+        indptrOffsets = np.cumsum([0] + [mtx.shape[0] + 1 for mtx in csrMtxs])
+
+        def concat(arrs: List[np.ndarray], dtype) -> np.ndarray:
+            return np.concatenate(arrs) if len(arrs) > 0 else np.empty(0, dtype=dtype)
+
+        self._saveArr(entryDir, name + '.shapes', shapes)
+        self._saveArr(entryDir, name + '.nnzOffsets', nnzOffsets)
+        self._saveArr(entryDir, name + '.indptrOffsets', indptrOffsets)
+        self._saveArr(entryDir, name + '.indptr', concat([m.indptr for m in csrMtxs], np.int32))
+        self._saveArr(entryDir, name + '.indices', concat([m.indices for m in csrMtxs], np.int32))
+        self._saveArr(entryDir, name + '.data', concat([m.data for m in csrMtxs], np.float64))
+
+    def _loadCsrStack(self, entryDir: str, name: str) -> List[RelationCsrMatrix]:
+        shapes = self._loadArr(entryDir, name + '.shapes')
+        nnzOffsets = self._loadArr(entryDir, name + '.nnzOffsets')
+        indptrOffsets = self._loadArr(entryDir, name + '.indptrOffsets')
+
+        indptr = self._loadArr(entryDir, name + '.indptr', mmap=True)
+        indices = self._loadArr(entryDir, name + '.indices', mmap=True)
+        data = self._loadArr(entryDir, name + '.data', mmap=True)
+
+        return [
+            RelationCsrMatrix(
+                (
+                    data[nnzOffsets[i]:nnzOffsets[i + 1]],
+                    indices[nnzOffsets[i]:nnzOffsets[i + 1]],
+                    indptr[indptrOffsets[i]:indptrOffsets[i + 1]],
+                ),
+                shape=tuple(shapes[i])
+            ) for i in range(shapes.shape[0])
+        ]
+
+    def _saveArr(self, entryDir: str, name: str, arr: np.ndarray) -> None:
+        np.save(os.path.join(entryDir, name + '.npy'), arr, allow_pickle=False)
+
+    def _loadArr(self, entryDir: str, name: str, mmap: bool = False) -> np.ndarray:
+        return np.load(
+            os.path.join(entryDir, name + '.npy'),
+            mmap_mode='c' if mmap else None,
+            allow_pickle=False
+        )
+
+if __name__ == '__main__':
+    # Invalidates the cached data set for the given configuration, e.g.,
+    #   python -m main.DataSetParsers.DataSetCache --config configuration.json
+    DataSetCache(Config.getConfig()).invalidate()
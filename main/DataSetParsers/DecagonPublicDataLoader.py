@@ -0,0 +1,119 @@
+from ..Dtos.NodeIds import BaseNodeId, DrugId, ProteinId, SideEffectId
+from ..Utils.Config import Config
+from typing import ClassVar, Dict, List, Tuple
+import csv
+import numpy as np
+
+LoaderKey = Tuple[str, str, str]
+
+class DecagonPublicDataLoader:
+    '''
+    Reads each of the public Decagon edge files exactly once into integer
+    columns of node ids.  All node list and adjacency matrix builders for the
+    public data are built from these columns, so a loader is shared between
+    them for a given set of filenames (see fromConfig).
+
+    Drug and protein ids are stored as the integer values of DrugId and
+    ProteinId, and drug-drug relations as the integer part of the side
+    effect's STITCH id (i.e., C0003126 -> 3126).
+    '''
+
+    _loaders: ClassVar[Dict[LoaderKey, 'DecagonPublicDataLoader']] = {}
+
+    @staticmethod
+    def fromConfig(config: Config) -> 'DecagonPublicDataLoader':
+        key = (
+            config.getSetting('DecagonDrugDrugRelationsFilename'),
+            config.getSetting('DecagonDrugProteinRelationsFilename'),
+            config.getSetting('DecagonProteinProteinRelationsFilename'),
+        )
+
+        if key not in DecagonPublicDataLoader._loaders:
+            DecagonPublicDataLoader._loaders[key] = DecagonPublicDataLoader(*key)
+
+        return DecagonPublicDataLoader._loaders[key]
+
+    def __init__(
+        self,
+        drugDrugFname: str,
+        drugProteinFname: str,
+        ppiFname: str
+    ) -> None:
+        self._loadDrugDrugRelations(drugDrugFname)
+        self._loadDrugProteinRelations(drugProteinFname)
+        self._loadPpiRelations(ppiFname)
+
+    @property
+    def drugIds(self) -> np.ndarray:
+        '''
+        Sorted unique ids of all drugs in the drug-drug and drug-protein files
+        '''
+        return np.unique(np.concatenate([
+            self.drugDrugFromIds,
+            self.drugDrugToIds,
+            self.drugProteinDrugIds,
+        ]))
+
+    @property
+    def proteinIds(self) -> np.ndarray:
+        '''
+        Sorted unique ids of all proteins in the ppi and drug-protein files
+        '''
+        return np.unique(np.concatenate([
+            self.ppiFromIds,
+            self.ppiToIds,
+            self.drugProteinProteinIds,
+        ]))
+
+    def _loadDrugDrugRelations(self, fname: str) -> None:
+        FROM_DRUG_IDX = 0
+        TO_DRUG_IDX   = 1
+        RELATION_IDX  = 2
+
+        columns = self._readColumns(fname, numCols=3)
+
+        self.drugDrugFromIds = DrugId.fromDecagonFormatArr(columns[FROM_DRUG_IDX])
+        self.drugDrugToIds = DrugId.fromDecagonFormatArr(columns[TO_DRUG_IDX])
+
+        # The relation ID str is a 'C' followed by the side effect's digits.
+        # Use an int which excludes this 'C'.
+        self.drugDrugRelationIds = SideEffectId.fromDecagonFormatArr(columns[RELATION_IDX])
+
+    def _loadDrugProteinRelations(self, fname: str) -> None:
+        columns = self._readColumns(fname, numCols=2)
+        firstCol = np.array(columns[0], dtype=str)
+        scndCol  = np.array(columns[1], dtype=str)
+
+        # In preprocessed dataset, all drug identifiers are prefixed with 'CID'
+        # while protein identifiers are not.  A drug may be in either column.
+        firstIsDrug = np.char.startswith(firstCol, DrugId.DECAGON_PREFIX)
+
+        # Drug and protein ids are both just the digits of their strs
+        firstIds = BaseNodeId.fromDecagonFormatArr(firstCol)
+        scndIds  = BaseNodeId.fromDecagonFormatArr(scndCol)
+
+        self.drugProteinDrugIds = np.where(firstIsDrug, firstIds, scndIds)
+        self.drugProteinProteinIds = np.where(firstIsDrug, scndIds, firstIds)
+
+    def _loadPpiRelations(self, fname: str) -> None:
+        FROM_PROTEIN_IDX = 0
+        TO_PROTEIN_IDX   = 1
+
+        columns = self._readColumns(fname, numCols=2)
+
+        self.ppiFromIds = ProteinId.fromDecagonFormatArr(columns[FROM_PROTEIN_IDX])
+        self.ppiToIds = ProteinId.fromDecagonFormatArr(columns[TO_PROTEIN_IDX])
+
+    def _readColumns(self, fname: str, numCols: int) -> List[List[str]]:
+        columns = [[] for _ in range(numCols)]
+        with open(fname) as f:
+            # Skip comment lines as nx.read_edgelist did
+            reader = csv.reader(line for line in f if line[:1] != '#')
+            for row in reader:
+                if len(row) == 0:
+                    continue
+
+                for colIdx in range(numCols):
+                    columns[colIdx].append(row[colIdx].strip())
+
+        return columns
@@ -3,16 +3,15 @@ from ...Dtos.Enums.DataSetType import DataSetType
 from ...Dtos.NodeFeatures import NodeFeatures
 from ...Dtos.NodeIds import DrugId, SideEffectId
 from ...Dtos.NodeLists import NodeLists
+from ...Dtos.TypeShortcuts import EdgeList
+from ...Utils import ColumnUtils
 from ...Utils import Config
 from ...Utils.Sparse import RelationCooMatrix
-from collections import defaultdict
-from typing import Dict, List, Iterable, Type
+from typing import Tuple, Type
 import csv
 import numpy as np
 import scipy.sparse as sp
 
-DrugFeaturesDict = Dict[DrugId, List[SideEffectId]]
-
 class DecagonPublicDataNodeFeaturesBuilder(
     BaseNodeFeaturesBuilder,
     functionalityType = DataSetType.DecagonPublicData
@@ -32,49 +31,50 @@ class DecagonPublicDataNodeFeaturesBuilder(
         return RelationCooMatrix(sp.identity(self.numProteins, format='coo'))
 
     def _getDrugNodeFeatures(self) -> Type[sp.coo_matrix]:
-        drugFeaturesDict = self._getDrugFeaturesDict()
+        drugIds, sideEffectIds = self._getDrugSideEffectIds()
 
-        drugIdToIdx = self._getDrugIdToIdx()
-        sideEffectIdToIdx = self._getSideEffectIdToIdx(drugFeaturesDict.values())
+        # Columns are all side effects in the file, ordered by id, including
+        # those only had by drugs not in the drug node list
+        uniqueSideEffectIds, sideEffectIdxs = np.unique(
+            sideEffectIds,
+            return_inverse=True
+        )
 
-        result = np.zeros((len(drugIdToIdx), len(sideEffectIdToIdx)))
-        for drugId, drugSideEffects in drugFeaturesDict.items():
-            for sideEffectId in drugSideEffects:
-                if drugId not in drugIdToIdx:
-                    continue
+        drugIdxs, isDrugInNodeList = ColumnUtils.findSorted(
+            np.array(self.drugNodeList, dtype=np.int64),
+            drugIds
+        )
 
-                drugIdx = drugIdToIdx[drugId]
-                sideEffectIdx = sideEffectIdToIdx[sideEffectId]
+        result = sp.csr_matrix(
+            (
+                np.ones(np.count_nonzero(isDrugInNodeList)),
+                (drugIdxs[isDrugInNodeList], sideEffectIdxs[isDrugInNodeList])
+            ),
+            shape=(len(self.drugNodeList), len(uniqueSideEffectIds))
+        )
 
-                result[drugIdx, sideEffectIdx] = 1
+        # Duplicate rows are summed when building the matrix, but features
+        # are binary
+        result.data[:] = 1
 
         return RelationCooMatrix(result)
 
-    def _getDrugFeaturesDict(self) -> DrugFeaturesDict:
+    def _getDrugSideEffectIds(self) -> Tuple[np.ndarray, np.ndarray]:
         DRUG_ID_IDX     = 0
         SIDE_EFFECT_IDX = 1
 
-        result = defaultdict(list)
+        drugIdStrs = []
+        sideEffectIdStrs = []
         with open(self.filename) as drugFtrsFile:
             reader = csv.reader(drugFtrsFile)
 
             # Discard header
             next(reader)
             for row in reader:
-                drugId = DrugId.fromDecagonFormat(row[DRUG_ID_IDX])
-                sideEffectId = SideEffectId.fromDecagonFormat(row[SIDE_EFFECT_IDX])
-
-                result[drugId].append(sideEffectId)
-
-        return result
-
-    def _getDrugIdToIdx(self) -> Dict[DrugId, int]:
-        return {drugId: idx for idx, drugId in enumerate(self.drugNodeList)}
-
-    def _getSideEffectIdToIdx(
-        self,
-        sideEffects: Iterable[List[SideEffectId]]
-    ) -> Dict[SideEffectId, int]:
-        uniqueSideEffects = np.unique(np.concatenate(tuple(sideEffects)))
-        return {sideEffect: idx for idx, sideEffect in enumerate(uniqueSideEffects)}
+                drugIdStrs.append(row[DRUG_ID_IDX])
+                sideEffectIdStrs.append(row[SIDE_EFFECT_IDX])
 
+        return (
+            DrugId.fromDecagonFormatArr(drugIdStrs),
+            SideEffectId.fromDecagonFormatArr(sideEffectIdStrs),
+        )
@@ -1,6 +1,21 @@
+from typing import Dict, Tuple, Type
+
+# Relation coordinate, i.e., (from graph idx, to graph idx, relation idx)
+RelationCoordinate = Tuple[int, int, int]
+
 class AccuracyScores:
-    def __init__(self, auroc: float, auprc: float, apk: float):
+    def __init__(
+        self,
+        auroc: float,
+        auprc: float,
+        apk: float,
+        perRelationScores: Dict[RelationCoordinate, Type['AccuracyScores']] = None
+    ):
         self.auroc: float = auroc
         self.auprc: float = auprc
         self.apk:  float = apk
 
+        # If scores were pooled over several relations, each relation's
+        # own scores
+        self.perRelationScores: Dict[RelationCoordinate, Type['AccuracyScores']] = \
+            perRelationScores if perRelationScores is not None else {}
@@ -0,0 +1,6 @@
+from enum import Enum
+
+class AcquisitionFunctionType(Enum):
+    MaxScore = 0
+    Margin = 1
+    Entropy = 2
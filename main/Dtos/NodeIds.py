@@ -1,10 +1,20 @@
-from typing import Type
+from typing import ClassVar, Iterable, Type
+import numpy as np
+
+ZERO_CODE_POINT = ord('0')
+NINE_CODE_POINT = ord('9')
 
 class BaseNodeId(int):
     '''
     Not meant to be instantiated, but rather used as a utility for
     other Id classes (namely, to convert from decagon format)
     '''
+
+    # Decagon formatted ids are DECAGON_PREFIX followed by the id, zero
+    # padded to DECAGON_NUM_DIGITS digits
+    DECAGON_PREFIX: ClassVar[str] = ''
+    DECAGON_NUM_DIGITS: ClassVar[int] = 0
+
     def __new__(cls, val: object) -> Type['BaseNodeId']:
         if isinstance(val, str):
             val = BaseNodeId._formatStr(val)
@@ -26,6 +36,48 @@ class BaseNodeId(int):
     def fromDecagonFormat(cls, val: object) -> Type['BaseNodeId']:
         return cls(BaseNodeId._formatStr(val))
 
+    @classmethod
+    def fromDecagonFormatArr(cls, vals: Iterable[str]) -> np.ndarray:
+        '''
+        Vectorized version of fromDecagonFormat.  Converts an array of decagon
+        formatted id strs into an int64 array of ids.
+        '''
+        strs = np.asarray(vals, dtype=str)
+        if strs.size == 0:
+            return np.zeros(strs.shape, dtype=np.int64)
+
+        # View each str as a row of its (zero-padded) unicode code points
+        numChars = strs.dtype.itemsize // 4
+        codePoints = strs.view(np.uint32).reshape(strs.shape + (numChars,))
+
+        # As in _formatStr, only the digits of a str are used
+        isDigit = (codePoints >= ZERO_CODE_POINT) & (codePoints <= NINE_CODE_POINT)
+        digits = codePoints.astype(np.int64) - ZERO_CODE_POINT
+
+        result = np.zeros(strs.shape, dtype=np.int64)
+        for charIdx in range(numChars):
+            result = np.where(
+                isDigit[..., charIdx],
+                (result * 10) + digits[..., charIdx],
+                result
+            )
+
+        return result
+
+    @classmethod
+    def toDecagonFormatArr(cls, ids: Iterable[int]) -> np.ndarray:
+        '''
+        Vectorized version of toDecagonFormat.  Converts an array of ids into
+        an array of decagon formatted id strs.
+        '''
+        idStrs = np.asarray(ids, dtype=np.int64).astype(str)
+        if idStrs.size == 0:
+            return idStrs
+
+        paddedStrs = np.char.zfill(idStrs, cls.DECAGON_NUM_DIGITS)
+
+        return np.char.add(cls.DECAGON_PREFIX, paddedStrs)
+
     @staticmethod
     def _formatStr(preStr: str) -> str:
         '''
@@ -36,42 +88,46 @@ class BaseNodeId(int):
         SID123     -> 123
 
         '''
-        # If the protein is just 0, then return 0
-        if preStr == '0' or preStr[-1] == '0':
-            return '0'
-
         # Remove leters from string
         preStr = ''.join(filter(str.isdigit, preStr))
 
         # Remove prefixed 0s
         preStr = preStr.lstrip('0')
 
-        return preStr
+        # If the id is just 0s, then return 0
+        return preStr if preStr else '0'
 
 class DrugId(BaseNodeId):
+    # All STITCH drug IDs are of the format CID<nums> where <nums> is a
+    # sequence of 9 numbers.
+    DECAGON_PREFIX = 'CID'
+    DECAGON_NUM_DIGITS = 9
+
     def toDecagonFormat(self):
         preStr = str(self)
 
-        # All STITCH drug IDs are of the format CID<nums> where <nums> is a
-        # sequence of 9 numbers.  If a preStr, as above, has less than 9
-        # digits, the STITCH ID has 0s prepended to those preStr digits.
-        numPrecedingZeros = 9 - len(preStr)
+        # If a preStr, as above, has less than 9 digits, the STITCH ID has 0s
+        # prepended to those preStr digits.
+        numPrecedingZeros = DrugId.DECAGON_NUM_DIGITS - len(preStr)
         zerosStr = '0' * numPrecedingZeros
 
-        return 'CID' + zerosStr + preStr
+        return DrugId.DECAGON_PREFIX + zerosStr + preStr
 
 class ProteinId(BaseNodeId):
     pass
 
 class SideEffectId(BaseNodeId):
+    # All STITCH side effect IDs are of the format C<nums> where <nums> is a
+    # sequence of 7 numbers.
+    DECAGON_PREFIX = 'C'
+    DECAGON_NUM_DIGITS = 7
+
     def toDecagonFormat(self):
         preStr = str(self)
 
-        # All STITCH side effect IDs are of the format C<nums> where <nums> is a
-        # sequence of 7 numbers.  If a preStr, as above, has less than 7
-        # digits, the STITCH ID has 0s prepended to those preStr digits.
-        numPrecedingZeros = 7 - len(preStr)
+        # If a preStr, as above, has less than 7 digits, the STITCH ID has 0s
+        # prepended to those preStr digits.
+        numPrecedingZeros = SideEffectId.DECAGON_NUM_DIGITS - len(preStr)
         zerosStr = '0' * numPrecedingZeros
 
-        return 'C' + zerosStr + preStr
-
+        return SideEffectId.DECAGON_PREFIX + zerosStr + preStr
@@ -1,16 +1,17 @@
 from .BaseLogger import BaseLogger
 from ..AccuracyEvaluators.Tensorflow.DecagonAccuracyEvaluator import DecagonAccuracyEvaluator
+from ..AccuracyEvaluators.Tensorflow.DecagonEmbeddingCache import DecagonEmbeddingCache
 from ..Checkpointer.TensorflowCheckpointer import TensorflowCheckpointer
 from ..Dtos.AccuracyScores import AccuracyScores
 from ..Dtos.Decagon.DecagonTrainingIterationResults import DecagonTrainingIterationResults
 from ..Dtos.Enums.LoggerType import LoggerType
 from ..Trainable.Decagon.DecagonTrainable import DecagonTrainable
+from ..Utils.AsyncWorker import AsyncWorker
 from ..Utils.Config import Config
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List
 import _io
 import tensorflow as tf
-import numpy as np
 import atexit
 import csv
 import os
@@ -22,9 +23,40 @@ DOT_IDX  = LOG_FILE_FORMAT.find('.')
 def _closeFile(f: _io.TextIOWrapper) -> None:
     f.close()
 
+class _EvaluationRequest:
+    '''
+    What is needed to evaluate, and log, one logged iteration once training
+    has moved on from it
+    '''
+    def __init__(
+        self,
+        epoch: int,
+        iterationNum: int,
+        iterationResults: DecagonTrainingIterationResults,
+        evalAll: bool,
+        feedDict: Dict,
+        variableValues: Dict
+    ) -> None:
+        self.epoch: int = epoch
+        self.iterationNum: int = iterationNum
+        self.iterationResults: DecagonTrainingIterationResults = iterationResults
+        self.evalAll: bool = evalAll
+
+        # The model's variables' values as of the iteration, from which the
+        # worker computes its embeddings
+        self.feedDict: Dict = feedDict
+        self.variableValues: Dict = variableValues
+
 class DecagonLogger(BaseLogger, functionalityType=LoggerType.DecagonLogger):
     '''
-    Note that this class is not thread-safe
+    Note that this class is not thread-safe.
+
+    Logged iterations are evaluated on a background worker, which alone
+    writes to the results file, so evaluation does not stall training.  The
+    training thread only fetches the model's variables; the worker computes
+    the embeddings from those values, so the forward pass runs off the
+    training thread.  If the worker falls behind, stale iteration logs are
+    dropped; epoch end logs never are.
     '''
     def __init__(
         self,
@@ -52,15 +84,40 @@ class DecagonLogger(BaseLogger, functionalityType=LoggerType.DecagonLogger):
             Path(self.ndarrayWritePath).mkdir(parents=True, exist_ok=True)
 
         self.trainable: DecagonTrainable = trainable
+
+        # Built once, as building them adds ops to the graph
+        self.ndarrayFetches: Dict[str, object] = self._getNdarrayFetches()
+
+        self.modelVariables: List[tf.Variable] = list(trainable.model.vars.values())
+
+        self.embeddingCache: DecagonEmbeddingCache = DecagonEmbeddingCache(
+            self.session,
+            trainable.placeholders,
+            trainable.model.embeddings,
+            trainable.model.latent_inters,
+            trainable.model.latent_varies
+        )
+
         self.accuracyEvaluator: DecagonAccuracyEvaluator = DecagonAccuracyEvaluator(
             self.session,
             trainable.placeholders,
             trainable.optimizer.predictions,
+            trainable.optimizer.sampled_predictions,
             trainable.dataSetIterator.edge_type2idx,
+            trainable.optimizer.obj_type2n,
+            self.embeddingCache,
             config
         )
 
+        self.evaluationWorker: AsyncWorker = AsyncWorker(
+            self._evaluateAndWrite,
+            int(config.getSetting('EvaluationBacklogSize'))
+        )
+
+        # Registered after _closeFile so that it runs, and finishes writing
+        # to the file, first
         atexit.register(_closeFile, f=self.trainResultLogFile)
+        atexit.register(self.evaluationWorker.close)
 
     def _getTrainResultFile(self, config: Config) -> _io.TextIOWrapper:
         return open(self._getTrainResultFileName(config), 'w')
@@ -110,6 +167,23 @@ class DecagonLogger(BaseLogger, functionalityType=LoggerType.DecagonLogger):
 
         return csv.DictWriter(self.trainResultLogFile, fieldnames=fieldnames)
 
+    def updateTrainable(self, dataSetId: str, trainable: DecagonTrainable) -> None:
+        '''
+        Logs the training of trainable, which must share this logger's
+        trainable's model, from its first epoch.  The results file, worker
+        and graph fetches are kept, so no ops, threads or files are added.
+        '''
+        if trainable.model is not self.trainable.model:
+            raise ValueError('Can only update to a trainable sharing this logger\'s model')
+
+        # Queued evaluations read the current trainable's validation edges
+        self.flush()
+
+        self.dataSetId = dataSetId
+        self.trainable = trainable
+        self.currEpoch = 1
+        self.numIterationsDone = 0
+
     @property
     def shouldLog(self):
         return super().shouldLog or self.checkpointer.shouldCheckpoint
@@ -127,8 +201,7 @@ class DecagonLogger(BaseLogger, functionalityType=LoggerType.DecagonLogger):
             self._logInternal(feedDict, iterationResults)
 
         if self.checkpointer.shouldCheckpoint:
-            self.checkpointer.save()
-            self._writeAsNdarray(feedDict)
+            self.checkpointer.save(self._getEvalFeedDict(feedDict), self.ndarrayFetches)
 
         return
 
@@ -143,16 +216,43 @@ class DecagonLogger(BaseLogger, functionalityType=LoggerType.DecagonLogger):
 
         self.currEpoch += 1
 
+    def flush(self) -> None:
+        '''
+        Waits until every logged iteration has been evaluated and written,
+        and every checkpoint has been written
+        '''
+        self.evaluationWorker.flush()
+        self.checkpointer.flush()
+
     def _logInternal(
         self,
         feedDict: Dict,
         iterationResults: DecagonTrainingIterationResults,
         evalAll: bool = False
     ) -> None:
-        accuracyScores = self._computeAccuracyScores(feedDict, evalAll)
+        def makeRequest() -> _EvaluationRequest:
+            variableValues = self.session.run(self.modelVariables)
+
+            return _EvaluationRequest(
+                self.currEpoch,
+                self.numIterationsDone,
+                iterationResults,
+                evalAll,
+                dict(feedDict),
+                dict(zip(self.modelVariables, variableValues))
+            )
+
+        # Fetching the variables copies all of them, so it is skipped for
+        # stale logs the worker has no room for
+        self.evaluationWorker.submitLazily(makeRequest, canDrop=not evalAll)
 
-        iterRowDict = self._getCsvRowDict(iterationResults, accuracyScores, evalAll)
-        iterString  = self._getString(iterationResults, accuracyScores, evalAll)
+        return
+
+    def _evaluateAndWrite(self, request: _EvaluationRequest) -> None:
+        accuracyScores = self._computeAccuracyScores(request)
+
+        iterRowDict = self._getCsvRowDict(request, accuracyScores)
+        iterString  = self._getString(request, accuracyScores)
 
         self.trainResultWriter.writerow(iterRowDict)
         self.trainResultLogFile.flush()
@@ -161,19 +261,22 @@ class DecagonLogger(BaseLogger, functionalityType=LoggerType.DecagonLogger):
 
         return
 
-    def _computeAccuracyScores(self, feedDict: Dict, evalAll: bool) -> AccuracyScores:
+    def _computeAccuracyScores(self, request: _EvaluationRequest) -> AccuracyScores:
         iterator = self.trainable.dataSetIterator
 
-        if evalAll:
-            return self.accuracyEvaluator.evaluateAll(
-                feedDict,
+        # The forward pass, run here on the worker rather than in training
+        self.embeddingCache.update(request.feedDict, request.variableValues)
+
+        if request.evalAll:
+            return self.accuracyEvaluator.evaluateAllFromEmbeddings(
+                self.embeddingCache,
                 iterator.val_edges,
                 iterator.val_edges_false
             )
 
         else:
-            return self.accuracyEvaluator.evaluate(
-                feedDict,
+            return self.accuracyEvaluator.evaluateFromEmbeddings(
+                self.embeddingCache,
                 (1, 1, 0),
                 iterator.val_edges,
                 iterator.val_edges_false
@@ -181,15 +284,16 @@ class DecagonLogger(BaseLogger, functionalityType=LoggerType.DecagonLogger):
 
     def _getCsvRowDict(
         self,
-        iterationResults: DecagonTrainingIterationResults,
-        accuracyScores: AccuracyScores,
-        evalAll: bool
+        request: _EvaluationRequest,
+        accuracyScores: AccuracyScores
     ) -> Dict:
+        iterationResults = request.iterationResults
+
         return {
             'DataSetId': self.dataSetId,
-            'Epoch': self.currEpoch,
-            'EvaluateAll': evalAll,
-            'IterationNum': self.numIterationsDone,
+            'Epoch': request.epoch,
+            'EvaluateAll': request.evalAll,
+            'IterationNum': request.iterationNum,
             'Loss': iterationResults.iterationLoss,
             'Latency': iterationResults.iterationLatency,
             'EdgeType': iterationResults.iterationEdgeType,
@@ -200,10 +304,11 @@ class DecagonLogger(BaseLogger, functionalityType=LoggerType.DecagonLogger):
 
     def _getString(
         self,
-        iterationResults: DecagonTrainingIterationResults,
-        accuracyScores: AccuracyScores,
-        evalAll: bool
+        request: _EvaluationRequest,
+        accuracyScores: AccuracyScores
     ) -> str:
+        iterationResults = request.iterationResults
+
         return '''
 DataSetId: %s
 Epoch: %d
@@ -218,73 +323,45 @@ APK: %f
 
         ''' % (
             self.dataSetId,
-            self.currEpoch,
-            self.numIterationsDone,
+            request.epoch,
+            request.iterationNum,
             iterationResults.iterationLoss,
             iterationResults.iterationLatency,
-            evalAll,
+            request.evalAll,
             iterationResults.iterationEdgeType,
             accuracyScores.auroc,
             accuracyScores.auprc,
             accuracyScores.apk,
         )
 
-    def _writeAsNdarray(self, feedDict) -> None:
-        self._writeEmbeddings(feedDict)
-        self._writeRelationEmbeddingImportance(feedDict)
-        self._writeRelationMtx(feedDict)
+    def _getEvalFeedDict(self, feedDict: Dict) -> Dict:
+        result = dict(feedDict)
+        result[self.trainable.placeholders['dropout']] = 0
 
-    def _writeEmbeddings(self, feedDict) -> None:
-        DRUG_GRAPH_IDX = 1
-        embeddingsToWrite = self.session.run(
-            self.trainable.model.embeddings[DRUG_GRAPH_IDX],
-            feed_dict=feedDict
-        )
+        return result
 
-        np.save(
-            self.ndarrayWritePath + 'embeddings.npy',
-            embeddingsToWrite,
-            allow_pickle=False
-        )
+    def _getNdarrayFetches(self) -> Dict[str, object]:
+        if not self.writeNdarrays:
+            return {}
 
-    def _writeRelationEmbeddingImportance(self, feedDict) -> None:
+        DRUG_GRAPH_IDX = 1
         validIdxs = [
             i for i in range(len(self.trainable.dataSetIterator.idx2edge_type))
             if self._edgeTypeValid(i)
         ]
 
-        embeddingImportanceMtxTensors = [
-            self.trainable.model.latent_varies[idx]
-            for idx in validIdxs
-        ]
-
-        embeddingImportanceMtx = self.session.run(
-            embeddingImportanceMtxTensors,
-            feed_dict=feedDict
-        )
-
-        np.savez(
-            self.ndarrayWritePath + 'EmbeddingImportance.npyz',
-            embeddingImportanceMtx,
-            allow_pickle=False
-        )
-
-    def _writeRelationMtx(self, feedDict) -> None:
-        globInterIdx = next((
-            i for i in range(len(self.trainable.dataSetIterator.idx2edge_type))
-            if self._edgeTypeValid(i)
-        ))
+        return {
+            self.ndarrayWritePath + 'embeddings.npy':
+                self.trainable.model.embeddings[DRUG_GRAPH_IDX],
 
-        globalRelationMtx = self.session.run(
-            self.trainable.model.latent_inters[globInterIdx],
-            feed_dict=feedDict
-        )
+            # np.savez appended .npz to the name earlier dumps were written
+            # with, so it is kept for their readers
+            self.ndarrayWritePath + 'EmbeddingImportance.npyz.npz':
+                tf.gather(self.trainable.model.latent_varies, validIdxs),
 
-        np.save(
-            self.ndarrayWritePath + 'GlobalRelations.npy',
-            globalRelationMtx,
-            allow_pickle=False
-        )
+            self.ndarrayWritePath + 'GlobalRelations.npy':
+                self.trainable.model.latent_inters[validIdxs[0]],
+        }
 
     def _edgeTypeValid(self, idx: int) -> bool:
         DRUG_DRUG_GRAPH_TUPLE = (1, 1)
@@ -32,6 +32,7 @@ class CheckpointToNdarrayWriter:
 
         trainable: Type[Trainable] = self._getDecagonTrainable()
         populatedSession: tf.Session = self._getPopulatedSession()
+        trainable.dataSetIterator.load_graph_tensors(populatedSession)
 
         feedDict: Dict = self._getFeedDict(trainable)
         self._writeAsNdarray(trainable, populatedSession, feedDict)
@@ -126,13 +127,8 @@ class CheckpointToNdarrayWriter:
             if self._edgeTypeValid(trainable, i)
         ]
 
-        embeddingImportanceMtxTensors = [
-            trainable.model.latent_varies[idx]
-            for idx in validIdxs
-        ]
-
         embeddingImportanceMtxs = session.run(
-            embeddingImportanceMtxTensors,
+            tf.gather(trainable.model.latent_varies, validIdxs),
             feed_dict=feedDict
         )
 
@@ -4,6 +4,7 @@ from ..Dtos.PredictionsInformation import PredictionsInformation
 from ..Dtos.NodeLists import NodeLists
 from ..Dtos.NodeIds import DrugId, SideEffectId
 from ..Dtos.Enums.DataSetType import DataSetType
+from ..Utils import ColumnUtils
 from ..Utils.ArgParser import ArgParser
 from ..Utils.Config import Config
 from ..Utils.ObjectFactory import ObjectFactory
@@ -35,10 +36,7 @@ predsInfoHolderLock = Lock()
 class _PredictionsInfoHolder:
     def __init__(self):
         self.nodeLists: NodeLists = self._getNodeLists()
-        self.drugIdToIdx = {
-            DrugId.toDecagonFormat(drugId): idx
-            for idx, drugId in enumerate(self.nodeLists.drugNodeList)
-        }
+        self.drugIds = np.array(self.nodeLists.drugNodeList, dtype=np.int64)
 
         npSaveDir = config.getSetting('NpSaveDir')
 
@@ -61,38 +59,41 @@ class _PredictionsInfoHolder:
         return listBuilder.build()
 
     def _buildTestEdgeDict(self) -> Dict:
-        result = {}
+        rows = list(self._getTestEdgeReader())
 
-        testEdgeReader = self._getTestEdgeReader()
-        for row in testEdgeReader:
-            if row['RelationId'] == 'C0003126':
-                import pdb; pdb.set_trace()
-            if not self._isRowValid(row):
-                continue
-
-            fromNodeIdx = None
-            toNodeIdx = None
-            try:
-                fromNodeIdx = self.drugIdToIdx[row['FromNode']]
-                toNodeIdx = self.drugIdToIdx[row['ToNode']]
-            except KeyError:
-                continue
-
-            newArr = np.array([fromNodeIdx, toNodeIdx, int(row['Label'])])
-
-            relId = row['RelationId']
-            if relId not in result:
-                result[relId] = newArr.reshape((1, -1))
-            else:
-                result[relId] = np.vstack([result[relId], newArr])
+        fromNodes = np.array([row['FromNode'] for row in rows], dtype=str)
+        toNodes   = np.array([row['ToNode'] for row in rows], dtype=str)
+        relIds    = np.array([row['RelationId'] for row in rows], dtype=str)
+        labels    = np.array([int(row['Label']) for row in rows], dtype=np.int64)
 
-        return result
+        fromNodeIdxs, isFromNodeValid = self._getDrugIdxs(fromNodes)
+        toNodeIdxs, isToNodeValid     = self._getDrugIdxs(toNodes)
+
+        isValid = isFromNodeValid & isToNodeValid
+        edges = np.stack([fromNodeIdxs, toNodeIdxs, labels], axis=1)[isValid]
+        relIds = relIds[isValid]
+
+        # Group edges by relation, keeping the order of the test edge file
+        uniqueRelIds, relIdxs = np.unique(relIds, return_inverse=True)
+        sortIdxs = np.argsort(relIdxs, kind='stable')
+        splitIdxs = np.cumsum(np.bincount(relIdxs, minlength=len(uniqueRelIds)))[:-1]
+
+        return dict(zip(uniqueRelIds, np.split(edges[sortIdxs], splitIdxs)))
+
+    def _getDrugIdxs(self, nodeStrs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        Returns the index of each of nodeStrs in the drug node list, along with
+        a mask of which nodeStrs are drugs in the node list.
+        '''
+        nodeIds = DrugId.fromDecagonFormatArr(nodeStrs)
+
+        sortIdxs = np.argsort(self.drugIds, kind='stable')
+        sortedPositions, isFound = ColumnUtils.findSorted(self.drugIds[sortIdxs], nodeIds)
 
-    def _isRowValid(self, row):
-        def _isDrugNode(strVal: str) -> bool:
-            return strVal[:3] == 'CID'
+        # Only strs exactly in decagon's drug format (e.g., not proteins) are valid
+        isDrugStr = nodeStrs == DrugId.toDecagonFormatArr(nodeIds)
 
-        return _isDrugNode(row['FromNode']) and _isDrugNode(row['ToNode'])
+        return sortIdxs[sortedPositions], isFound & isDrugStr
 
     def _buildTrainEdgeDict(self) -> None:
         result = {}
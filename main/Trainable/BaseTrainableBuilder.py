@@ -15,3 +15,11 @@ class BaseTrainableBuilder(BaseFactorizableClass, functionalityType=None, metacl
     def build(self) -> Type[Trainable]:
         pass
 
+    @abstractmethod
+    def update(self, dataSet: DataSet, trainable: Trainable) -> Type[Trainable]:
+        '''
+        Returns a trainable of dataSet that reuses the graph of trainable,
+        which this builder built, rather than building a new one.  dataSet
+        must have the same relations and nodes as trainable's data set.
+        '''
+        pass
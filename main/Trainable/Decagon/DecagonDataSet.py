@@ -1,3 +1,4 @@
+from .decagon.deep.graph_tensors import PersistentGraphTensors
 from .decagon.utility import preprocessing
 from ...Utils.Config import Config
 from ...Dtos.AdjacencyMatrices import AdjacencyMatrices
@@ -59,10 +60,34 @@ class DecagonDataSet:
 
         self.edgeTypeDecoderDict: EdgeTypeDecoderDict = self._getEdgeTypeDecoderDict(config)
         self.flags: Flags = self._getFlags(config)
+
+        # If set, adjacency and feature matrices are held in the session
+        # rather than fed as placeholders with every minibatch
+        self.graphTensors: PersistentGraphTensors = None
+        if bool(config.getSetting('PersistGraphTensorsInSession')):
+            self.graphTensors = PersistentGraphTensors(edgeTypeNumMatricesDict)
+
         self.placeholdersDict: PlaceholdersDict = self._getPlaceholdersDict(
             edgeTypeNumMatricesDict
         )
 
+    def updateAdjacencyMatrices(self, dataSet: DataSet, config: Config) -> None:
+        '''
+        Replaces this data set's adjacency matrices, and what is derived from
+        them, with those of dataSet, keeping this data set's placeholders and
+        graph tensors.  dataSet must have as many relations of each edge type
+        as this data set.
+        '''
+        adjMtxDict = DecagonDataSet._getAdjMtxDict(dataSet.adjacencyMatrices, config)
+
+        edgeTypeNumMatricesDict = DecagonDataSet._getEdgeTypeNumMatricesDict(adjMtxDict)
+        if edgeTypeNumMatricesDict != dict(self.edgeTypeNumMatricesDict):
+            raise ValueError('dataSet must have the same relations as this data set')
+
+        self.adjacencyMatrixDict = adjMtxDict
+        self.edgeTypeMatrixDimDict = DecagonDataSet._getEdgeTypeMtxDimDict(adjMtxDict)
+        self.degreesDict = DecagonDataSet._getDegreesDict(adjMtxDict)
+
     def _getEdgeTypeDecoderDict(self, config: Config) -> EdgeTypeDecoderDict:
         validDecoders = set(['innerproduct', 'distmult', 'bilinear', 'dedicom'])
 
@@ -109,13 +134,27 @@ class DecagonDataSet:
             name='batch_col_edge_type'
         )
 
+        # Rows of (row idx, col idx, edge type idx) to score with the
+        # optimizer's sampled predictions
+        result['sampled_pairs'] = tf.placeholder(
+            tf.int32,
+            shape=(None, 3),
+            name='sampled_pairs'
+        )
+
+        def getSparseInput(key: str):
+            if self.graphTensors is not None:
+                return self.graphTensors[key]
+            else:
+                return tf.sparse_placeholder(tf.float32)
+
         for edgeType, numMtxsForEdgeType in edgeTypeNumMatricesDict.items():
             for i in range(numMtxsForEdgeType):
                 key = 'adj_mats_%d,%d,%d' % (edgeType[0], edgeType[1], i)
-                result[key] = tf.sparse_placeholder(tf.float32)
+                result[key] = getSparseInput(key)
 
         for x in [DecagonDataSet.PPI_GRAPH_IDX, DecagonDataSet.DRUG_DRUG_GRAPH_IDX]:
-            result['feat_%d' % x] = tf.sparse_placeholder(tf.float32)
+            result['feat_%d' % x] = getSparseInput('feat_%d' % x)
 
         return result
 
@@ -10,6 +10,7 @@ from ...Utils.Config import Config
 from .decagon.deep.minibatch import EdgeMinibatchIterator
 from .decagon.deep.model import DecagonModel
 from .decagon.deep.optimizer import DecagonOptimizer
+from .decagon.utility import preprocessing
 from typing import Type, Dict, Tuple
 
 import tensorflow as tf
@@ -67,6 +68,26 @@ class DecagonTrainableBuilder(
             self.dataSet.placeholdersDict
         )
 
+    def update(self, dataSet: DataSet, trainable: DecagonTrainable) -> DecagonTrainable:
+        '''
+        Only the data set iterator is rebuilt; the model, optimizer and
+        placeholders of trainable are reused, and the new adjacency matrices
+        and degrees take effect once loaded into the trainer's session.
+        '''
+        self.dataSet.updateAdjacencyMatrices(dataSet, self.config)
+        trainable.optimizer.set_degrees(self.dataSet.degreesDict)
+
+        dataSetIterator = self.getDataSetIterator()
+
+        self._recordTestEdges(dataSetIterator)
+
+        return DecagonTrainable(
+            dataSetIterator,
+            trainable.optimizer,
+            trainable.model,
+            self.dataSet.placeholdersDict
+        )
+
     def getDataSetIterator(self) -> EdgeMinibatchIterator:
         return EdgeMinibatchIterator(
             self.dataSet.adjacencyMatrixDict,
@@ -74,11 +95,11 @@ class DecagonTrainableBuilder(
             self.dataSet.edgeTypeNumMatricesDict,
             self.drugDrugTestEdges,
             self.dataSet.flags.batch_size,
-            float(self.config.getSetting('TestSetProportion'))
+            float(self.config.getSetting('TestSetProportion')),
+            graph_tensors=self.dataSet.graphTensors
         )
 
     def getModel(self) -> DecagonModel:
-        FEATURE_TPL_MTX_IDX   = 1
         FEATURE_TPL_SHAPE_IDX = 2
 
         subGraphToFeaturesDimDict = {
@@ -86,17 +107,12 @@ class DecagonTrainableBuilder(
             for subGraphIdx, featureTpl in self.dataSet.featuresDict.items()
         }
 
-        subGraphToNumNonZeroValsDict = {
-            subGraphIdx: int(featureTpl[FEATURE_TPL_MTX_IDX].sum())
-            for subGraphIdx, featureTpl in self.dataSet.featuresDict.items()
-        }
-
         return DecagonModel(
             self.dataSet.placeholdersDict,
             subGraphToFeaturesDimDict,
-            subGraphToNumNonZeroValsDict,
             self.dataSet.edgeTypeNumMatricesDict,
             self.dataSet.edgeTypeDecoderDict,
+            identity_feat=preprocessing.identity_feature_types(self.dataSet.featuresDict)
         )
 
     def getOptimizer(self, model: DecagonModel) -> DecagonOptimizer:
@@ -124,8 +140,14 @@ class DecagonTrainableBuilder(
         f = open(self._getTestEdgeFilename(), 'w')
         writer = self._getWriter(f)
 
+        # Node ids of each graph type, indexed by node index
+        nodeIdArrs = {
+            0: np.array(self.nodeLists.proteinNodeList, dtype=np.int64),
+            1: np.array(self.nodeLists.drugNodeList, dtype=np.int64),
+        }
+
         for graphRelationType in dataSetIterator.graphAndRelationTypes:
-            self._recordEdges(writer, graphRelationType, dataSetIterator)
+            self._recordEdges(writer, graphRelationType, dataSetIterator, nodeIdArrs)
 
         f.close()
 
@@ -141,7 +163,13 @@ class DecagonTrainableBuilder(
 
         return baseFname + '.csv'
 
-    def _recordEdges(self, dictWriter, graphRelationType, dataSetIterator) -> None:
+    def _recordEdges(
+        self,
+        dictWriter,
+        graphRelationType,
+        dataSetIterator,
+        nodeIdArrs: Dict[int, np.ndarray]
+    ) -> None:
         relTypeStr = ''
         if graphRelationType.graphType == DRUG_DRUG_GRAPH_TYPE:
             try:
@@ -154,49 +182,44 @@ class DecagonTrainableBuilder(
                 # write the non-transposed ones and don't process those transposed.
                 return
 
-        decoders = {
-            0: ProteinId.toDecagonFormat,
-            1: DrugId.toDecagonFormat,
-        }
-
-        nodeListDecoder = {
-            0: self.nodeLists.proteinNodeList,
-            1: self.nodeLists.drugNodeList,
+        encoders = {
+            0: ProteinId.toDecagonFormatArr,
+            1: DrugId.toDecagonFormatArr,
         }
 
-        def _getRecordDict(edge: Tuple[int, int], label: int):
-            fromGraphType = graphRelationType.graphType[FROM_GRAPH_IDX]
-            toGraphType = graphRelationType.graphType[TO_GRAPH_IDX]
-
-            try:
-                fromNodePre = nodeListDecoder[fromGraphType][edge[FROM_NODE_IDX]]
-                toNodePre   = nodeListDecoder[toGraphType][edge[TO_NODE_IDX]]
-            except ValueError:
-                import pdb; pdb.set_trace()
-
-            return {
-                'FromNode': decoders[fromGraphType](fromNodePre),
-                'ToNode': decoders[toGraphType](toNodePre),
-                'RelationId': relTypeStr,
-                'Label': label,
-            }
-
         graphType    = graphRelationType.graphType
         relationType = graphRelationType.relationType
 
-        posRecordDicts = map(
-            lambda x: _getRecordDict(x, 1),
-            dataSetIterator.val_edges[graphType][relationType]
-        )
+        fromGraphType = graphType[FROM_GRAPH_IDX]
+        toGraphType   = graphType[TO_GRAPH_IDX]
 
-        negRecordDicts = map(
-            lambda x: _getRecordDict(x, 0),
-            dataSetIterator.val_edges_false[graphType][relationType]
-        )
+        def _getRecordDicts(edges: np.ndarray, label: int):
+            edges = np.asarray(edges, dtype=np.int64).reshape((-1, 2))
+
+            fromNodes = encoders[fromGraphType](
+                nodeIdArrs[fromGraphType][edges[:, FROM_NODE_IDX]]
+            )
+            toNodes = encoders[toGraphType](
+                nodeIdArrs[toGraphType][edges[:, TO_NODE_IDX]]
+            )
+
+            return (
+                {
+                    'FromNode': fromNode,
+                    'ToNode': toNode,
+                    'RelationId': relTypeStr,
+                    'Label': label,
+                }
+                for fromNode, toNode in zip(fromNodes, toNodes)
+            )
 
         # Write to writer
-        list(map(lambda x: dictWriter.writerow(x), posRecordDicts))
-        list(map(lambda x: dictWriter.writerow(x), negRecordDicts))
+        dictWriter.writerows(
+            _getRecordDicts(dataSetIterator.val_edges[graphType][relationType], 1)
+        )
+        dictWriter.writerows(
+            _getRecordDicts(dataSetIterator.val_edges_false[graphType][relationType], 0)
+        )
 
     def _getWriter(self, f) -> csv.DictWriter:
         fieldnames = [
@@ -12,3 +12,10 @@ class BaseTrainer(BaseFactorizableClass, functionalityType=None, metaclass=ABCMe
     def train(self):
         pass
 
+    @abstractmethod
+    def updateTrainable(self, dataSetId: str, trainable: Trainable) -> None:
+        '''
+        Makes the next call to train train trainable, which shares the graph
+        of the trainable this trainer was built with
+        '''
+        pass
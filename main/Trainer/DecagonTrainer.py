@@ -1,4 +1,5 @@
 from .BaseTrainer import BaseTrainer
+from .MinibatchPrefetcher import MinibatchPrefetcher
 from ..Checkpointer.TensorflowCheckpointer import TensorflowCheckpointer
 from ..Dtos.Decagon.DecagonTrainingIterationResults import DecagonTrainingIterationResults
 from ..Dtos.Enums.TrainerType import TrainerType
@@ -12,25 +13,54 @@ import multiprocessing
 import tensorflow as tf
 
 class BaseDecagonTrainer(BaseTrainer, functionalityType=TrainerType.DecagonTrainer):
+    '''
+    The session, and the graph's variables, are kept across trainables given
+    by updateTrainable.  If WarmStartActiveLearningRounds is set, training
+    a new trainable continues from the variables' values after training the
+    last one; otherwise they are reinitialized.
+    '''
     def __init__(self, dataSetId: str, trainable: DecagonTrainable, config: Config) -> None:
-        self.optimizer = trainable.optimizer
-        self.dataSetIterator = trainable.dataSetIterator
-        self.placeholders = trainable.placeholders
+        self.config: Config = config
 
         tfConf = self._getTfConf()
         self.session: tf.Session = tf.Session(config=tfConf)
 
-        checkpointer = TensorflowCheckpointer(self.session, config)
-        self.logger = DecagonLogger(
+        # Built once, as building it adds an op to the graph
+        self.variablesInitializer: tf.Operation = tf.global_variables_initializer()
+        self.shouldWarmStart: bool = bool(config.getSetting('WarmStartActiveLearningRounds'))
+        self.hasTrained: bool = False
+
+        self.checkpointer: TensorflowCheckpointer = TensorflowCheckpointer(self.session, config)
+
+        self.numEpochs: int = int(config.getSetting('NumEpochs'))
+        self.dropoutRate: float = float(config.getSetting('dropout'))
+
+        # One logger is kept for the trainer's lifetime, as building one
+        # adds ops to the graph, opens a results file and starts a worker
+        self.logger: DecagonLogger = DecagonLogger(
             self.session,
             dataSetId,
             trainable,
-            checkpointer,
+            self.checkpointer,
             config
         )
 
-        self.numEpochs: int = int(config.getSetting('NumEpochs'))
-        self.dropoutRate: float = float(config.getSetting('dropout'))
+        self._bindTrainable(trainable)
+
+    def updateTrainable(self, dataSetId: str, trainable: DecagonTrainable) -> None:
+        self.logger.updateTrainable(dataSetId, trainable)
+        self._bindTrainable(trainable)
+
+    def _bindTrainable(self, trainable: DecagonTrainable) -> None:
+        self.optimizer = trainable.optimizer
+        self.dataSetIterator = trainable.dataSetIterator
+        self.placeholders = trainable.placeholders
+
+        self.prefetcher: MinibatchPrefetcher = MinibatchPrefetcher(
+            self.dataSetIterator,
+            self._getNextFeedDict,
+            int(self.config.getSetting('MinibatchPrefetchDepth'))
+        )
 
     def _getTfConf(self) -> tf.ConfigProto:
         numThreads = multiprocessing.cpu_count()
@@ -46,13 +76,18 @@ class BaseDecagonTrainer(BaseTrainer, functionalityType=TrainerType.DecagonTrain
         In case any later processing needs it, this returns the last feed dict
         used.
         '''
-        self.session.run(tf.global_variables_initializer())
+        if not (self.hasTrained and self.shouldWarmStart):
+            self.session.run(self.variablesInitializer)
+
+        self.hasTrained = True
+
+        # Only data that changed since the last trainable is loaded
+        self.dataSetIterator.load_graph_tensors(self.session)
+        self.optimizer.load_degrees(self.session)
 
         feedDict = None
         for epochNum in range(self.numEpochs):
-            self.dataSetIterator.shuffle()
-            while not self.dataSetIterator.end():
-                feedDict = self._getNextFeedDict()
+            for feedDict in self.prefetcher.epochFeedDicts():
                 iterResults = self._trainBatch(feedDict)
 
                 self.logger.incrementIterations()
@@ -61,6 +96,8 @@ class BaseDecagonTrainer(BaseTrainer, functionalityType=TrainerType.DecagonTrain
 
             self.logger.logEpochEnd(feedDict, iterResults)
 
+        self.logger.flush()
+
         return feedDict
 
     def _trainBatch(self, feedDict: Dict) -> DecagonTrainingIterationResults:
@@ -0,0 +1,91 @@
+from typing import Callable, Dict, Iterator
+import threading
+import queue
+
+# Seconds a blocked producer waits before checking whether it was stopped
+PUT_TIMEOUT_SECS = 0.1
+
+class _EndOfEpoch:
+    pass
+
+class _ProducerError:
+    def __init__(self, error: BaseException) -> None:
+        self.error: BaseException = error
+
+class MinibatchPrefetcher:
+    '''
+    Builds the feed dicts of an epoch's minibatches on a background thread,
+    up to depth minibatches ahead of the one being trained on, so that
+    the Python batch schedule runs while the session is busy.
+
+    The producer makes exactly the calls the serial training loop would
+    (shuffle, then end and nextFeedDictFxn until end is True), in the same
+    order, so epochs consist of the same minibatches.  The data set iterator
+    must not be used by anything else for the rest of an epoch once it has
+    begun.  A depth of 0 builds feed dicts serially on the calling thread.
+    '''
+    def __init__(
+        self,
+        dataSetIterator,
+        nextFeedDictFxn: Callable[[], Dict],
+        depth: int
+    ) -> None:
+        self.dataSetIterator = dataSetIterator
+        self.nextFeedDictFxn: Callable[[], Dict] = nextFeedDictFxn
+        self.depth: int = depth
+
+    def epochFeedDicts(self) -> Iterator[Dict]:
+        '''
+        Shuffles the data set iterator and yields the feed dicts of one epoch
+        '''
+        self.dataSetIterator.shuffle()
+
+        if self.depth <= 0:
+            while not self.dataSetIterator.end():
+                yield self.nextFeedDictFxn()
+
+            return
+
+        feedDicts = queue.Queue(maxsize=self.depth)
+        stopEvent = threading.Event()
+
+        producer = threading.Thread(
+            target=self._produce,
+            args=(feedDicts, stopEvent),
+            daemon=True
+        )
+        producer.start()
+
+        try:
+            while True:
+                item = feedDicts.get()
+                if isinstance(item, _EndOfEpoch):
+                    break
+                elif isinstance(item, _ProducerError):
+                    raise item.error
+
+                yield item
+        finally:
+            # If the consumer stopped early, unblock and end the producer
+            stopEvent.set()
+            producer.join()
+
+    def _produce(self, feedDicts: queue.Queue, stopEvent: threading.Event) -> None:
+        try:
+            while not self.dataSetIterator.end():
+                if not self._put(feedDicts, stopEvent, self.nextFeedDictFxn()):
+                    return
+
+            self._put(feedDicts, stopEvent, _EndOfEpoch())
+        except BaseException as e:
+            self._put(feedDicts, stopEvent, _ProducerError(e))
+
+    def _put(self, feedDicts: queue.Queue, stopEvent: threading.Event, item) -> bool:
+        while not stopEvent.is_set():
+            try:
+                feedDicts.put(item, timeout=PUT_TIMEOUT_SECS)
+                return True
+            except queue.Full:
+                pass
+
+        return False
@@ -0,0 +1,35 @@
+from ..Dtos.Enums.AcquisitionFunctionType import AcquisitionFunctionType
+from typing import Callable
+import numpy as np
+
+# Acquisition functions map candidates' predicted probabilities of being
+# edges to how much unmasking each is worth; the highest valued are
+# unmasked first.
+AcquisitionFunction = Callable[[np.ndarray], np.ndarray]
+
+def maxScore(probabilities: np.ndarray) -> np.ndarray:
+    return probabilities
+
+def margin(probabilities: np.ndarray) -> np.ndarray:
+    '''
+    Highest for the candidates closest to the decision boundary
+    '''
+    return -np.abs(probabilities - 0.5)
+
+def entropy(probabilities: np.ndarray) -> np.ndarray:
+    '''
+    Binary entropy of each prediction, highest for the least certain
+    '''
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = -((probabilities * np.log(probabilities))
+                   + ((1. - probabilities) * np.log(1. - probabilities)))
+
+    # Predictions of exactly 0 or 1 are certain
+    return np.nan_to_num(result)
+
+def getAcquisitionFunction(acquisitionFunctionType: AcquisitionFunctionType) -> AcquisitionFunction:
+    return {
+        AcquisitionFunctionType.MaxScore: maxScore,
+        AcquisitionFunctionType.Margin: margin,
+        AcquisitionFunctionType.Entropy: entropy,
+    }[acquisitionFunctionType]
@@ -0,0 +1,134 @@
+from collections import deque
+from typing import Callable, Deque, Tuple
+import threading
+
+class AsyncWorker:
+    '''
+    Runs requests (e.g., evaluations or checkpoint writes) on a background
+    thread, in the order they were submitted, so that training does not
+    wait on them.
+
+    At most maxBacklog requests wait to be run.  When a request is submitted
+    to a full backlog, the oldest droppable waiting request is discarded
+    (it is stale, as a newer one supersedes it); if none are droppable, the
+    submitter waits for room.  A maxBacklog of 0 runs requests serially on
+    the submitting thread.
+
+    An exception raised by runFxn is re-raised by the next call to
+    submit or flush.
+    '''
+    def __init__(self, runFxn: Callable[[object], None], maxBacklog: int) -> None:
+        self.runFxn: Callable[[object], None] = runFxn
+        self.maxBacklog: int = maxBacklog
+        self.numDropped: int = 0
+
+        # Pairs of (request, canDrop)
+        self.backlog: Deque[Tuple[object, bool]] = deque()
+        self.numInFlight: int = 0
+        self.error: BaseException = None
+        self.isClosed: bool = False
+
+        self.condition = threading.Condition()
+        self.thread: threading.Thread = None
+        if self.maxBacklog > 0:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def submit(self, request, canDrop: bool) -> None:
+        if self.thread is None:
+            self.runFxn(request)
+            return
+
+        with self.condition:
+            self._raiseError()
+
+            if len(self.backlog) >= self.maxBacklog:
+                self._dropOldestDroppable()
+
+            while len(self.backlog) >= self.maxBacklog:
+                self.condition.wait()
+                self._raiseError()
+
+            self.backlog.append((request, canDrop))
+            self.condition.notify_all()
+
+    def submitLazily(self, makeRequest: Callable[[], object], canDrop: bool) -> None:
+        '''
+        Submits the request makeRequest builds, unless it is droppable and
+        the backlog is full, in which case it is dropped without being
+        built, rather than displacing a waiting request.  Used when building
+        a request is itself costly.
+        '''
+        if canDrop and self.thread is not None:
+            with self.condition:
+                self._raiseError()
+
+                if len(self.backlog) >= self.maxBacklog:
+                    self.numDropped += 1
+                    return
+
+        self.submit(makeRequest(), canDrop)
+
+    def flush(self) -> None:
+        '''
+        Waits until every submitted request has been run
+        '''
+        if self.thread is None:
+            return
+
+        with self.condition:
+            while (self.backlog or self.numInFlight > 0) and self.error is None:
+                self.condition.wait()
+
+            self._raiseError()
+
+    def close(self) -> None:
+        '''
+        Runs the remaining requests, then stops the background thread
+        '''
+        if self.thread is None or self.isClosed:
+            return
+
+        try:
+            self.flush()
+        finally:
+            with self.condition:
+                self.isClosed = True
+                self.condition.notify_all()
+
+            self.thread.join()
+
+    def _dropOldestDroppable(self) -> None:
+        for i, (_, canDrop) in enumerate(self.backlog):
+            if canDrop:
+                del self.backlog[i]
+                self.numDropped += 1
+                return
+
+    def _raiseError(self) -> None:
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                while not self.backlog and not self.isClosed:
+                    self.condition.wait()
+
+                if not self.backlog:
+                    return
+
+                request, _ = self.backlog.popleft()
+                self.numInFlight += 1
+                self.condition.notify_all()
+
+            try:
+                self.runFxn(request)
+            except BaseException as e:
+                with self.condition:
+                    self.error = e
+            finally:
+                with self.condition:
+                    self.numInFlight -= 1
+                    self.condition.notify_all()
@@ -0,0 +1,34 @@
+import numpy as np
+
+# Number of set bits of each byte value
+BYTE_POPCOUNTS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1).sum(axis=1)
+
+class Bitset:
+    '''
+    A set of integers in [0, size), stored as one bit per integer.  Adds and
+    membership tests take arrays of integers, and are vectorized over them.
+    '''
+    def __init__(self, size: int) -> None:
+        self.size: int = size
+        self.bits: np.ndarray = np.zeros((size + 7) // 8, dtype=np.uint8)
+
+    def add(self, idxs: np.ndarray) -> None:
+        idxs = np.asarray(idxs, dtype=np.int64).reshape(-1)
+        np.bitwise_or.at(self.bits, idxs >> 3, self._getBitMasks(idxs))
+
+    def contains(self, idxs: np.ndarray) -> np.ndarray:
+        idxs = np.asarray(idxs, dtype=np.int64).reshape(-1)
+        return (self.bits[idxs >> 3] & self._getBitMasks(idxs)) != 0
+
+    def toArray(self) -> np.ndarray:
+        '''
+        Returns a bool array of length size, True at the set's integers
+        '''
+        return np.unpackbits(self.bits)[:self.size].astype(bool)
+
+    def __len__(self) -> int:
+        return int(BYTE_POPCOUNTS[self.bits].sum())
+
+    # Bits are ordered most significant first, as in np.packbits
+    def _getBitMasks(self, idxs: np.ndarray) -> np.ndarray:
+        return np.right_shift(0x80, idxs & 7).astype(np.uint8)
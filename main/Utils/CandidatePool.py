@@ -0,0 +1,151 @@
+from .Bitset import Bitset
+from typing import Iterable, Iterator, List, Tuple
+import numpy as np
+
+class CandidatePool:
+    '''
+    The candidates remaining to be chosen from several relations, each
+    relation's candidates being a range [0, relationSize) of linear indices
+    less those removed from it.  Removed candidates are stored as one bit
+    each, in a Bitset per relation, so the pool's memory is an eighth of a
+    byte per candidate however many are removed, and each relation's
+    remaining candidates are found by scanning only its own bits.
+
+    Candidates are addressed by pool index, i.e., their relation's offset
+    into the concatenation of all relations' ranges plus their linear index.
+    '''
+    def __init__(self, relationSizes: Iterable[int]) -> None:
+        relationSizes = np.asarray(list(relationSizes), dtype=np.int64)
+
+        # Pool index of the first candidate of each relation, and the total
+        self.offsets: np.ndarray = np.concatenate([[0], np.cumsum(relationSizes)]).astype(np.int64)
+
+        self.removedMasks: List[Bitset] = [Bitset(int(size)) for size in relationSizes]
+        self.numRemaining: np.ndarray = relationSizes.copy()
+
+    @property
+    def numRelations(self) -> int:
+        return len(self.offsets) - 1
+
+    def __len__(self) -> int:
+        return int(self.numRemaining.sum())
+
+    def sample(self, numToSample: int) -> np.ndarray:
+        '''
+        Returns the pool indices of numToSample distinct remaining
+        candidates, chosen uniformly at random.  They are not removed.
+        '''
+        samples = [
+            self.toPoolIdxs(relationIdx, linearIdxs)
+            for relationIdx, linearIdxs in self.sampleByRelation(numToSample)
+        ]
+
+        return np.concatenate(samples) if samples else np.empty(0, dtype=np.int64)
+
+    def sampleByRelation(self, numToSample: int) -> Iterator[Tuple[int, np.ndarray]]:
+        '''
+        Yields the relation index and linear indices of the candidates of
+        each relation among numToSample distinct remaining candidates,
+        chosen uniformly at random.  A relation's candidates are drawn only
+        once it is reached, so a caller that removes each relation's before
+        taking the next needs memory proportional to the largest relation
+        rather than to numToSample.
+        '''
+        counts = _sampleCounts(self.numRemaining, numToSample)
+
+        for relationIdx in np.flatnonzero(counts):
+            remaining = self.remainingInRelation(relationIdx)
+            chosen = _sampleDistinct(len(remaining), int(counts[relationIdx]))
+
+            yield int(relationIdx), remaining[chosen]
+
+    def remaining(self) -> np.ndarray:
+        '''
+        Returns the pool indices of all remaining candidates, in order
+        '''
+        return np.concatenate([
+            self.toPoolIdxs(relationIdx, self.remainingInRelation(relationIdx))
+            for relationIdx in range(self.numRelations)
+        ] + [np.empty(0, dtype=np.int64)])
+
+    def remainingInRelation(self, relationIdx: int) -> np.ndarray:
+        '''
+        Returns the linear indices of a relation's remaining candidates, in
+        order, in memory proportional to the relation's size
+        '''
+        return np.flatnonzero(~self.removedMasks[relationIdx].toArray())
+
+    def remove(self, poolIdxs: np.ndarray) -> None:
+        for relationIdx, linearIdxs in enumerate(self.splitByRelation(poolIdxs)):
+            self.removeFromRelation(relationIdx, linearIdxs)
+
+    def removeFromRelation(self, relationIdx: int, linearIdxs: np.ndarray) -> None:
+        removedMask = self.removedMasks[relationIdx]
+        removedMask.add(linearIdxs)
+
+        # Counted from the bits, as linearIdxs may repeat or be removed already
+        self.numRemaining[relationIdx] = removedMask.size - len(removedMask)
+
+    def toPoolIdxs(self, relationIdx: int, linearIdxs: np.ndarray) -> np.ndarray:
+        return self.offsets[relationIdx] + np.asarray(linearIdxs, dtype=np.int64)
+
+    def splitByRelation(self, poolIdxs: np.ndarray) -> List[np.ndarray]:
+        '''
+        Returns the linear indices of poolIdxs that are in each relation,
+        sorted, in relation order
+        '''
+        poolIdxs = np.sort(np.asarray(poolIdxs, dtype=np.int64))
+        bounds = np.searchsorted(poolIdxs, self.offsets)
+
+        return [
+            poolIdxs[bounds[i]:bounds[i + 1]] - self.offsets[i]
+            for i in range(self.numRelations)
+        ]
+
+def _sampleCounts(numRemaining: np.ndarray, numToSample: int) -> np.ndarray:
+    '''
+    Returns how many of numToSample distinct candidates, chosen uniformly at
+    random from all relations, are in each relation, i.e., a draw of the
+    multivariate hypergeometric distribution, as a sequence of univariate
+    draws each conditioned on the relations before it
+    '''
+    numLeft = int(numRemaining.sum())
+    if numToSample > numLeft:
+        raise ValueError('Cannot sample %d of %d candidates' % (numToSample, numLeft))
+
+    result = np.zeros(len(numRemaining), dtype=np.int64)
+    for relationIdx, numInRelation in enumerate(numRemaining):
+        if numToSample == 0:
+            break
+
+        numLeft -= int(numInRelation)
+        if numInRelation == 0:
+            continue
+        elif numLeft == 0:
+            result[relationIdx] = numToSample
+        else:
+            result[relationIdx] = np.random.hypergeometric(numInRelation, numLeft, numToSample)
+
+        numToSample -= int(result[relationIdx])
+
+    return result
+
+def _sampleDistinct(n: int, numToSample: int) -> np.ndarray:
+    '''
+    Returns numToSample distinct integers of [0, n) chosen uniformly at
+    random, in memory proportional to numToSample rather than n
+    '''
+    if numToSample > n:
+        raise ValueError('Cannot sample %d of %d candidates' % (numToSample, n))
+
+    # Sampling a large part of [0, n) is taking a prefix of a permutation,
+    # which is within a constant factor of numToSample in memory
+    if 4 * numToSample > n:
+        return np.random.permutation(n)[:numToSample].astype(np.int64)
+
+    result = np.empty(0, dtype=np.int64)
+    while len(result) < numToSample:
+        draws = np.random.randint(0, n, size=numToSample - len(result), dtype=np.int64)
+        result = np.union1d(result, draws)
+
+    return np.random.permutation(result)
@@ -0,0 +1,16 @@
+from typing import Tuple
+import numpy as np
+
+def findSorted(sortedIds: np.ndarray, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    Returns the index of each of ids in sortedIds, along with a mask of
+    which ids were found at all.  Indices of ids not found are meaningless.
+    '''
+    idxs = np.searchsorted(sortedIds, ids)
+    clippedIdxs = np.minimum(idxs, max(len(sortedIds) - 1, 0))
+
+    isFound = np.zeros(len(ids), dtype=bool)
+    if len(sortedIds) > 0:
+        isFound = sortedIds[clippedIdxs] == ids
+
+    return clippedIdxs, isFound
@@ -0,0 +1,52 @@
+from typing import BinaryIO, Callable, Iterable
+import tempfile
+import os
+
+def atomicWrite(path: str, writeFxn: Callable[[BinaryIO], None]) -> None:
+    '''
+    Writes path by passing writeFxn a temporary file in the same directory,
+    which is fsynced and then renamed to path.  Readers of path thus see
+    either its old or its new contents, never a partial write.
+    '''
+    dirName = os.path.dirname(path) or '.'
+
+    fd, tmpPath = tempfile.mkstemp(dir=dirName, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            writeFxn(f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmpPath, path)
+    except BaseException:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+
+        raise
+
+    fsyncDir(dirName)
+
+def fsyncPaths(paths: Iterable[str]) -> None:
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+def fsyncDir(dirName: str) -> None:
+    '''
+    Persists the creation, removal and renaming of files in dirName
+    '''
+    # Not all platforms allow opening directories
+    try:
+        fd = os.open(dirName, os.O_RDONLY)
+    except OSError:
+        return
+
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
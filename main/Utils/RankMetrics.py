@@ -0,0 +1,137 @@
+from typing import Iterable, Tuple
+import numpy as np
+
+# Ranking metrics over a ragged batch of segments (e.g., one per relation),
+# each a run of consecutive (score, label) pairs in flat arrays.  All
+# segments are ranked with a single sort, after which AUROC, AUPRC and AP@k
+# are computed for every segment with segment-wise cumulative sums.
+#
+# AUROC and AUPRC match sklearn's roc_auc_score and average_precision_score,
+# including their treatment of tied scores, while AP@k matches
+# decagon.utility.rank_metrics.apk with tied scores ranked in input order.
+
+def segmentedRankMetrics(
+    scores: np.ndarray,
+    labels: np.ndarray,
+    segmentLengths: Iterable[int],
+    apkRank: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Returns arrays of each segment's AUROC, AUPRC and AP@apkRank.  AUROC is
+    nan for segments without both positives and negatives, AUPRC is nan for
+    segments without positives, and AP@k is 0 for segments without
+    positives.
+    '''
+    scores = np.asarray(scores, dtype=np.float64)
+    labels = np.asarray(labels).astype(bool)
+    segmentLengths = np.asarray(segmentLengths, dtype=np.int64).reshape(-1)
+
+    numSegments = len(segmentLengths)
+    segmentStarts = np.concatenate([[0], np.cumsum(segmentLengths)[:-1]]).astype(np.int64)
+    segmentIds = np.repeat(np.arange(numSegments), segmentLengths)
+
+    numPos = np.bincount(segmentIds, weights=labels, minlength=numSegments)
+    numNeg = segmentLengths - numPos
+
+    # Descending by score within each segment, ties kept in input order
+    order = np.lexsort((-scores, segmentIds))
+    sortedScores = scores[order]
+    sortedLabels = labels[order]
+
+    # Positives ranked above each position of the sort, including it
+    cumPos = np.concatenate([[0], np.cumsum(sortedLabels)])
+    rankInSegment = np.arange(len(scores)) - segmentStarts[segmentIds]
+    truePos = cumPos[1:] - cumPos[segmentStarts][segmentIds]
+    falsePos = (rankInSegment + 1) - truePos
+
+    # Groups of tied scores act as a single threshold
+    isGroupEnd = np.ones(len(scores), dtype=bool)
+    isGroupEnd[:-1] = (sortedScores[1:] != sortedScores[:-1]) \
+                      | (segmentIds[1:] != segmentIds[:-1])
+
+    groupEnds = np.flatnonzero(isGroupEnd)
+    groupStarts = np.concatenate([[0], groupEnds[:-1] + 1]).astype(np.int64)
+    groupSegmentIds = segmentIds[groupEnds]
+
+    posInGroup = cumPos[groupEnds + 1] - cumPos[groupStarts]
+    negInGroup = (groupEnds - groupStarts + 1) - posInGroup
+
+    groupTruePos = truePos[groupEnds]
+    groupFalsePos = falsePos[groupEnds]
+
+    auroc = _getAuroc(
+        posInGroup,
+        negInGroup,
+        numNeg[groupSegmentIds] - groupFalsePos,
+        groupSegmentIds,
+        numPos,
+        numNeg
+    )
+
+    auprc = _getAuprc(
+        posInGroup,
+        groupTruePos / (groupTruePos + groupFalsePos),
+        groupSegmentIds,
+        numPos
+    )
+
+    apk = _getApk(
+        sortedLabels,
+        truePos,
+        rankInSegment,
+        segmentIds,
+        numPos,
+        apkRank
+    )
+
+    return auroc, auprc, apk
+
+def rankMetrics(
+    scores: np.ndarray,
+    labels: np.ndarray,
+    apkRank: int
+) -> Tuple[float, float, float]:
+    '''
+    Returns the AUROC, AUPRC and AP@apkRank of a single set of scores
+    '''
+    auroc, auprc, apk = segmentedRankMetrics(scores, labels, [len(scores)], apkRank)
+
+    return auroc[0], auprc[0], apk[0]
+
+def _getAuroc(posInGroup, negInGroup, negBelowGroup, groupSegmentIds, numPos, numNeg):
+    # Each positive beats the negatives scored below it, and ties half of
+    # the negatives scored the same
+    numCorrectPairs = np.bincount(
+        groupSegmentIds,
+        weights=posInGroup * (negBelowGroup + (0.5 * negInGroup)),
+        minlength=len(numPos)
+    )
+
+    return _safeDivide(numCorrectPairs, numPos * numNeg, np.nan)
+
+def _getAuprc(posInGroup, groupPrecision, groupSegmentIds, numPos):
+    # Sum of each threshold's precision weighted by the recall it adds
+    precisionSum = np.bincount(
+        groupSegmentIds,
+        weights=posInGroup * groupPrecision,
+        minlength=len(numPos)
+    )
+
+    return _safeDivide(precisionSum, numPos, np.nan)
+
+def _getApk(sortedLabels, truePos, rankInSegment, segmentIds, numPos, apkRank):
+    isCounted = sortedLabels & (rankInSegment < apkRank)
+
+    precisionSum = np.bincount(
+        segmentIds[isCounted],
+        weights=truePos[isCounted] / (rankInSegment[isCounted] + 1),
+        minlength=len(numPos)
+    )
+
+    return _safeDivide(precisionSum, np.minimum(numPos, apkRank), 0.)
+
+def _safeDivide(numerator, denominator, fillValue):
+    result = np.full(len(numerator), fillValue, dtype=np.float64)
+    np.divide(numerator, denominator, out=result, where=denominator > 0)
+
+    return result
@@ -1,4 +1,6 @@
+from .Bitset import Bitset
 from typing import Type
+import numpy as np
 import scipy.sparse as sp
 import os
 
@@ -72,3 +74,20 @@ class RelationCsrMatrix(sp.csr_matrix):
 
         return newMtx
 
+def maskMatrix(mask: Bitset, mtx: sp.spmatrix) -> RelationCsrMatrix:
+    '''
+    Keeps the nonzero entries of mtx whose linear indices, row * numCols +
+    col, are in mask, looking up only those entries' linear indices
+    '''
+    mtx = sp.coo_matrix(mtx)
+
+    linearIdxs = (mtx.row.astype(np.int64) * mtx.shape[1]) + mtx.col
+    isKept = (mtx.data != 0) & mask.contains(linearIdxs)
+
+    return RelationCsrMatrix(
+        (
+            mtx.data[isKept].astype(np.float64),
+            (mtx.row[isKept], mtx.col[isKept])
+        ),
+        shape=mtx.shape
+    )
@@ -1,9 +1,10 @@
 from .Config import Config
 from ..DataSetParsers.NodeLists.DecagonPublicDataNodeListsBuilder import DecagonPublicDataNodeListsBuilder
 from ..Dtos.NodeLists import NodeLists
-from ..Dtos.NodeIds import BaseNodeId, ProteinId, DrugId
-from typing import Type
+from ..Dtos.NodeIds import DrugId
+from typing import List
 
+import numpy as np
 import csv
 import _io
 
@@ -19,11 +20,7 @@ class TestEdgeFileRepairer:
         self.postFname: str = self._getPostFname(self.preFname)
         self.nodeLists: NodeLists = self._getNodeLists()
 
-        # Just a utility to make code cleaner later
-        self.nodeListDecoders = {
-            DrugId: self.nodeLists.drugNodeList,
-            ProteinId: self.nodeLists.proteinNodeList,
-        }
+        self.drugNodeIds: np.ndarray = np.array(self.nodeLists.drugNodeList, dtype=np.int64)
 
     def _getNodeLists(self) -> NodeLists:
         nodeListBuilder = DecagonPublicDataNodeListsBuilder(self.config)
@@ -47,22 +44,34 @@ class TestEdgeFileRepairer:
         reader = self._getReader(preFile)
         writer = self._getWriter(postFile)
 
-        for row in reader:
-            writer.writerow({
-                'FromNode': self._processNode(row['FromNode']),
-                'ToNode': self._processNode(row['FromNode']),
+        rows = list(reader)
+
+        fromNodes = self._processNodes([row['FromNode'] for row in rows])
+        toNodes   = self._processNodes([row['ToNode'] for row in rows])
+
+        writer.writerows(
+            {
+                'FromNode': fromNode,
+                'ToNode': toNode,
                 'RelationId': row['RelationId'],
                 'Label': row['Label'],
-            })
+            }
+            for row, fromNode, toNode in zip(rows, fromNodes, toNodes)
+        )
 
         return
 
-    def _processNode(self, preStr: str) -> str:
-        if preStr[:3] != 'CID':
-            return preStr
+    def _processNodes(self, preStrs: List[str]) -> np.ndarray:
+        preStrs = np.array(preStrs, dtype=str)
+
+        # Only drug nodes need repairing, the rest are kept as they are
+        isDrug = np.char.startswith(preStrs, DrugId.DECAGON_PREFIX)
+        drugIdxs = DrugId.fromDecagonFormatArr(preStrs[isDrug])
+
+        result = preStrs.astype(object)
+        result[isDrug] = DrugId.toDecagonFormatArr(self.drugNodeIds[drugIdxs])
 
-        preprocessed = self._preprocessNode(preStr)
-        return self._postprocessNode(preprocessed)
+        return result
 
     def _getReader(self, f: _io.TextIOWrapper) -> csv.DictReader:
         return csv.DictReader(f)
@@ -80,21 +89,6 @@ class TestEdgeFileRepairer:
 
         return writer
 
-    def _preprocessNode(self, nodeStr: str) -> Type[BaseNodeId]:
-        if nodeStr[:3] == 'CID':
-            return DrugId.fromDecagonFormat(nodeStr)
-        else:
-            return ProteinId.fromDecagonFormat(nodeStr)
-
-    def _postprocessNode(self, node: Type[BaseNodeId]) -> str:
-        try:
-            nodeType = type(node)
-            trueValue = self.nodeListDecoders[nodeType][node]
-
-            return nodeType.toDecagonFormat(trueValue)
-        except IndexError:
-            import pdb; pdb.set_trace()
-
 if __name__ == '__main__':
     repairer = TestEdgeFileRepairer()
     repairer.repair()
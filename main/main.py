@@ -31,12 +31,12 @@ def _setEnvVars(config: Config) -> None:
     else:
         os.environ['CUDA_VISIBLE_DEVICES'] = ''
 
-def _getTrainable(
+def _getTrainableBuilder(
     dataSet: Type[DataSet],
     drugDrugTestEdges: Dict[int, Dict[str, np.array]],
     config: Config
-) -> Type[Trainable]:
-    trainableBuilder = ObjectFactory.build(
+) -> Type[BaseTrainableBuilder]:
+    return ObjectFactory.build(
         BaseTrainableBuilder,
         TrainableType[config.getSetting('TrainableType')],
         dataSet=dataSet,
@@ -44,8 +44,6 @@ def _getTrainable(
         config=config,
     )
 
-    return trainableBuilder.build()
-
 def _getActiveLearner(dataSet, config: Config) -> Type[BaseActiveLearner]:
     activeLearnerType = ActiveLearnerType[config.getSetting('ActiveLearnerType')]
 
@@ -79,12 +77,26 @@ def main() -> int:
     activeLearner: Type[BaseActiveLearner] = _getActiveLearner(dataSet, config)
     testEdges = activeLearner.testEdges
 
+    # If set, rounds after the first reuse the first round's graph and
+    # session, with only their data swapped in
+    shouldReuseGraph = bool(config.getSetting('ReuseGraphAcrossRounds'))
+
+    trainableBuilder: Type[BaseTrainableBuilder] = None
+    trainable: Type[Trainable] = None
+    trainer: Type[BaseTrainer] = None
+
     iterResults: Type[IterationResults] = None
     while activeLearner.hasUpdate(dataSet, iterResults):
         dataSet = activeLearner.getUpdate(dataSet, iterResults)
 
-        trainable: Type[Trainable] = _getTrainable(dataSet, testEdges, config)
-        trainer: Type[BaseTrainer] = _getTrainer(dataSet.id, trainable, config)
+        if shouldReuseGraph and trainer is not None:
+            trainable = trainableBuilder.update(dataSet, trainable)
+            trainer.updateTrainable(dataSet.id, trainable)
+
+        else:
+            trainableBuilder = _getTrainableBuilder(dataSet, testEdges, config)
+            trainable = trainableBuilder.build()
+            trainer = _getTrainer(dataSet.id, trainable, config)
 
         trainer.train()
 
@@ -0,0 +1,32 @@
+import importlib
+import os
+import sys
+import types
+
+REPO_DIR = os.path.join(os.path.dirname(__file__), os.pardir)
+
+def loadMainModule(*pathParts: str):
+    '''
+    Imports a module of main from its path under main.  main/__init__
+    imports every submodule (and so tensorflow), so main's packages are
+    registered without running their __init__s, and the module's relative
+    imports load only the modules it needs.
+    '''
+    packageName = 'main'
+    _registerPackage(packageName, [])
+
+    for depth, part in enumerate(pathParts[:-1]):
+        packageName += '.' + part
+        _registerPackage(packageName, pathParts[:depth + 1])
+
+    moduleName = os.path.splitext(pathParts[-1])[0]
+
+    return importlib.import_module(packageName + '.' + moduleName)
+
+def _registerPackage(name: str, pathParts) -> None:
+    if name in sys.modules:
+        return
+
+    package = types.ModuleType(name)
+    package.__path__ = [os.path.join(REPO_DIR, 'main', *pathParts)]
+    sys.modules[name] = package
@@ -0,0 +1,89 @@
+from helpers import loadMainModule
+import threading
+import pytest
+
+AsyncWorker = loadMainModule('Utils', 'AsyncWorker.py').AsyncWorker
+
+class _BlockingRunner:
+    '''
+    Records the requests it runs, blocking on each until released
+    '''
+    def __init__(self) -> None:
+        self.ran = []
+        self.started = threading.Semaphore(0)
+        self.release = threading.Event()
+
+    def __call__(self, request) -> None:
+        self.started.release()
+        self.release.wait()
+        self.ran.append(request)
+
+def _getBusyWorker(maxBacklog: int):
+    runner = _BlockingRunner()
+    worker = AsyncWorker(runner, maxBacklog)
+
+    # Request 0 is in flight until released, so later ones wait
+    worker.submit(0, canDrop=False)
+    runner.started.acquire()
+
+    return runner, worker
+
+def testSubmitDropsOldestDroppable():
+    runner, worker = _getBusyWorker(2)
+
+    for request in [1, 2, 3]:
+        worker.submit(request, canDrop=True)
+
+    runner.release.set()
+    worker.close()
+
+    assert runner.ran == [0, 2, 3]
+    assert worker.numDropped == 1
+
+def testSubmitLazilySkipsBuildingWhenFull():
+    runner, worker = _getBusyWorker(2)
+    built = []
+
+    def makeRequest(request):
+        def make():
+            built.append(request)
+            return request
+
+        return make
+
+    for request in [1, 2, 3]:
+        worker.submitLazily(makeRequest(request), canDrop=True)
+
+    # Not droppable, so built and displaces the oldest droppable request
+    worker.submitLazily(makeRequest(4), canDrop=False)
+
+    runner.release.set()
+    worker.close()
+
+    assert built == [1, 2, 4]
+    assert runner.ran == [0, 2, 4]
+    assert worker.numDropped == 2
+
+def testSubmitLazilyBuildsWhenSerial():
+    ran = []
+    worker = AsyncWorker(ran.append, 0)
+
+    for request in range(3):
+        worker.submitLazily(lambda request=request: request, canDrop=True)
+
+    assert ran == [0, 1, 2]
+    assert worker.numDropped == 0
+
+def testSubmitLazilyRaisesRunError():
+    def fail(request) -> None:
+        raise RuntimeError('failed on %d' % request)
+
+    worker = AsyncWorker(fail, 1)
+    worker.submit(0, canDrop=True)
+
+    with worker.condition:
+        while worker.backlog or worker.numInFlight > 0:
+            worker.condition.wait()
+
+    with pytest.raises(RuntimeError):
+        worker.submitLazily(lambda: 1, canDrop=True)
@@ -0,0 +1,44 @@
+from helpers import loadMainModule
+import numpy as np
+import pytest
+
+Bitset = loadMainModule('Utils', 'Bitset.py').Bitset
+
+@pytest.mark.parametrize('size', [0, 1, 7, 8, 9, 64, 101])
+def testMatchesBoolArray(size):
+    rng = np.random.RandomState(size)
+
+    bitset = Bitset(size)
+    reference = np.zeros(size, dtype=bool)
+
+    for _ in range(5):
+        # Repeats idxs, and adds some already added
+        idxs = rng.randint(0, max(size, 1), size=rng.randint(0, 2 * size + 1)) if size else []
+
+        bitset.add(idxs)
+        reference[idxs] = True
+
+        np.testing.assert_array_equal(bitset.toArray(), reference)
+        assert len(bitset) == reference.sum()
+
+        allIdxs = np.arange(size)
+        np.testing.assert_array_equal(bitset.contains(allIdxs), reference)
+
+        queried = rng.randint(0, max(size, 1), size=10) if size else []
+        np.testing.assert_array_equal(bitset.contains(queried), reference[queried])
+
+def testLastPartialByte():
+    bitset = Bitset(13)
+    bitset.add([12])
+
+    assert len(bitset) == 1
+    assert bitset.toArray().shape == (13,)
+    np.testing.assert_array_equal(np.flatnonzero(bitset.toArray()), [12])
+    np.testing.assert_array_equal(bitset.contains([11, 12]), [False, True])
+
+def testAddEmpty():
+    bitset = Bitset(10)
+    bitset.add(np.empty(0, dtype=np.int64))
+
+    assert len(bitset) == 0
+    assert bitset.contains(np.empty(0, dtype=np.int64)).shape == (0,)
@@ -0,0 +1,95 @@
+from helpers import loadMainModule
+import numpy as np
+import pytest
+
+CandidatePool = loadMainModule('Utils', 'CandidatePool.py').CandidatePool
+
+RELATION_SIZES = [13, 0, 40, 1, 64]
+
+def _getReference(pool):
+    return set(range(int(pool.offsets[-1])))
+
+def _assertMatches(pool, reference):
+    assert len(pool) == len(reference)
+    np.testing.assert_array_equal(pool.remaining(), sorted(reference))
+
+    for relationIdx in range(pool.numRelations):
+        start, end = pool.offsets[relationIdx], pool.offsets[relationIdx + 1]
+        expected = [x - start for x in sorted(reference) if start <= x < end]
+
+        np.testing.assert_array_equal(pool.remainingInRelation(relationIdx), expected)
+
+@pytest.mark.parametrize('seed', range(20))
+def testMatchesSetUnderRandomSampleAndRemove(seed):
+    np.random.seed(seed)
+    rng = np.random.RandomState(seed)
+
+    pool = CandidatePool(RELATION_SIZES)
+    reference = _getReference(pool)
+    _assertMatches(pool, reference)
+
+    while reference:
+        numToSample = rng.randint(0, len(reference) + 1)
+        sampled = pool.sample(numToSample)
+
+        assert len(sampled) == numToSample
+        assert len(set(sampled.tolist())) == numToSample
+        assert set(sampled.tolist()) <= reference
+
+        # Removes some of the sample, repeated, and some already removed
+        toRemove = np.concatenate([
+            sampled[:rng.randint(0, numToSample + 1)],
+            sampled[:2],
+            rng.randint(0, pool.offsets[-1], size=3),
+        ])
+
+        if rng.rand() < 0.5:
+            pool.remove(toRemove)
+        else:
+            for relationIdx, linearIdxs in enumerate(pool.splitByRelation(toRemove)):
+                pool.removeFromRelation(relationIdx, linearIdxs)
+
+        reference -= set(toRemove.tolist())
+        _assertMatches(pool, reference)
+
+    assert len(pool.sample(0)) == 0
+
+def testSampleByRelationMatchesSample():
+    np.random.seed(0)
+    pool = CandidatePool(RELATION_SIZES)
+    pool.remove(np.arange(0, pool.offsets[-1], 3))
+    reference = set(pool.remaining().tolist())
+
+    numSampled = 0
+    for relationIdx, linearIdxs in pool.sampleByRelation(len(pool) // 2):
+        poolIdxs = pool.toPoolIdxs(relationIdx, linearIdxs)
+        assert set(poolIdxs.tolist()) <= reference
+
+        numSampled += len(linearIdxs)
+        pool.removeFromRelation(relationIdx, linearIdxs)
+
+    assert numSampled == len(reference) // 2
+    assert len(pool) == len(reference) - numSampled
+
+def testSampleIsUniform():
+    np.random.seed(0)
+    pool = CandidatePool([5, 3, 8])
+    pool.remove([1, 6, 9, 15])
+
+    remaining = pool.remaining()
+    counts = dict.fromkeys(remaining.tolist(), 0)
+
+    numTrials = 6000
+    for _ in range(numTrials):
+        for poolIdx in pool.sample(3):
+            counts[int(poolIdx)] += 1
+
+    expected = numTrials * 3 / len(remaining)
+    assert all(abs(count - expected) < 0.1 * expected for count in counts.values())
+
+def testSampleTooManyRaises():
+    pool = CandidatePool([4, 4])
+    pool.remove([0, 5])
+
+    with pytest.raises(ValueError):
+        pool.sample(7)
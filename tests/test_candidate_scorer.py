@@ -0,0 +1,90 @@
+from helpers import loadMainModule
+import numpy as np
+import pytest
+
+CandidateScorer = loadMainModule('ActiveLearner', 'CandidateScorer.py').CandidateScorer
+CandidatePool = loadMainModule('Utils', 'CandidatePool.py').CandidatePool
+AcquisitionFunctions = loadMainModule('Utils', 'AcquisitionFunctions.py')
+AcquisitionFunctionType = loadMainModule('Dtos', 'Enums', 'AcquisitionFunctionType.py').AcquisitionFunctionType
+
+RELATION_SIZES = [50, 0, 70, 33]
+CHUNK_SIZES = [1, 7, 1000]
+
+def _sigmoid(x):
+    return 1. / (1 + np.exp(-x))
+
+def _getPoolAndScoreFxns(seed):
+    np.random.seed(seed)
+
+    pool = CandidatePool(RELATION_SIZES)
+    pool.remove(pool.sample(60))
+
+    relationScores = [np.random.randn(size) for size in RELATION_SIZES]
+    scoreFxns = [
+        (lambda scores: lambda linearIdxs: scores[linearIdxs])(scores)
+        for scores in relationScores
+    ]
+
+    return pool, scoreFxns, relationScores
+
+def _getRemainingAndScores(pool, relationScores):
+    remaining = []
+    scores = []
+    for relationIdx, relationScore in enumerate(relationScores):
+        linearIdxs = pool.remainingInRelation(relationIdx)
+
+        remaining.append(pool.toPoolIdxs(relationIdx, linearIdxs))
+        scores.append(relationScore[linearIdxs])
+
+    return np.concatenate(remaining), np.concatenate(scores)
+
+@pytest.mark.parametrize('acquisitionFunctionType', list(AcquisitionFunctionType))
+@pytest.mark.parametrize('chunkSize', CHUNK_SIZES)
+@pytest.mark.parametrize('seed', range(3))
+def testMatchesFullSort(acquisitionFunctionType, chunkSize, seed):
+    acquisitionFxn = AcquisitionFunctions.getAcquisitionFunction(acquisitionFunctionType)
+    pool, scoreFxns, relationScores = _getPoolAndScoreFxns(seed)
+
+    remaining, scores = _getRemainingAndScores(pool, relationScores)
+    values = acquisitionFxn(_sigmoid(scores))
+    sortedRemaining = remaining[np.argsort(-values, kind='stable')]
+
+    scorer = CandidateScorer(acquisitionFxn, chunkSize)
+
+    # Both above and below the chunk size, and more than remain
+    for numToSelect in [0, 1, 5, 40, len(remaining), len(remaining) + 10]:
+        result = scorer.getTopCandidates(pool, scoreFxns, numToSelect)
+
+        expected = sortedRemaining[:numToSelect]
+        assert len(result) == len(expected)
+        assert set(result.tolist()) == set(expected.tolist())
+
+        # Most valuable first
+        resultValues = values[np.searchsorted(remaining, result)]
+        assert np.all(np.diff(resultValues) <= 0)
+
+def testEmptyPool():
+    pool = CandidatePool([3])
+    pool.remove([0, 1, 2])
+
+    scorer = CandidateScorer(AcquisitionFunctions.maxScore, 2)
+    result = scorer.getTopCandidates(pool, [lambda linearIdxs: linearIdxs * 1.], 2)
+
+    assert len(result) == 0
+
+def testEntropyOfCertainPredictions():
+    result = AcquisitionFunctions.entropy(np.array([0., 1., 0.5]))
+
+    np.testing.assert_array_equal(result[:2], [0., 0.])
+    np.testing.assert_allclose(result[2], np.log(2))
+
+def testMargin():
+    result = AcquisitionFunctions.margin(np.array([0., 0.3, 0.5, 1.]))
+
+    np.testing.assert_allclose(result, [-0.5, -0.2, 0., -0.5])
+    assert np.argmax(result) == 2
+
+def testMaxScore():
+    probabilities = np.array([0.2, 0.9, 0.4])
+
+    np.testing.assert_array_equal(AcquisitionFunctions.maxScore(probabilities), probabilities)
@@ -0,0 +1,244 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+tf = pytest.importorskip('tensorflow')
+
+from decagon.deep.graph_tensors import PersistentGraphTensors
+from decagon.deep.minibatch import EdgeMinibatchIterator
+from decagon.deep.model import DecagonModel
+from decagon.deep.optimizer import DecagonOptimizer
+from decagon.utility import preprocessing
+
+NUM_PROTEINS = 60
+NUM_DRUGS = 50
+NUM_DRUG_DRUG_RELATIONS = 2
+BATCH_SIZE = 32
+
+FLAG_DEFAULTS = [
+    ('neg_sample_size', 1.),
+    ('learning_rate', 0.01),
+    ('hidden1', 16),
+    ('hidden2', 8),
+    ('weight_decay', 0.),
+    ('dropout', 0.1),
+    ('max_margin', 0.1),
+    ('batch_size', BATCH_SIZE),
+    ('bias', True),
+]
+
+class _AdjMtx(sp.csr_matrix):
+    '''
+    The attributes of main's RelationCsrMatrix the minibatch iterator reads
+    '''
+    _numMtxsCreated = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.isTranspose = False
+        self.transposedMtxLink = None
+
+        self.id = '_AdjMtx|%d' % _AdjMtx._numMtxsCreated
+        _AdjMtx._numMtxsCreated += 1
+
+def _defineFlags():
+    flags = tf.app.flags
+    for key, val in FLAG_DEFAULTS:
+        if key in flags.FLAGS:
+            continue
+
+        if isinstance(val, bool):
+            flags.DEFINE_boolean(key, val, key)
+        elif isinstance(val, int):
+            flags.DEFINE_integer(key, val, key)
+        else:
+            flags.DEFINE_float(key, val, key)
+
+def _randomAdj(rng, shape, density):
+    return (rng.random_sample(shape) < density).astype(np.float64)
+
+def _getAdjMtxs(rng, drugDrugDensity):
+    ppi = _randomAdj(rng, (NUM_PROTEINS, NUM_PROTEINS), 0.3)
+    proteinDrug = _randomAdj(rng, (NUM_PROTEINS, NUM_DRUGS), 0.3)
+    drugDrugs = [
+        _randomAdj(rng, (NUM_DRUGS, NUM_DRUGS), drugDrugDensity)
+        for _ in range(NUM_DRUG_DRUG_RELATIONS)
+    ]
+
+    return {
+        (0, 0): [_AdjMtx(ppi)],
+        (0, 1): [_AdjMtx(proteinDrug)],
+        (1, 0): [_AdjMtx(proteinDrug.T)],
+        (1, 1): [_AdjMtx(mtx) for mtx in drugDrugs],
+    }
+
+def _getDegrees(adjMtxs):
+    def getDegrees(mtx):
+        return np.array(mtx.sum(axis=0)).squeeze()
+
+    return {
+        0: [getDegrees(mtx) for mtx in adjMtxs[0, 0]],
+        1: [getDegrees(mtx) for mtx in adjMtxs[1, 1]],
+    }
+
+def _getDrugDrugTestEdges(rng):
+    # Held out pairs, which neither round's drug-drug matrices contain
+    pairs = np.stack(np.unravel_index(
+        rng.choice(NUM_DRUGS * NUM_DRUGS, 40, replace=False),
+        (NUM_DRUGS, NUM_DRUGS)
+    ), axis=1)
+
+    return {
+        relId: {'positive': pairs[:20], 'negative': pairs[20:]}
+        for relId in range(NUM_DRUG_DRUG_RELATIONS)
+    }
+
+def _maskTestEdges(adjMtxs, testEdges):
+    for k, mtx in enumerate(adjMtxs[1, 1]):
+        lil = mtx.tolil()
+        for edges in testEdges[k].values():
+            lil[edges[:, 0], edges[:, 1]] = 0
+
+        adjMtxs[1, 1][k] = _AdjMtx(lil.tocsr())
+
+def _getPlaceholders(edgeTypes, graphTensors):
+    result = {
+        'batch': tf.placeholder(tf.int32, name='batch'),
+        'degrees': tf.placeholder(tf.int32),
+        'dropout': tf.placeholder_with_default(0., shape=()),
+        'batch_edge_type_idx': tf.placeholder(tf.int32, shape=(), name='batch_edge_type_idx'),
+        'batch_row_edge_type': tf.placeholder(tf.int32, shape=(), name='batch_row_edge_type'),
+        'batch_col_edge_type': tf.placeholder(tf.int32, shape=(), name='batch_col_edge_type'),
+        'sampled_pairs': tf.placeholder(tf.int32, shape=(None, 3), name='sampled_pairs'),
+    }
+
+    for (i, j), numMtxs in edgeTypes.items():
+        for k in range(numMtxs):
+            key = 'adj_mats_%d,%d,%d' % (i, j, k)
+            result[key] = graphTensors[key]
+
+    for i in range(2):
+        result['feat_%d' % i] = graphTensors['feat_%d' % i]
+
+    return result
+
+def _getIterator(adjMtxs, feat, edgeTypes, testEdges, graphTensors):
+    return EdgeMinibatchIterator(
+        adjMtxs,
+        feat,
+        edgeTypes,
+        testEdges,
+        BATCH_SIZE,
+        0.05,
+        graph_tensors=graphTensors
+    )
+
+def _trainEpoch(session, iterator, optimizer, placeholders):
+    iterator.shuffle()
+
+    losses = []
+    while not iterator.end():
+        feedDict = iterator.next_minibatch_feed_dict(placeholders)
+        feedDict = iterator.update_feed_dict(feedDict, 0.1, placeholders)
+
+        _, loss = session.run([optimizer.opt_op, optimizer.cost], feed_dict=feedDict)
+        losses.append(loss)
+
+    return losses
+
+def testRoundsReuseOneGraph():
+    '''
+    Does what DecagonTrainableBuilder.update and DecagonTrainer do between
+    active learning rounds, with WarmStartActiveLearningRounds set: the new
+    round's data is loaded into the first round's graph and session, and
+    training continues from the first round's variable values.
+    '''
+    _defineFlags()
+    rng = np.random.RandomState(0)
+
+    with tf.Graph().as_default() as graph:
+        tf.set_random_seed(0)
+
+        testEdges = _getDrugDrugTestEdges(rng)
+        adjMtxs = _getAdjMtxs(rng, 0.15)
+        _maskTestEdges(adjMtxs, testEdges)
+
+        edgeTypes = {edgeType: len(mtxs) for edgeType, mtxs in adjMtxs.items()}
+        edgeTypeDims = {edgeType: [mtx.shape for mtx in mtxs] for edgeType, mtxs in adjMtxs.items()}
+        feat = {
+            0: preprocessing.sparse_to_tuple(sp.identity(NUM_PROTEINS).tocoo()),
+            1: preprocessing.sparse_to_tuple(sp.identity(NUM_DRUGS).tocoo()),
+        }
+
+        graphTensors = PersistentGraphTensors(edgeTypes)
+        placeholders = _getPlaceholders(edgeTypes, graphTensors)
+
+        model = DecagonModel(
+            placeholders,
+            {0: NUM_PROTEINS, 1: NUM_DRUGS},
+            edgeTypes,
+            {(0, 0): 'bilinear', (0, 1): 'bilinear', (1, 0): 'bilinear', (1, 1): 'dedicom'},
+            identity_feat=preprocessing.identity_feature_types(feat)
+        )
+
+        with tf.name_scope('optimizer'):
+            optimizer = DecagonOptimizer(
+                model.embeddings,
+                model.latent_inters,
+                model.latent_varies,
+                _getDegrees(adjMtxs),
+                edgeTypes,
+                edgeTypeDims,
+                placeholders,
+                batch_size=BATCH_SIZE
+            )
+
+        variablesInitializer = tf.global_variables_initializer()
+        session = tf.Session()
+
+        # Round 1
+        iterator = _getIterator(adjMtxs, feat, edgeTypes, testEdges, graphTensors)
+        session.run(variablesInitializer)
+        iterator.load_graph_tensors(session)
+        optimizer.load_degrees(session)
+        assert np.all(np.isfinite(_trainEpoch(session, iterator, optimizer, placeholders)))
+
+        numOps = len(graph.get_operations())
+        variables = tf.global_variables()
+        roundOneValues = session.run(variables)
+
+        # Any op added from here on raises
+        graph.finalize()
+
+        # Round 2, with denser drug-drug relations of the same nodes
+        newAdjMtxs = _getAdjMtxs(rng, 0.3)
+        _maskTestEdges(newAdjMtxs, testEdges)
+
+        newDegrees = _getDegrees(newAdjMtxs)
+        optimizer.set_degrees(newDegrees)
+        newIterator = _getIterator(newAdjMtxs, feat, edgeTypes, testEdges, graphTensors)
+        newIterator.load_graph_tensors(session)
+        optimizer.load_degrees(session)
+
+        assert len(graph.get_operations()) == numOps
+
+        # Warm started, so loading the round's data kept the variables
+        for before, after in zip(roundOneValues, session.run(variables)):
+            np.testing.assert_array_equal(before, after)
+
+        # The round's data is what is now in the session
+        drugDrugValues = session.run(graphTensors.tensors['adj_mats_1,1,0'].values)
+        assert len(drugDrugValues) == len(newIterator.adj_train[1, 1][0][1])
+
+        stackedLogits, _ = optimizer._stacked_row_type_logits()
+        np.testing.assert_allclose(
+            session.run(tf.get_collection(tf.GraphKeys.LOCAL_VARIABLES, 'optimizer/neg_sample_logits_1')[0]),
+            stackedLogits[1],
+            rtol=1e-6
+        )
+
+        assert np.all(np.isfinite(_trainEpoch(session, newIterator, optimizer, placeholders)))
+        assert len(graph.get_operations()) == numOps
+
+        session.close()
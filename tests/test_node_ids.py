@@ -0,0 +1,81 @@
+from helpers import loadMainModule
+import numpy as np
+import pytest
+
+NodeIds = loadMainModule('Dtos', 'NodeIds.py')
+
+ID_CLASSES = [NodeIds.DrugId, NodeIds.ProteinId, NodeIds.SideEffectId]
+
+def _maxId(idCls):
+    numDigits = idCls.DECAGON_NUM_DIGITS if idCls.DECAGON_NUM_DIGITS else 9
+    return 10 ** numDigits - 1
+
+def _scalarToDecagonFormat(idCls, val):
+    # ProteinId does not override the toDecagonFormat classmethod
+    if idCls is NodeIds.ProteinId:
+        return idCls.toDecagonFormat(val)
+
+    return idCls(val).toDecagonFormat()
+
+def _getIds(idCls, seed):
+    rng = np.random.RandomState(seed)
+    maxId = _maxId(idCls)
+
+    randomIds = rng.randint(1, maxId + 1, size=200, dtype=np.int64)
+    endingInZero = randomIds[:50] // 10 * 10
+    powersOfTen = 10 ** np.arange(len(str(maxId)), dtype=np.int64)
+    edgeIds = np.array([0, 1, 10, 100, maxId], dtype=np.int64)
+
+    return np.concatenate([randomIds, endingInZero, powersOfTen, edgeIds])
+
+def _getDecagonStrs(idCls, ids):
+    return np.array([_scalarToDecagonFormat(idCls, int(x)) for x in ids])
+
+@pytest.mark.parametrize('idCls', ID_CLASSES)
+@pytest.mark.parametrize('seed', range(5))
+def testArrRoundTrip(idCls, seed):
+    strs = _getDecagonStrs(idCls, _getIds(idCls, seed))
+
+    roundTripped = idCls.toDecagonFormatArr(idCls.fromDecagonFormatArr(strs))
+
+    np.testing.assert_array_equal(roundTripped, strs)
+
+@pytest.mark.parametrize('idCls', ID_CLASSES)
+@pytest.mark.parametrize('seed', range(5))
+def testArrMatchesScalar(idCls, seed):
+    ids = _getIds(idCls, seed)
+    strs = _getDecagonStrs(idCls, ids)
+
+    fromArr = idCls.fromDecagonFormatArr(strs)
+    fromScalar = np.array([idCls.fromDecagonFormat(s) for s in strs], dtype=np.int64)
+
+    np.testing.assert_array_equal(fromArr, fromScalar)
+    np.testing.assert_array_equal(fromArr, ids)
+
+    toArr = idCls.toDecagonFormatArr(fromArr)
+    toScalar = np.array([_scalarToDecagonFormat(idCls, int(x)) for x in fromArr])
+
+    np.testing.assert_array_equal(toArr, toScalar)
+
+@pytest.mark.parametrize('idCls', ID_CLASSES)
+def testIdsEndingInZeroAreDistinct(idCls):
+    ids = np.array([1, 10, 100, 1000, 1001, 10010], dtype=np.int64)
+    strs = _getDecagonStrs(idCls, ids)
+
+    fromArr = idCls.fromDecagonFormatArr(strs)
+
+    np.testing.assert_array_equal(fromArr, ids)
+    assert len(np.unique(fromArr)) == len(ids)
+
+@pytest.mark.parametrize('idCls', ID_CLASSES)
+def testAllZeroId(idCls):
+    zeroStr = idCls.DECAGON_PREFIX + '0' * max(idCls.DECAGON_NUM_DIGITS, 1)
+
+    assert idCls.fromDecagonFormat(zeroStr) == 0
+    np.testing.assert_array_equal(idCls.fromDecagonFormatArr([zeroStr]), [0])
+    np.testing.assert_array_equal(idCls.toDecagonFormatArr([0]), [zeroStr])
+
+@pytest.mark.parametrize('idCls', ID_CLASSES)
+def testEmptyArr(idCls):
+    assert idCls.fromDecagonFormatArr([]).shape == (0,)
+    assert idCls.toDecagonFormatArr([]).shape == (0,)
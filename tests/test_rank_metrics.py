@@ -0,0 +1,96 @@
+from decagon.utility import rank_metrics
+from helpers import loadMainModule
+import numpy as np
+import pytest
+
+RankMetrics = loadMainModule('Utils', 'RankMetrics.py')
+
+APK_RANK = 5
+
+def _bruteForceAuroc(scores, labels):
+    posScores = scores[labels]
+    negScores = scores[~labels]
+    if len(posScores) == 0 or len(negScores) == 0:
+        return np.nan
+
+    wins = (posScores[:, np.newaxis] > negScores[np.newaxis, :]).sum()
+    ties = (posScores[:, np.newaxis] == negScores[np.newaxis, :]).sum()
+
+    return (wins + (0.5 * ties)) / (len(posScores) * len(negScores))
+
+def _bruteForceAuprc(scores, labels):
+    # sklearn's average precision: the precision at each distinct score
+    # threshold, weighted by the recall it adds
+    numPos = labels.sum()
+    if numPos == 0:
+        return np.nan
+
+    result = 0.
+    lastRecall = 0.
+    for threshold in sorted(set(scores.tolist()), reverse=True):
+        isPredicted = scores >= threshold
+        truePos = (isPredicted & labels).sum()
+
+        recall = truePos / numPos
+        result += (recall - lastRecall) * (truePos / isPredicted.sum())
+        lastRecall = recall
+
+    return result
+
+def _referenceApk(scores, labels, apkRank):
+    # Ties ranked in input order
+    predicted = sorted(range(len(scores)), key=lambda i: -scores[i])
+    actual = [i for i in range(len(scores)) if labels[i]]
+
+    return rank_metrics.apk(actual, predicted, k=apkRank)
+
+def _getCase(rng):
+    length = rng.randint(0, 30)
+
+    # Few distinct scores, so that many are tied
+    scores = rng.randint(0, rng.randint(1, 8), size=length).astype(np.float64)
+    labels = rng.rand(length) < rng.rand()
+
+    return scores, labels
+
+def _assertMatches(scores, labels, auroc, auprc, apk):
+    np.testing.assert_allclose(auroc, _bruteForceAuroc(scores, labels), equal_nan=True)
+    np.testing.assert_allclose(auprc, _bruteForceAuprc(scores, labels), equal_nan=True)
+    np.testing.assert_allclose(apk, _referenceApk(scores, labels, APK_RANK))
+
+@pytest.mark.parametrize('seed', range(10))
+def testRankMetricsMatchesBruteForce(seed):
+    rng = np.random.RandomState(seed)
+
+    for _ in range(30):
+        scores, labels = _getCase(rng)
+        if len(scores) == 0:
+            continue
+
+        _assertMatches(scores, labels, *RankMetrics.rankMetrics(scores, labels, APK_RANK))
+
+@pytest.mark.parametrize('seed', range(10))
+def testSegmentedMatchesEachSegment(seed):
+    rng = np.random.RandomState(seed)
+    cases = [_getCase(rng) for _ in range(rng.randint(1, 12))]
+
+    aurocs, auprcs, apks = RankMetrics.segmentedRankMetrics(
+        np.concatenate([scores for scores, _ in cases]),
+        np.concatenate([labels for _, labels in cases]),
+        [len(scores) for scores, _ in cases],
+        APK_RANK
+    )
+
+    assert len(aurocs) == len(auprcs) == len(apks) == len(cases)
+    for (scores, labels), auroc, auprc, apk in zip(cases, aurocs, auprcs, apks):
+        _assertMatches(scores, labels, auroc, auprc, apk)
+
+def testAllTied():
+    scores = np.zeros(6)
+    labels = np.array([True, False, True, False, False, True])
+
+    auroc, auprc, apk = RankMetrics.rankMetrics(scores, labels, APK_RANK)
+
+    assert auroc == 0.5
+    assert auprc == 0.5
+    np.testing.assert_allclose(apk, _referenceApk(scores, labels, APK_RANK))
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip('tensorflow')
+
+from decagon.deep.optimizer import DecagonOptimizer
+
+def _getOptimizer(embeddings, latentInters, latentVaries, edgeTypes, sampledPairs):
+    # Only what sampled_predict reads is set, rather than building a model
+    optimizer = DecagonOptimizer.__new__(DecagonOptimizer)
+    optimizer.embeddings = [tf.constant(x) for x in embeddings]
+    optimizer.latent_inters = tf.constant(latentInters)
+    optimizer.latent_varies = tf.constant(latentVaries)
+    optimizer.edge_types = edgeTypes
+    optimizer.sampled_pairs = sampledPairs
+    optimizer.obj_type_lookup_start = tf.cumsum([0] + [len(x) for x in embeddings[:-1]])
+
+    optimizer.sampled_predict()
+
+    return optimizer
+
+@pytest.mark.parametrize('numPairs', [0, 1, 7, 200])
+def testSampledPredictMatchesDense(numPairs):
+    rng = np.random.RandomState(numPairs)
+    dim = 4
+
+    edgeTypes = {(0, 0): 1, (0, 1): 1, (1, 0): 1, (1, 1): 3}
+    numNodes = {0: 6, 1: 5}
+    relTypes = [(i, j) for i, j in edgeTypes for _ in range(edgeTypes[i, j])]
+
+    embeddings = [rng.randn(numNodes[i], dim).astype(np.float32) for i in range(2)]
+    latentInters = rng.randn(len(relTypes), dim, dim).astype(np.float32)
+    latentVaries = np.stack([np.diag(x) for x in rng.randn(len(relTypes), dim)]).astype(np.float32)
+
+    rels = rng.randint(0, len(relTypes), size=numPairs)
+    rows = np.array([rng.randint(numNodes[relTypes[r][0]]) for r in rels], dtype=np.int64)
+    cols = np.array([rng.randint(numNodes[relTypes[r][1]]) for r in rels], dtype=np.int64)
+    pairs = np.stack([rows, cols, rels], axis=1).reshape((-1, 3)).astype(np.int32)
+
+    expected = np.array([
+        embeddings[relTypes[r][0]][row]
+            @ latentVaries[r] @ latentInters[r] @ latentVaries[r]
+            @ embeddings[relTypes[r][1]][col]
+        for row, col, r in pairs
+    ], dtype=np.float32)
+
+    with tf.Graph().as_default():
+        sampledPairs = tf.placeholder(tf.int32, shape=(None, 3))
+        optimizer = _getOptimizer(embeddings, latentInters, latentVaries, edgeTypes, sampledPairs)
+
+        with tf.Session() as session:
+            result = session.run(
+                optimizer.sampled_predictions,
+                feed_dict={sampledPairs: pairs}
+            )
+
+    np.testing.assert_allclose(result, expected.reshape(-1), rtol=1e-4, atol=1e-5)
@@ -0,0 +1,58 @@
+from helpers import loadMainModule
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+Bitset = loadMainModule('Utils', 'Bitset.py').Bitset
+Sparse = loadMainModule('Utils', 'Sparse.py')
+
+def _getMask(shape, linearIdxs):
+    mask = Bitset(shape[0] * shape[1])
+    mask.add(linearIdxs)
+
+    return mask
+
+def _getDenseMasked(mask, mtx):
+    return mask.toArray().reshape(mtx.shape) * mtx.toarray()
+
+def _getMtxWithExplicitZeros(rng, shape):
+    mtx = sp.random(shape[0], shape[1], density=0.3, format='coo', random_state=rng)
+
+    # Stored entries whose value is 0, which must not be kept
+    mtx.data[::4] = 0
+
+    return sp.csr_matrix((mtx.data, (mtx.row, mtx.col)), shape=shape)
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('shape', [(1, 1), (7, 5), (20, 33)])
+def testMaskMatrixMatchesDense(seed, shape):
+    rng = np.random.RandomState(seed)
+
+    mtx = _getMtxWithExplicitZeros(rng, shape)
+    numPairs = shape[0] * shape[1]
+    mask = _getMask(shape, rng.randint(0, numPairs, size=rng.randint(0, numPairs + 1)))
+
+    result = Sparse.maskMatrix(mask, mtx)
+    expected = _getDenseMasked(mask, mtx)
+
+    assert isinstance(result, Sparse.RelationCsrMatrix)
+    assert result.dtype == np.float64
+    assert result.shape == shape
+    np.testing.assert_array_equal(result.toarray(), expected)
+    assert result.nnz == np.count_nonzero(expected)
+
+def testEmptyMask():
+    mtx = _getMtxWithExplicitZeros(np.random.RandomState(0), (9, 11))
+
+    result = Sparse.maskMatrix(Bitset(9 * 11), mtx)
+
+    assert result.shape == (9, 11)
+    assert result.nnz == 0
+
+def testFullMaskDropsOnlyExplicitZeros():
+    mtx = _getMtxWithExplicitZeros(np.random.RandomState(1), (9, 11))
+
+    result = Sparse.maskMatrix(_getMask((9, 11), np.arange(9 * 11)), mtx)
+
+    np.testing.assert_array_equal(result.toarray(), mtx.toarray())
+    assert result.nnz == np.count_nonzero(mtx.data)